@@ -0,0 +1,556 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for PurrfectMatch hot paths.
+Run all benchmarks with `python bench_purrfect_match.py`, or name the ones to run.
+"""
+
+import argparse
+import contextlib
+import gzip
+import io
+import json
+import math
+import os
+import random
+import tempfile
+import threading
+import time
+import timeit
+from concurrent.futures import ThreadPoolExecutor
+
+import purrfect_match
+from purrfect_match import (
+    JSON_BACKENDS, set_json_backend, iter_petfinder_animals, extract_animal_fields,
+    UserProfile, CatProfile, BreedInfo, CompatibilityScore, HomeType, ExperienceLevel, TEMPERAMENTS, CompatibilityCalculator,
+    PurrfectMatchApp, StubTransport, CassetteTransport, set_http_transport, user_profile_from_dict
+)
+
+# =============================================================================
+# PAYLOADS
+# =============================================================================
+
+DESCRIPTIONS = [
+    "A calm and gentle lap cat who loves quiet evenings.",
+    "Very active and playful, this energetic kitten needs lots of toys.",
+    "Independent and self-sufficient, but friendly with visitors.",
+    "Shy at first, affectionate once she knows you. Special needs diet.",
+    "Social, outgoing and loves to play with other cats.",
+]
+
+def make_petfinder_payload(n_animals: int = 100, seed: int = 0) -> bytes:
+    """Build a realistic Petfinder search response body with n animals"""
+    rng = random.Random(seed)
+    animals = []
+    for i in range(n_animals):
+        animals.append({
+            'id': 50000000 + i,
+            'organization_id': f"NY{rng.randint(100, 999)}",
+            'url': f"https://www.petfinder.com/cat/cat-{i}",
+            'type': 'Cat',
+            'species': 'Cat',
+            'breeds': {'primary': rng.choice(['Domestic Short Hair', 'Siamese', 'Tabby', 'Maine Coon']),
+                       'secondary': rng.choice([None, 'Domestic Long Hair']),
+                       'mixed': False, 'unknown': False},
+            'colors': {'primary': 'Black', 'secondary': None, 'tertiary': None},
+            'age': rng.choice(['Baby', 'Young', 'Adult', 'Senior']),
+            'gender': rng.choice(['Male', 'Female']),
+            'size': rng.choice(['Small', 'Medium', 'Large']),
+            'coat': 'Short',
+            'attributes': {'spayed_neutered': True, 'house_trained': True, 'declawed': False,
+                           'special_needs': False, 'shots_current': True},
+            'environment': {'children': None, 'dogs': False, 'cats': True},
+            'tags': ['Friendly', 'Playful'],
+            'name': f"Cat {i}",
+            'description': rng.choice(DESCRIPTIONS),
+            'photos': [{'small': f"https://photos.example/{i}/{p}-s.jpg",
+                        'medium': f"https://photos.example/{i}/{p}-m.jpg",
+                        'large': f"https://photos.example/{i}/{p}-l.jpg",
+                        'full': f"https://photos.example/{i}/{p}.jpg"} for p in range(rng.randint(0, 4))],
+            'status': 'adoptable',
+            'published_at': '2024-01-01T00:00:00+0000',
+            'distance': round(rng.uniform(0, 50), 2),
+            'contact': {'email': f"shelter{i % 7}@example.com", 'phone': '555-0100',
+                        'address': {'address1': None, 'city': 'Brooklyn', 'state': 'NY',
+                                    'postcode': '11201', 'country': 'US'}},
+            '_links': {'self': {'href': f"/v2/animals/{50000000 + i}"}},
+        })
+    return json.dumps({
+        'animals': animals,
+        'pagination': {'count_per_page': n_animals, 'total_count': n_animals * 10,
+                       'current_page': 1, 'total_pages': 10},
+    }).encode('utf-8')
+
+def load_payload(path: str) -> bytes:
+    """Load a recorded Petfinder response body (optionally gzip-compressed)"""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as f:
+        return f.read()
+
+def load_cassette_payloads(path: str) -> list:
+    """Petfinder search response bodies from a recorded cassette"""
+    transport = CassetteTransport.from_file(path)
+    return [json.dumps(interaction['body']).encode('utf-8')
+            for interaction in transport.recordings.get("GET https://api.petfinder.com/v2/animals", [])
+            if interaction.get('status') == 200]
+
+# =============================================================================
+# BENCHMARKS
+# =============================================================================
+
+def _legacy_parse(payload: bytes) -> list:
+    """Parse a search page the way search_cats did before the fast decode path"""
+    records = []
+    for animal in json.loads(payload).get('animals', []):
+        photos = [photo['large'] for photo in animal.get('photos', []) if 'large' in photo]
+        breeds = []
+        if animal.get('breeds'):
+            if animal['breeds'].get('primary'):
+                breeds.append(animal['breeds']['primary'])
+            if animal['breeds'].get('secondary'):
+                breeds.append(animal['breeds']['secondary'])
+        contact = animal.get('contact', {})
+        records.append(dict(
+            petfinder_id=str(animal.get('id', '')), name=animal.get('name', 'Unknown'),
+            age=animal.get('age', 'Unknown'), breeds=breeds, size=animal.get('size', 'Unknown'),
+            gender=animal.get('gender', 'Unknown'), description=animal.get('description', ''),
+            photos=photos, contact_email=contact.get('email', ''), contact_phone=contact.get('phone', ''),
+            shelter_name=animal.get('organization_id', 'Unknown Shelter'),
+            distance=animal.get('distance', 0.0)
+        ))
+    return records
+
+def _report(name: str, seconds: float, rounds: int, baseline: float = None):
+    per_call = seconds / rounds * 1000
+    speedup = f"  ({baseline / seconds:.2f}x vs legacy)" if baseline else ""
+    print(f"  {name:<28} {per_call:8.3f} ms/page{speedup}")
+
+def bench_json_decode(args):
+    """Decode Petfinder search pages into CatProfile fields"""
+    payloads = [load_payload(path) for path in args.payload]
+    if args.cassette:
+        payloads += load_cassette_payloads(args.cassette)
+    payloads = payloads or [make_petfinder_payload(args.animals)]
+    original_backend = purrfect_match.json_backend
+
+    for payload in payloads:
+        print(f"\nPayload: {len(payload) / 1024:.0f} KiB")
+        baseline = timeit.timeit(lambda: _legacy_parse(payload), number=args.rounds)
+        _report("legacy (json + .get walk)", baseline, args.rounds)
+
+        for backend in JSON_BACKENDS:
+            set_json_backend(backend)
+            elapsed = timeit.timeit(
+                lambda: [extract_animal_fields(a) for a in iter_petfinder_animals(payload)],
+                number=args.rounds
+            )
+            _report(f"fast path ({backend})", elapsed, args.rounds, baseline)
+
+    set_json_backend(original_backend)
+
+def make_cats(n_cats: int = 1000, seed: int = 0) -> list:
+    """Build n cats with random derived attributes"""
+    rng = random.Random(seed)
+    return [
+        CatProfile(
+            petfinder_id=str(i), name=f"Cat {i}", age='Adult', breeds=['Domestic Short Hair'],
+            size='Medium', gender='Female', description='', photos=[], contact_email='',
+            contact_phone='', shelter_name='', energy_level=rng.randint(1, 10),
+            independence=rng.randint(1, 10), temperament=rng.choice(TEMPERAMENTS),
+            personality_traits=rng.sample(['calm', 'playful', 'independent', 'affectionate', 'social', 'shy'],
+                                          rng.randint(0, 3))
+        )
+        for i in range(n_cats)
+    ]
+
+def make_users(n_users: int = 20, seed: int = 0) -> list:
+    """Build n users covering the quiz answer space"""
+    rng = random.Random(seed)
+    return [
+        UserProfile(
+            home_type=rng.choice(list(HomeType)), hours_away=rng.choice([3, 6, 10]),
+            activity_level=rng.randint(1, 10), experience=rng.choice(list(ExperienceLevel)),
+            allergies=rng.random() < 0.2, desired_traits=rng.sample(['calm', 'playful', 'affectionate'], 2),
+            zip_code='12345'
+        )
+        for _ in range(n_users)
+    ]
+
+def _legacy_lifestyle_score(user, cat) -> int:
+    """Lifestyle sub-score as the hand-written branches from the baseline implementation"""
+    score = 0
+    if user.hours_away <= 4:
+        score += 20
+    elif user.hours_away <= 8:
+        if cat.independence >= 7:
+            score += 20
+        else:
+            score += 12
+    else:
+        if cat.independence >= 8:
+            score += 15
+        else:
+            score += 5
+    if user.home_type == HomeType.APARTMENT:
+        if cat.energy_level <= 5:
+            score += 10
+        elif cat.energy_level <= 7:
+            score += 6
+        else:
+            score += 2
+    else:
+        score += 10
+    activity_diff = abs(user.activity_level - cat.energy_level)
+    score += max(0, 10 - activity_diff)
+    return min(score, 40)
+
+def _legacy_experience_score(user, cat) -> int:
+    """Experience sub-score as the hand-written branches from the baseline implementation"""
+    if user.experience == ExperienceLevel.FIRST_TIME:
+        if cat.temperament == "easy":
+            return 30
+        elif cat.temperament == "moderate":
+            return 20
+        else:
+            return 10
+    elif user.experience == ExperienceLevel.SOME_EXPERIENCE:
+        if cat.temperament in ["easy", "moderate"]:
+            return 30
+        else:
+            return 25
+    else:
+        return 30
+
+def bench_subscores(args):
+    """Lifestyle and experience sub-scores: baseline branches vs lookup tables"""
+    calculator = CompatibilityCalculator()
+    cats, users = make_cats(args.cats), make_users()
+    pairs = len(cats) * len(users)
+
+    def branches():
+        for user in users:
+            for cat in cats:
+                _legacy_lifestyle_score(user, cat)
+                _legacy_experience_score(user, cat)
+
+    def tables_per_pair():
+        for user in users:
+            for cat in cats:
+                calculator._calculate_lifestyle_score(user, cat)
+                calculator._calculate_experience_score(user, cat)
+
+    def tables_per_user():
+        # How MatchSession and batch scoring use them: the user's table offsets are computed once
+        for user in users:
+            calculator.lifestyle_scores(user, cats)
+            calculator.experience_scores(user, cats)
+
+    rounds = max(1, args.rounds // 100)
+    baseline = min(timeit.repeat(branches, number=rounds, repeat=5))
+    print(f"  {'baseline branches':<28} {baseline / rounds / pairs * 1e9:8.0f} ns/pair")
+    for name, run in (("tables, per pair", tables_per_pair), ("tables, per user", tables_per_user)):
+        elapsed = min(timeit.repeat(run, number=rounds, repeat=5))
+        print(f"  {name:<28} {elapsed / rounds / pairs * 1e9:8.0f} ns/pair  ({baseline / elapsed:.2f}x)")
+
+def bench_traits(args):
+    """Personality trait matching: set intersection per pair vs the inverted trait index"""
+    calculator = CompatibilityCalculator()
+    cats, users = make_cats(args.cats), make_users()
+    breed_infos = [None] * len(cats)
+    pairs = len(cats) * len(users)
+
+    def sets_per_pair():
+        for user in users:
+            for cat in cats:
+                calculator._calculate_personality_score(user, cat)
+
+    index = purrfect_match.TraitIndex.from_cats(cats)
+
+    def bitmasks_per_user():
+        # The index is built once per inventory, as MatchSession does
+        for user in users:
+            calculator.personality_scores(user, cats, breed_infos, traits=index)
+
+    rounds = max(1, args.rounds // 100)
+    baseline = min(timeit.repeat(sets_per_pair, number=rounds, repeat=5))
+    print(f"  {'set intersection, per pair':<28} {baseline / rounds / pairs * 1e9:8.0f} ns/pair")
+    elapsed = min(timeit.repeat(bitmasks_per_user, number=rounds, repeat=5))
+    print(f"  {'bitmasks, per user':<28} {elapsed / rounds / pairs * 1e9:8.0f} ns/pair  ({baseline / elapsed:.2f}x)")
+    elapsed = min(timeit.repeat(lambda: index.positions(index.matching(['affectionate'])), number=rounds, repeat=5))
+    print(f"  {'prune to affectionate cats':<28} {elapsed / rounds * 1e6:8.1f} us/inventory"
+          f"  ({index.trait_counts()['affectionate']} of {len(cats)} kept)")
+
+def _legacy_personality_score(user, cat, breed_info) -> int:
+    """Personality sub-score as hand-written branches"""
+    score = 15
+    if user.desired_traits and cat.personality_traits:
+        matches = len(set(user.desired_traits) & set(cat.personality_traits))
+        score += min(matches * 5, 15)
+    if user.allergies and breed_info:
+        if not breed_info.hypoallergenic:
+            score -= 10
+    return max(0, min(score, 30))
+
+def _legacy_reasons(lifestyle: int, experience: int, personality: int) -> list:
+    """Explanations as hand-written branches"""
+    reasons = []
+    if lifestyle >= 35:
+        reasons.append("Excellent lifestyle match for your schedule and home")
+    elif lifestyle >= 25:
+        reasons.append("Good lifestyle compatibility")
+    else:
+        reasons.append("Some lifestyle adjustments may be needed")
+    if experience >= 25:
+        reasons.append("Perfect match for your experience level")
+    elif experience >= 20:
+        reasons.append("Suitable for your cat experience")
+    else:
+        reasons.append("May be challenging for your current experience")
+    if personality >= 25:
+        reasons.append("Strong personality and trait compatibility")
+    elif personality >= 15:
+        reasons.append("Good personality match")
+    else:
+        reasons.append("Some personality differences to consider")
+    return reasons
+
+def bench_rules(args):
+    """Full compatibility score: hand-written branches vs compiled scoring rules"""
+    calculator = CompatibilityCalculator()
+    cats, users = make_cats(args.cats), make_users()
+    breed_info = BreedInfo(name='Domestic Short Hair', temperament=[], origin='', description='',
+                           life_span='', hypoallergenic=0)
+    pairs = len(cats) * len(users)
+
+    def branches():
+        for user in users:
+            for cat in cats:
+                lifestyle = _legacy_lifestyle_score(user, cat)
+                experience = _legacy_experience_score(user, cat)
+                personality = _legacy_personality_score(user, cat, breed_info)
+                CompatibilityScore(cat_id=cat.petfinder_id, total_score=lifestyle + experience + personality,
+                                   lifestyle_score=lifestyle, experience_score=experience,
+                                   personality_score=personality,
+                                   reasons=_legacy_reasons(lifestyle, experience, personality))
+
+    def compiled():
+        for user in users:
+            for cat in cats:
+                calculator.calculate_compatibility(user, cat, breed_info)
+
+    # Best of several runs, since both sides are within noise of each other
+    rounds = max(1, args.rounds // 100)
+    baseline = min(timeit.repeat(branches, number=rounds, repeat=5))
+    print(f"  {'hand-written branches':<28} {baseline / rounds / pairs * 1e9:8.0f} ns/pair")
+    elapsed = min(timeit.repeat(compiled, number=rounds, repeat=5))
+    print(f"  {'compiled rules':<28} {elapsed / rounds / pairs * 1e9:8.0f} ns/pair"
+          f"  ({baseline / elapsed:.2f}x)")
+
+# =============================================================================
+# LOAD TEST
+# =============================================================================
+
+LOAD_STAGES = ['quiz', 'match', 'save', 'session']
+
+def make_stub_fixtures(n_animals: int = 100) -> dict:
+    """Fixtures answering the token, search and breed requests a matching session makes"""
+    breeds = [{'name': name, 'temperament': temperament, 'origin': 'Unknown', 'description': '',
+               'life_span': '12 - 15', 'hypoallergenic': 0, 'energy_level': energy, 'affection_level': 4}
+              for name, temperament, energy in [('Siamese', 'Active, Playful, Social', 5),
+                                                ('Maine Coon', 'Gentle, Calm, Affectionate', 3),
+                                                ('Domestic Short Hair', 'Friendly, Playful', 3)]]
+    return {
+        'POST https://api.petfinder.com/v2/oauth2/token': {
+            'status': 200, 'body': {'access_token': 'stub-token', 'expires_in': 3600}},
+        'GET https://api.petfinder.com/v2/animals': {
+            'status': 200, 'body': make_petfinder_payload(n_animals).decode('utf-8')},
+        'GET https://api.thecatapi.com/v1/breeds': {'status': 200, 'body': breeds},
+    }
+
+class DelayedTransport:
+    """Wraps a transport, adding a fixed network delay to every request"""
+    
+    def __init__(self, transport, delay: float):
+        self.transport = transport
+        self.delay = delay
+    
+    def __call__(self, method: str, url: str, **kwargs):
+        time.sleep(self.delay)
+        return self.transport(method, url, **kwargs)
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def run_session(app, answers: dict, scheduled: float, timings: dict, errors: dict, lock):
+    """One simulated adopter: take the quiz, find matches, save the top five"""
+    stage = 'quiz'
+    try:
+        started = time.perf_counter()
+        user = user_profile_from_dict(answers)
+        quiz_done = time.perf_counter()
+        
+        stage = 'match'
+        matches = app.find_matches(user)
+        match_done = time.perf_counter()
+        if not matches:
+            raise LookupError("no matches found")
+        
+        stage = 'save'
+        user_id = app.store.save_user(user)
+        for cat, score, _ in matches[:5]:
+            app.store.save_match(user_id, cat, score)
+        finished = time.perf_counter()
+    except Exception as e:
+        with lock:
+            errors.setdefault(stage, {}).setdefault(type(e).__name__, 0)
+            errors[stage][type(e).__name__] += 1
+        return
+    
+    with lock:
+        timings['quiz'].append(quiz_done - started)
+        timings['match'].append(match_done - quiz_done)
+        timings['save'].append(finished - match_done)
+        # Includes time spent queued behind earlier sessions
+        timings['session'].append(finished - scheduled)
+
+def run_load_test(sessions: int = 200, rate: float = 50.0, concurrency: int = 16, zips: int = 20,
+                  stub_latency: float = 0.0, n_animals: int = 100, write_behind: str = None,
+                  transport=None, seed: int = 0) -> dict:
+    """Run simulated sessions arriving at rate per second against stub APIs and a temporary database.
+
+    transport replaces the synthetic stub responses, e.g. with a recorded
+    CassetteTransport. Returns a report with throughput, per-stage latency
+    percentiles (ms) and error rates.
+    """
+    rng = random.Random(seed)
+    transport = transport or StubTransport(make_stub_fixtures(n_animals))
+    set_http_transport(DelayedTransport(transport, stub_latency) if stub_latency else transport)
+    
+    timings = {stage: [] for stage in LOAD_STAGES}
+    errors = {}
+    lock = threading.Lock()
+    zip_codes = [f"{10001 + i:05d}" for i in range(zips)]
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        app = PurrfectMatchApp(os.path.join(tmp, "loadtest.db"))
+        app.set_api_keys('stub-key', 'stub-secret')
+        if write_behind:
+            app.enable_write_behind(write_behind)
+        
+        # The app reports progress on stdout; keep it out of the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="loadtest")
+            started = time.perf_counter()
+            for i in range(sessions):
+                # Open-loop arrivals: sessions start on schedule whether or not earlier ones finished
+                scheduled = started + i / rate
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                answers = {
+                    'home_type': rng.choice(list(HomeType)).value, 'hours_away': rng.choice([3, 6, 10]),
+                    'activity_level': rng.randint(1, 10), 'experience': rng.choice(list(ExperienceLevel)).value,
+                    'allergies': rng.random() < 0.2,
+                    'desired_traits': rng.sample(['calm', 'playful', 'affectionate', 'independent'], 2),
+                    'zip_code': rng.choice(zip_codes),
+                }
+                executor.submit(run_session, app, answers, scheduled, timings, errors, lock)
+            executor.shutdown(wait=True)
+            app.flush_writes()
+            elapsed = time.perf_counter() - started
+            if app.writer:
+                app.writer.close()
+            with app.db.pool.reader() as conn:
+                saved_users = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+        caches = app.cache_stats()
+        app.db.close()
+    set_http_transport(None)
+    
+    failed = sum(sum(by_type.values()) for by_type in errors.values())
+    stages = {}
+    for stage, values in timings.items():
+        values.sort()
+        stages[stage] = {
+            'count': len(values),
+            'mean_ms': round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+            'p50_ms': round(percentile(values, 50) * 1000, 3),
+            'p95_ms': round(percentile(values, 95) * 1000, 3),
+            'p99_ms': round(percentile(values, 99) * 1000, 3),
+            'max_ms': round(values[-1] * 1000, 3) if values else 0.0,
+        }
+    report = {
+        'config': {'sessions': sessions, 'rate': rate, 'concurrency': concurrency, 'zips': zips,
+                   'stub_latency': stub_latency, 'animals': n_animals, 'write_behind': write_behind},
+        'duration_s': round(elapsed, 3),
+        'completed': len(timings['session']),
+        'failed': failed,
+        'error_rate': round(failed / sessions, 4) if sessions else 0.0,
+        'errors': errors,
+        'throughput_per_s': round(len(timings['session']) / elapsed, 2) if elapsed else 0.0,
+        'api_requests': len(transport.requests),
+        'saved_users': saved_users,
+        'stages': stages,
+        'caches': caches,
+    }
+    return report
+
+def bench_load(args):
+    """Simulated adopter sessions at a fixed arrival rate against stub APIs"""
+    transport = CassetteTransport.from_file(args.cassette, args.replay_latency) if args.cassette else None
+    report = run_load_test(args.sessions, args.rate, args.concurrency, args.zips,
+                           args.stub_latency, args.animals, args.write_behind, transport)
+    text = json.dumps(report, indent=2)
+    if args.report:
+        with open(args.report, 'w') as f:
+            f.write(text + "\n")
+        print(f"  Report written to {args.report}")
+    for stage in LOAD_STAGES:
+        s = report['stages'][stage]
+        print(f"  {stage:<10} p50 {s['p50_ms']:8.2f} ms  p95 {s['p95_ms']:8.2f} ms  p99 {s['p99_ms']:8.2f} ms")
+    print(f"  {report['completed']}/{args.sessions} sessions in {report['duration_s']:.2f}s "
+          f"({report['throughput_per_s']:.1f}/s), error rate {report['error_rate']:.2%}")
+    if not args.report:
+        print(text)
+
+BENCHMARKS = {
+    'json-decode': bench_json_decode,
+    'subscores': bench_subscores,
+    'traits': bench_traits,
+    'rules': bench_rules,
+    'load': bench_load,
+}
+
+# =============================================================================
+# MAIN ENTRY POINT
+# =============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="PurrfectMatch benchmarks")
+    parser.add_argument('benchmarks', nargs='*', choices=[[]] + list(BENCHMARKS),
+                        help="benchmarks to run (default: all)")
+    parser.add_argument('--rounds', type=int, default=200, help="iterations per measurement")
+    parser.add_argument('--payload', action='append', default=[],
+                        help="recorded Petfinder response body to use (repeatable, .gz allowed)")
+    parser.add_argument('--cassette', help="recorded API cassette (from purrfect_match.py --record) to "
+                                           "take search pages from and to replay in the load test")
+    parser.add_argument('--replay-latency', type=float, default=0.0,
+                        help="load test: replay cassette responses at their recorded time times this factor")
+    parser.add_argument('--animals', type=int, default=100, help="animals per synthetic page")
+    parser.add_argument('--cats', type=int, default=1000, help="cats in the synthetic inventory")
+    parser.add_argument('--sessions', type=int, default=200, help="load test: sessions to simulate")
+    parser.add_argument('--rate', type=float, default=50.0, help="load test: session arrivals per second")
+    parser.add_argument('--concurrency', type=int, default=16, help="load test: sessions running at once")
+    parser.add_argument('--zips', type=int, default=20, help="load test: distinct ZIP codes searched")
+    parser.add_argument('--stub-latency', type=float, default=0.0,
+                        help="load test: seconds of simulated network delay per API request")
+    parser.add_argument('--write-behind', choices=list(purrfect_match.DURABILITY_MODES),
+                        help="load test: save through the write-behind writer")
+    parser.add_argument('--report', help="load test: write the JSON report to this file")
+    args = parser.parse_args()
+
+    for name in args.benchmarks or BENCHMARKS:
+        print(f"== {name}: {BENCHMARKS[name].__doc__}")
+        BENCHMARKS[name](args)
@@ -6,12 +6,39 @@ A CLI application that uses real APIs to match users with adoptable cats.
 
 import requests
 import sqlite3
+import argparse
+import csv
+import gzip
+import io
 import json
 import time
 import os
-from dataclasses import dataclass
-from typing import List, Dict, Optional
+import re
+import heapq
+import hashlib
+import threading
+import queue
+import atexit
+import sys
+import cProfile
+import pstats
+import tracemalloc
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+import mmap
+import struct
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass, replace, asdict
+from datetime import date
+from typing import List, Dict, Optional, Tuple
 from enum import Enum
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # Optional: columnar features are exposed as plain arrays instead
 
 try:
     from dotenv import load_dotenv
@@ -34,6 +61,27 @@ class ExperienceLevel(Enum):
     SOME_EXPERIENCE = "some_experience"
     VERY_EXPERIENCED = "very_experienced"
 
+# Personality traits derived from descriptions, in bitmask order (bit 0 = calm)
+PERSONALITY_TRAITS = ("calm", "playful", "independent", "affectionate", "social", "shy")
+TRAIT_BITS = {trait: 1 << i for i, trait in enumerate(PERSONALITY_TRAITS)}
+# Number of traits set in each possible trait bitmask
+TRAIT_POPCOUNT = bytes(bin(mask).count("1") for mask in range(1 << len(PERSONALITY_TRAITS)))
+
+# Cat temperaments, in code order
+TEMPERAMENTS = ("easy", "moderate", "challenging")
+TEMPERAMENT_CODES = {name: i for i, name in enumerate(TEMPERAMENTS)}
+
+def encode_traits(traits: List[str]) -> int:
+    """Encode a list of personality traits as a bitmask (unknown traits are ignored)"""
+    mask = 0
+    for trait in traits:
+        mask |= TRAIT_BITS.get(trait, 0)
+    return mask
+
+def decode_traits(mask: int) -> List[str]:
+    """Decode a trait bitmask back into trait names"""
+    return [trait for trait, bit in TRAIT_BITS.items() if mask & bit]
+
 @dataclass
 class UserProfile:
     """User profile from compatibility quiz"""
@@ -50,6 +98,21 @@ class UserProfile:
         if self.desired_traits is None:
             self.desired_traits = []
 
+def user_profile_from_dict(data: Dict) -> UserProfile:
+    """Build a UserProfile from JSON-style quiz answers (enums given by value)"""
+    try:
+        return UserProfile(
+            home_type=HomeType(data.get('home_type', HomeType.APARTMENT.value)),
+            hours_away=int(data.get('hours_away', 8)),
+            activity_level=int(data.get('activity_level', 5)),
+            experience=ExperienceLevel(data.get('experience', ExperienceLevel.FIRST_TIME.value)),
+            allergies=bool(data.get('allergies', False)),
+            desired_traits=[str(t).strip().lower() for t in data.get('desired_traits', [])],
+            zip_code=str(data.get('zip_code', ""))
+        )
+    except (TypeError, AttributeError) as e:
+        raise ValueError(f"Invalid quiz answers: {e}")
+
 @dataclass
 class CatProfile:
     """Cat profile from Petfinder API"""
@@ -98,24 +161,718 @@ class CompatibilityScore:
     personality_score: int
     reasons: List[str]
 
+# =============================================================================
+# JSON DECODING
+# =============================================================================
+
+def _load_json_backends() -> Dict[str, callable]:
+    """Collect the JSON parsers available in this environment"""
+    backends = {"json": json.loads}
+    try:
+        import ujson
+        backends["ujson"] = ujson.loads
+    except ImportError:
+        pass
+    try:
+        import orjson
+        backends["orjson"] = orjson.loads
+    except ImportError:
+        pass
+    return backends
+
+JSON_BACKENDS = _load_json_backends()
+# Prefer the fastest installed parser; stdlib json is always available
+json_backend = next(name for name in ("orjson", "ujson", "json") if name in JSON_BACKENDS)
+
+def set_json_backend(name: str):
+    """Select the JSON parser used for API responses"""
+    global json_backend
+    if name not in JSON_BACKENDS:
+        raise ValueError(f"JSON backend '{name}' is not installed (available: {', '.join(JSON_BACKENDS)})")
+    json_backend = name
+
+def json_loads(data):
+    """Parse JSON text or bytes with the selected backend"""
+    return JSON_BACKENDS[json_backend](data)
+
+def iter_petfinder_animals(content: bytes):
+    """Yield the animal records of a Petfinder search response, decoded in one backend call"""
+    yield from json_loads(content).get('animals') or []
+
+def extract_animal_fields(animal: Dict) -> Dict:
+    """Pull just the CatProfile fields out of a Petfinder animal record in one pass"""
+    get = animal.get
+    breeds_data = get('breeds') or {}
+    contact = get('contact') or {}
+    
+    return {
+        'petfinder_id': str(get('id', '')),
+        'name': get('name', 'Unknown'),
+        'age': get('age', 'Unknown'),
+        'breeds': [breed for breed in (breeds_data.get('primary'), breeds_data.get('secondary')) if breed],
+        'size': get('size', 'Unknown'),
+        'gender': get('gender', 'Unknown'),
+        'description': get('description', ''),
+        'photos': [photo['large'] for photo in get('photos') or () if 'large' in photo],
+        'contact_email': contact.get('email', ''),
+        'contact_phone': contact.get('phone', ''),
+        'shelter_name': get('organization_id', 'Unknown Shelter'),
+        'distance': get('distance', 0.0)
+    }
+
+# =============================================================================
+# TIMEOUTS AND CIRCUIT BREAKERS
+# =============================================================================
+
+DEFAULT_REQUEST_TIMEOUT = 10.0  # Seconds allowed for any single HTTP request
+
+# Sends API requests instead of the requests library when set (see StubTransport)
+http_transport = None
+
+def set_http_transport(transport):
+    """Route API requests through transport(method, url, **kwargs), or back to requests with None"""
+    global http_transport
+    http_transport = transport
+
+class StubTransport:
+    """Answers API requests from canned responses, for reproducible offline runs.
+
+    Fixtures map "METHOD URL" (without the query string) to a response:
+    {"GET https://api.petfinder.com/v2/animals": {"status": 200, "body": {...}}}
+    Unknown requests get a 404.
+    """
+    
+    def __init__(self, fixtures: Dict):
+        self.fixtures = fixtures
+        self.requests = []
+    
+    @classmethod
+    def from_file(cls, path: str) -> 'StubTransport':
+        """Load fixtures from a JSON file (optionally gzip-compressed)"""
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rb') as f:
+            return cls(json_loads(f.read()))
+    
+    def __call__(self, method: str, url: str, **kwargs) -> requests.Response:
+        self.requests.append((method, url))
+        fixture = self.fixtures.get(f"{method} {url.split('?')[0]}", {'status': 404, 'body': {}})
+        return make_response(url, fixture.get('status', 200), fixture.get('body', {}))
+
+def make_response(url: str, status: int, body, content_type: str = 'application/json') -> requests.Response:
+    """Build a requests.Response from a status and a body (text, or JSON-serializable)"""
+    response = requests.Response()
+    response.status_code = status
+    response.url = url
+    response.headers['Content-Type'] = content_type
+    response._content = body.encode('utf-8') if isinstance(body, str) else json.dumps(body).encode('utf-8')
+    return response
+
+CASSETTE_VERSION = 1
+
+# Request parameters and response fields never written to a cassette
+REDACTED_FIELDS = {'client_id', 'client_secret', 'access_token', 'api_key'}
+
+def _redact(data):
+    """Copy of a JSON-style value with credential fields replaced"""
+    if isinstance(data, dict):
+        return {key: "REDACTED" if key in REDACTED_FIELDS else _redact(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [_redact(value) for value in data]
+    return data
+
+def cassette_key(method: str, url: str, params: Dict = None) -> str:
+    """Match key of a request: method, URL without query string, and sorted query parameters"""
+    key = f"{method} {url.split('?')[0]}"
+    if params:
+        key += "?" + "&".join(f"{name}={value}" for name, value in sorted(_redact(dict(params)).items()))
+    return key
+
+class CassetteRecorder:
+    """Transport that sends API requests for real and records each exchange to a cassette.
+
+    Cassettes are gzip-compressed JSON. Request headers and form data are not
+    kept, and credential fields in parameters and response bodies are
+    replaced, so recordings from real runs are safe to share.
+    """
+    
+    def __init__(self, path: str, transport=None):
+        self.path = path
+        self.transport = transport  # None sends through requests
+        self.interactions: List[Dict] = []
+        self._lock = threading.Lock()
+    
+    def __call__(self, method: str, url: str, **kwargs) -> requests.Response:
+        interaction = {'key': cassette_key(method, url, kwargs.get('params'))}
+        started = time.perf_counter()
+        try:
+            if self.transport:
+                response = self.transport(method, url, **kwargs)
+            else:
+                send = requests.post if method == 'POST' else requests.get
+                response = send(url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            interaction.update(elapsed=time.perf_counter() - started,
+                               error='timeout' if isinstance(e, requests.Timeout) else 'connection')
+            self._record(interaction)
+            raise
+        
+        body = response.text
+        try:
+            body = _redact(json_loads(response.content))
+        except ValueError:
+            pass
+        interaction.update(elapsed=time.perf_counter() - started, status=response.status_code,
+                           content_type=response.headers.get('Content-Type', 'application/json'), body=body)
+        self._record(interaction)
+        return response
+    
+    def _record(self, interaction: Dict):
+        with self._lock:
+            self.interactions.append(interaction)
+    
+    def save(self):
+        """Write the recorded exchanges to the cassette file"""
+        with self._lock:
+            data = {'version': CASSETTE_VERSION, 'interactions': list(self.interactions)}
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+class CassetteTransport:
+    """Transport that replays a recorded cassette without touching the network.
+
+    Requests are matched on method, URL and query parameters; repeats of a
+    request replay its recordings in order, then keep replaying the last.
+    Requests never recorded with these parameters fall back to any recording
+    of the same method and URL, else get a 404. With latency set, each reply
+    is delayed by its recorded time scaled by that factor.
+    """
+    
+    def __init__(self, interactions: List[Dict], latency: float = 0.0):
+        self.latency = latency
+        self.recordings: Dict[str, List[Dict]] = {}
+        for interaction in interactions:
+            key = interaction['key']
+            self.recordings.setdefault(key, []).append(interaction)
+            self.recordings.setdefault(key.split('?')[0], []).append(interaction)
+        self._played: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.requests = []
+        self.misses = 0
+    
+    @classmethod
+    def from_file(cls, path: str, latency: float = 0.0) -> 'CassetteTransport':
+        """Load a cassette written by CassetteRecorder"""
+        with gzip.open(path, 'rb') as f:
+            data = json_loads(f.read())
+        if data.get('version') != CASSETTE_VERSION:
+            raise ValueError(f"Unsupported cassette version: {data.get('version')}")
+        return cls(data['interactions'], latency)
+    
+    def __call__(self, method: str, url: str, **kwargs) -> requests.Response:
+        key = cassette_key(method, url, kwargs.get('params'))
+        with self._lock:
+            self.requests.append((method, url))
+            if key not in self.recordings:
+                key = key.split('?')[0]
+            recordings = self.recordings.get(key)
+            if not recordings:
+                self.misses += 1
+                interaction = {'status': 404, 'body': {}}
+            else:
+                played = self._played.get(key, 0)
+                self._played[key] = played + 1
+                interaction = recordings[min(played, len(recordings) - 1)]
+        
+        if self.latency and interaction.get('elapsed'):
+            time.sleep(interaction['elapsed'] * self.latency)
+        if interaction.get('error') == 'timeout':
+            raise requests.Timeout(f"Recorded timeout for {method} {url}")
+        if interaction.get('error'):
+            raise requests.ConnectionError(f"Recorded connection error for {method} {url}")
+        return make_response(url, interaction.get('status', 200), interaction.get('body', {}),
+                             interaction.get('content_type', 'application/json'))
+
+class DeadlineExceeded(requests.Timeout):
+    """Raised when an end-to-end deadline has no time left for another request"""
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised instead of calling an endpoint whose circuit breaker is open"""
+
+class Deadline:
+    """End-to-end time budget shared by every API call made for one request"""
+    
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+    
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+    
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+    
+    def timeout(self, cap: float = DEFAULT_REQUEST_TIMEOUT) -> float:
+        """Timeout for the next request: the time left, capped per request"""
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded("Deadline exceeded before request could be sent")
+        return min(cap, remaining)
+
+class CircuitBreaker:
+    """Fails fast after repeated failures of one endpoint.
+
+    After failure_threshold consecutive failures the circuit opens and calls
+    raise CircuitOpenError without touching the network. Once reset_timeout
+    has passed a single probe call is let through; its outcome closes the
+    circuit again or re-opens it.
+    """
+    
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"  # closed, open or half_open
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+    
+    def before_call(self):
+        """Raise CircuitOpenError if the endpoint should not be called right now"""
+        with self._lock:
+            if self.state == "closed":
+                return
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"  # Let this call through as the probe
+                return
+            raise CircuitOpenError(f"Circuit open for {self.name}; skipping call")
+    
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+    
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    print(f"WARNING: {self.name} is failing; pausing calls for {self.reset_timeout:.0f}s")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+def http_request(method: str, url: str, breaker: CircuitBreaker = None,
+                 deadline: Deadline = None, **kwargs):
+    """Send an HTTP request with a deadline-bounded timeout, guarded by a circuit breaker.
+
+    Connection errors, timeouts, any other failure to get a response, and
+    5xx responses count as breaker failures; the response is returned as-is
+    for the caller to check.
+    """
+    # Before the breaker is consulted, so an expired deadline never takes the half-open probe
+    timeout = deadline.timeout() if deadline else DEFAULT_REQUEST_TIMEOUT
+    if breaker:
+        breaker.before_call()
+    
+    try:
+        if http_transport:
+            response = http_transport(method, url, timeout=timeout, **kwargs)
+        else:
+            send = requests.post if method == 'POST' else requests.get
+            response = send(url, timeout=timeout, **kwargs)
+    except Exception:
+        # Every outcome is recorded, so a half-open breaker never waits forever for its probe
+        if breaker:
+            breaker.record_failure()
+        raise
+    
+    if breaker:
+        status = getattr(response, 'status_code', None)
+        if isinstance(status, int) and status >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+    return response
+
+# =============================================================================
+# CACHING
+# =============================================================================
+
+# Immutable leaf values whose size doesn't depend on what they reference
+_ATOMIC_TYPES = (str, bytes, bytearray, int, float, complex, bool, type(None))
+
+def approximate_size(obj, _seen: set = None) -> int:
+    """Estimate the bytes held by obj and everything it references (shared objects count once)"""
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen or isinstance(obj, (Enum, type)):
+        return 0
+    _seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    
+    if isinstance(obj, _ATOMIC_TYPES):
+        return size
+    if isinstance(obj, dict):
+        return size + sum(approximate_size(k, _seen) + approximate_size(v, _seen) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return size + sum(approximate_size(item, _seen) for item in obj)
+    if hasattr(obj, '__dict__'):
+        size += approximate_size(vars(obj), _seen)
+    for slot in getattr(type(obj), '__slots__', ()):
+        if hasattr(obj, slot):
+            size += approximate_size(getattr(obj, slot), _seen)
+    return size
+
+class BoundedCache:
+    """Thread-safe LRU cache bounded by entry count and approximate memory, with optional expiry.
+
+    Each caching layer (breeds, searches, scores, enhanced animals) keeps
+    one, so a long-running process can't grow without limit, and stats()
+    reports the same counters for all of them.
+    """
+    
+    def __init__(self, name: str, max_entries: int = 1024, max_bytes: int = None,
+                 ttl: float = None, sizeof=approximate_size):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl  # Default seconds before an entry expires (None: never)
+        self.sizeof = sizeof
+        self._entries = OrderedDict()  # key -> (value, size, expires_at)
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0  # Entries rejected by a get() validator
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __contains__(self, key) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and (entry[2] is None or time.monotonic() < entry[2])
+    
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self.bytes -= size
+    
+    def get(self, key, default=None, valid=None):
+        """Return the cached value (refreshing its recency), or default if missing or expired.
+
+        If valid is given, entries for which valid(value) is false are dropped and count as misses.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, _, expires_at = entry
+                if expires_at is not None and time.monotonic() >= expires_at:
+                    self._remove(key)
+                    self.expirations += 1
+                    entry = None
+                elif valid is not None and not valid(value):
+                    self._remove(key)
+                    self.invalidations += 1
+                    entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def put(self, key, value, ttl: float = None) -> bool:
+        """Cache a value, evicting least recently used entries to stay within budget.
+
+        Returns False (caching nothing) if the value alone exceeds the byte budget.
+        """
+        size = self.sizeof(value) + approximate_size(key)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return False
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, expires_at)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or (
+                    self.max_bytes is not None and self.bytes > self.max_bytes):
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+        return True
+    
+    def pop(self, key, default=None):
+        """Remove and return a fresh cached value, or default"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._remove(key)
+            if entry[2] is not None and time.monotonic() >= entry[2]:
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self.hits += 1
+            return entry[0]
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+    
+    def stats(self) -> Dict:
+        """Return size, budget and hit/miss/eviction counters"""
+        return {
+            'name': self.name,
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'bytes': self.bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations,
+        }
+
 # =============================================================================
 # API CLIENTS
 # =============================================================================
 
+# Petfinder breed names (normalized) whose TheCatAPI breed has a different name
+BREED_ALIASES = {
+    'domestic shorthair': 'american shorthair',
+    'havana': 'havana brown',
+    'oriental shorthair': 'oriental',
+    'oriental longhair': 'oriental',
+    'oriental tabby': 'oriental',
+    'sphynx hairless cat': 'sphynx',
+    'hairless cat': 'sphynx',
+    'siberian forest cat': 'siberian',
+    'bobtail': 'american bobtail',
+    'ragdoll cat': 'ragdoll',
+}
+
+# Petfinder "breeds" that are coat patterns or catch-alls with no TheCatAPI breed
+NON_BREEDS = {
+    'domestic mediumhair', 'domestic longhair', 'tabby', 'tiger', 'tuxedo', 'calico',
+    'dilute calico', 'tortoiseshell', 'dilute tortoiseshell', 'torbie', 'tortie',
+    'extra toes cat hemingway polydactyl', 'silver', 'smoke', 'unknown',
+}
+
+# Words that do not help identify a breed
+BREED_STOPWORDS = {'cat', 'breed', 'mix', 'mixed'}
+
+def normalize_breed_name(name: str) -> str:
+    """Normalize a breed name: lowercase, no punctuation, 'short hair' -> 'shorthair'"""
+    text = re.sub(r'[^a-z0-9]+', ' ', name.lower()).strip()
+    return re.sub(r'\b(short|medium|long) hair\b', r'\1hair', text)
+
+def _trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class BreedIndex:
+    """Resolves Petfinder breed strings to TheCatAPI breeds.
+
+    Built once per catalog load from exact names, known aliases, token sets
+    and character trigrams. Resolutions (including misses) are kept in a
+    bounded cache, so repeated lookups skip the matching work.
+    """
+    
+    FUZZY_THRESHOLD = 0.6  # Minimum trigram Jaccard similarity for a fuzzy match
+    _UNRESOLVED = object()
+    
+    def __init__(self, breeds: List[BreedInfo], max_resolved: int = 4096):
+        self.breeds = list(breeds)
+        self._by_name = {}
+        self._by_tokens = {}
+        self._trigram_postings = {}
+        self._trigram_counts = []
+        
+        for position, breed in enumerate(self.breeds):
+            name = normalize_breed_name(breed.name)
+            self._by_name[name] = breed
+            self._by_tokens.setdefault(self._token_key(name), breed)
+            grams = _trigrams(name)
+            self._trigram_counts.append(len(grams))
+            for gram in grams:
+                self._trigram_postings.setdefault(gram, []).append(position)
+        
+        # Breeds are shared with the catalog, so only count the keys and references
+        self.resolved = BoundedCache("breeds", max_entries=max_resolved, sizeof=lambda breed: 8)
+        self.misses = 0
+    
+    @staticmethod
+    def _token_key(normalized: str) -> str:
+        return " ".join(sorted(set(normalized.split()) - BREED_STOPWORDS))
+    
+    def resolve(self, breed_name: str) -> Optional[BreedInfo]:
+        """Return the TheCatAPI breed for a Petfinder breed name, or None"""
+        breed = self.resolved.get(breed_name, self._UNRESOLVED)
+        if breed is not self._UNRESOLVED:
+            return breed
+        
+        breed = self._resolve_uncached(normalize_breed_name(breed_name))
+        if breed is None:
+            self.misses += 1
+        self.resolved.put(breed_name, breed)
+        return breed
+    
+    def _resolve_uncached(self, name: str) -> Optional[BreedInfo]:
+        if name in self._by_name:
+            return self._by_name[name]
+        if name in BREED_ALIASES:
+            return self._by_name.get(BREED_ALIASES[name])
+        if not name or name in NON_BREEDS:
+            return None
+        
+        token_key = self._token_key(name)
+        if token_key in self._by_tokens:
+            return self._by_tokens[token_key]
+        if token_key in BREED_ALIASES:
+            return self._by_name.get(BREED_ALIASES[token_key])
+        
+        # Fuzzy match on shared trigrams (catches misspellings)
+        grams = _trigrams(token_key)
+        shared = {}
+        for gram in grams:
+            for position in self._trigram_postings.get(gram, ()):
+                shared[position] = shared.get(position, 0) + 1
+        best, best_score = None, self.FUZZY_THRESHOLD
+        for position, count in shared.items():
+            score = count / (len(grams) + self._trigram_counts[position] - count)
+            if score >= best_score:
+                best, best_score = self.breeds[position], score
+        return best
+
+BREED_SNAPSHOT_FORMAT = "purrfect-breeds"
+BREED_SNAPSHOT_VERSION = 1
+
+def save_breed_snapshot(path: str, breeds: List[BreedInfo], fetched_at: float = None):
+    """Write a versioned, gzip-compressed JSON snapshot of the breed catalog"""
+    snapshot = {
+        'format': BREED_SNAPSHOT_FORMAT,
+        'version': BREED_SNAPSHOT_VERSION,
+        'fetched_at': fetched_at if fetched_at is not None else time.time(),
+        'breeds': [asdict(breed) for breed in breeds],
+    }
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+        json.dump(snapshot, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+def load_breed_snapshot(path: str) -> Optional[Tuple[List[BreedInfo], float]]:
+    """Read a breed snapshot, returning (breeds, fetched_at) or None if missing or unusable"""
+    try:
+        with gzip.open(path, 'rb') as f:
+            snapshot = json_loads(f.read())
+        if snapshot.get('format') != BREED_SNAPSHOT_FORMAT or snapshot.get('version') != BREED_SNAPSHOT_VERSION:
+            print(f"WARNING: Ignoring breed snapshot {path} with unsupported format")
+            return None
+        return [BreedInfo(**breed) for breed in snapshot['breeds']], snapshot['fetched_at']
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"WARNING: Ignoring unreadable breed snapshot {path}: {e}")
+        return None
+
 class TheCatAPIClient:
     """Client for TheCatAPI to get breed information"""
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, snapshot_path: str = None,
+                 snapshot_max_age: float = 7 * 24 * 3600):
         self.base_url = "https://api.thecatapi.com/v1"
         self.api_key = api_key
         self.headers = {}
         if api_key:
             self.headers['x-api-key'] = api_key
+        self.breed_index: Optional[BreedIndex] = None
+        self.breaker = CircuitBreaker("TheCatAPI /breeds")
+        
+        # Optional on-disk catalog snapshot so matching works without the network
+        self.snapshot_path = snapshot_path
+        self.snapshot_max_age = snapshot_max_age
+        self.snapshot_fetched_at = None
+        self._refresh_thread = None
+        self._refresh_lock = threading.Lock()
+        self._catalog_lock = threading.Lock()  # One initial catalog load when warming up concurrently
+    
+    def load_snapshot(self) -> bool:
+        """Load the breed catalog from the on-disk snapshot, if there is one"""
+        if not self.snapshot_path:
+            return False
+        loaded = load_breed_snapshot(self.snapshot_path)
+        if not loaded:
+            return False
+        breeds, self.snapshot_fetched_at = loaded
+        self.breed_index = BreedIndex(breeds)
+        return True
+    
+    @property
+    def snapshot_stale(self) -> bool:
+        return (self.snapshot_fetched_at is None
+                or time.time() - self.snapshot_fetched_at > self.snapshot_max_age)
+    
+    def load_catalog(self, refresh: bool = False, deadline: Deadline = None) -> BreedIndex:
+        """Return the breed lookup index, loading the catalog on first use.
+
+        The snapshot is used when present; a stale snapshot is still served
+        while a background thread refreshes it from the API.
+        """
+        if self.breed_index is None or refresh:
+            with self._catalog_lock:
+                if self.breed_index is None and not refresh:
+                    self.load_snapshot()
+                
+                if self.breed_index is None or refresh:
+                    if not self._fetch_catalog(deadline):
+                        # Don't cache a failed fetch; try again on the next lookup
+                        return self.breed_index or BreedIndex([])
+                    return self.breed_index
+        
+        if self.snapshot_path and self.snapshot_stale:
+            self.refresh_in_background()
+        return self.breed_index
+    
+    def _fetch_catalog(self, deadline: Deadline = None) -> bool:
+        """Fetch breeds from the API, rebuild the index and update the snapshot"""
+        breeds = self.get_breeds(deadline)
+        if not breeds:
+            return False
+        self.breed_index = BreedIndex(breeds)
+        self.snapshot_fetched_at = time.time()
+        if self.snapshot_path:
+            try:
+                save_breed_snapshot(self.snapshot_path, breeds, self.snapshot_fetched_at)
+            except OSError as e:
+                print(f"WARNING: Could not save breed snapshot: {e}")
+        return True
+    
+    def refresh_in_background(self) -> threading.Thread:
+        """Refresh the catalog from the API on a daemon thread (at most one at a time)"""
+        with self._refresh_lock:
+            if self._refresh_thread is None or not self._refresh_thread.is_alive():
+                self._refresh_thread = threading.Thread(
+                    target=self._fetch_catalog, name="breed-catalog-refresh", daemon=True
+                )
+                self._refresh_thread.start()
+            return self._refresh_thread
     
-    def get_breeds(self) -> List[BreedInfo]:
+    def get_breeds(self, deadline: Deadline = None) -> List[BreedInfo]:
         """Get all cat breeds with their characteristics"""
         try:
-            response = requests.get(f"{self.base_url}/breeds", headers=self.headers)
+            response = http_request('GET', f"{self.base_url}/breeds", self.breaker, deadline,
+                                    headers=self.headers)
             response.raise_for_status()
             
             breeds = []
@@ -141,31 +898,120 @@ class TheCatAPIClient:
             print(f"ERROR: Error fetching breeds from TheCatAPI: {e}")
             return []
     
-    def get_breed_by_name(self, breed_name: str) -> Optional[BreedInfo]:
-        """Get specific breed information"""
-        breeds = self.get_breeds()
-        for breed in breeds:
-            if breed.name.lower() == breed_name.lower():
-                return breed
-        return None
+    def get_breed_by_name(self, breed_name: str, deadline: Deadline = None) -> Optional[BreedInfo]:
+        """Get specific breed information, resolving Petfinder names and aliases"""
+        return self.load_catalog(deadline=deadline).resolve(breed_name)
+
+@dataclass
+class CachedAnimal:
+    """Derived attributes and merged contact details of a previously seen animal"""
+    content_hash: str
+    personality_traits: List[str]
+    energy_level: int
+    independence: int
+    temperament: str
+    photos: List[str]
+    contact_email: str
+    contact_phone: str
+
+class AnimalCache:
+    """Bounded LRU cache of enhanced Petfinder animals shared across searches.
+
+    Entries are keyed by Petfinder id and tagged with a hash of the
+    description and breeds, so derived attributes are only reused while the
+    listing text is unchanged.
+    """
+    
+    def __init__(self, max_size: int = 5000, max_bytes: int = 16 * 1024 * 1024):
+        self.max_size = max_size
+        self.entries = BoundedCache("enhancement", max_entries=max_size, max_bytes=max_bytes)
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    @staticmethod
+    def content_hash(cat: CatProfile) -> str:
+        """Hash the listing fields that personality derivation depends on"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update((cat.description or "").encode('utf-8'))
+        for breed in cat.breeds:
+            digest.update(b"\x00" + breed.encode('utf-8'))
+        return digest.hexdigest()
+    
+    def restore(self, cat: CatProfile) -> bool:
+        """Copy cached derived attributes onto an unchanged cat; return True on a hit"""
+        content_hash = self.content_hash(cat)
+        entry = self.entries.get(cat.petfinder_id, valid=lambda entry: entry.content_hash == content_hash)
+        if entry is None:
+            return False
+        
+        cat.personality_traits = list(entry.personality_traits)
+        cat.energy_level = entry.energy_level
+        cat.independence = entry.independence
+        cat.temperament = entry.temperament
+        
+        # Fill in photos and contact info the new record is missing
+        if entry.photos and not cat.photos:
+            cat.photos = list(entry.photos)
+        if entry.contact_email and not cat.contact_email:
+            cat.contact_email = entry.contact_email
+        if entry.contact_phone and not cat.contact_phone:
+            cat.contact_phone = entry.contact_phone
+        return True
+    
+    def store(self, cat: CatProfile):
+        """Remember an enhanced cat, evicting the least recently used entries if full"""
+        entry = CachedAnimal(
+            content_hash=self.content_hash(cat),
+            personality_traits=list(cat.personality_traits),
+            energy_level=cat.energy_level,
+            independence=cat.independence,
+            temperament=cat.temperament,
+            photos=list(cat.photos),
+            contact_email=cat.contact_email,
+            contact_phone=cat.contact_phone
+        )
+        self.entries.put(cat.petfinder_id, entry)
+    
+    def stats(self) -> Dict:
+        """Return size and hit/miss/eviction counters (stale: misses where the listing text changed)"""
+        stats = self.entries.stats()
+        stats.update(size=stats['entries'], max_size=self.max_size, stale=stats['invalidations'])
+        return stats
 
 class PetfinderAPIClient:
     """Client for Petfinder API to get adoptable cats"""
     
-    def __init__(self, api_key: str, secret: str):
+    def __init__(self, api_key: str, secret: str, animal_cache: AnimalCache = None,
+                 search_ttl: float = 120.0):
         self.api_key = api_key
         self.secret = secret
         self.base_url = "https://api.petfinder.com/v2"
         self.access_token = None
         self.token_expires = 0
+        self._token_lock = threading.Lock()  # One token fetch when searching concurrently
+        self.token_breaker = CircuitBreaker("Petfinder /oauth2/token")
+        self.search_breaker = CircuitBreaker("Petfinder /animals")
+        self.animal_cache = animal_cache if animal_cache is not None else AnimalCache()
+        # Recent search results, so adopters in the same area share one API call (0 disables)
+        self.search_cache = BoundedCache("search", max_entries=256, max_bytes=32 * 1024 * 1024,
+                                         ttl=search_ttl) if search_ttl else None
     
-    def _get_access_token(self):
+    def _get_access_token(self, deadline: Deadline = None):
         """Get OAuth2 access token"""
         if self.access_token and time.time() < self.token_expires:
             return self.access_token
         
+        with self._token_lock:
+            return self._fetch_access_token(deadline)
+    
+    def _fetch_access_token(self, deadline: Deadline = None):
+        """Request a new OAuth2 access token unless another thread just did"""
+        if self.access_token and time.time() < self.token_expires:
+            return self.access_token
+        
         try:
-            response = requests.post(f"{self.base_url}/oauth2/token", data={
+            response = http_request('POST', f"{self.base_url}/oauth2/token", self.token_breaker, deadline, data={
                 'grant_type': 'client_credentials',
                 'client_id': self.api_key,
                 'client_secret': self.secret
@@ -182,9 +1028,17 @@ class PetfinderAPIClient:
             print(f"ERROR: Error getting Petfinder access token: {e}")
             return None
     
-    def search_cats(self, location: str, limit: int = 20) -> List[CatProfile]:
-        """Search for adoptable cats near location"""
-        token = self._get_access_token()
+    def search_cats(self, location: str, limit: int = 20, distance: int = None,
+                    page: int = 1, deadline: Deadline = None) -> List[CatProfile]:
+        """Search for adoptable cats near location (optionally within distance miles)"""
+        cache_key = (location, limit, distance, page)
+        if self.search_cache is not None:
+            cached = self.search_cache.get(cache_key)
+            if cached is not None:
+                # Copies, so callers can't change the cached profiles' fields
+                return [replace(cat) for cat in cached]
+        
+        token = self._get_access_token(deadline)
         if not token:
             return []
         
@@ -195,19 +1049,24 @@ class PetfinderAPIClient:
             'limit': limit,
             'status': 'adoptable'
         }
+        if distance:
+            params['distance'] = distance
+        if page > 1:
+            params['page'] = page
         
         try:
-            response = requests.get(f"{self.base_url}/animals", headers=headers, params=params)
+            response = http_request('GET', f"{self.base_url}/animals", self.search_breaker, deadline,
+                                    headers=headers, params=params)
             response.raise_for_status()
             
             cats = []
-            data = response.json()
             
             # Dictionary to track cats we've already processed
             seen_cats = {}
             
-            for animal in data.get('animals', []):
-                cat_id = str(animal.get('id', ''))
+            for animal in iter_petfinder_animals(response.content):
+                fields = extract_animal_fields(animal)
+                cat_id = fields['petfinder_id']
                 
                 # Skip if we've already processed this cat
                 if cat_id in seen_cats:
@@ -215,62 +1074,60 @@ class PetfinderAPIClient:
                     existing_cat = seen_cats[cat_id]
                     
                     # Check if current record has photos and existing doesn't
-                    current_photos = [photo['large'] for photo in animal.get('photos', []) if 'large' in photo]
-                    if current_photos and not existing_cat.photos:
-                        existing_cat.photos = current_photos
+                    if fields['photos'] and not existing_cat.photos:
+                        existing_cat.photos = fields['photos']
                     
                     # Check if current record has contact info and existing doesn't
-                    contact = animal.get('contact', {})
-                    if contact.get('email') and not existing_cat.contact_email:
-                        existing_cat.contact_email = contact.get('email', '')
-                    if contact.get('phone') and not existing_cat.contact_phone:
-                        existing_cat.contact_phone = contact.get('phone', '')
+                    if fields['contact_email'] and not existing_cat.contact_email:
+                        existing_cat.contact_email = fields['contact_email']
+                    if fields['contact_phone'] and not existing_cat.contact_phone:
+                        existing_cat.contact_phone = fields['contact_phone']
                     
                     continue
                 
-                # Extract photos
-                photos = [photo['large'] for photo in animal.get('photos', []) if 'large' in photo]
-                
-                # Extract breeds
-                breeds = []
-                if animal.get('breeds'):
-                    if animal['breeds'].get('primary'):
-                        breeds.append(animal['breeds']['primary'])
-                    if animal['breeds'].get('secondary'):
-                        breeds.append(animal['breeds']['secondary'])
-                
-                # Extract contact info
-                contact = animal.get('contact', {})
+                cat = CatProfile(**fields)
                 
-                cat = CatProfile(
-                    petfinder_id=cat_id,
-                    name=animal.get('name', 'Unknown'),
-                    age=animal.get('age', 'Unknown'),
-                    breeds=breeds,
-                    size=animal.get('size', 'Unknown'),
-                    gender=animal.get('gender', 'Unknown'),
-                    description=animal.get('description', ''),
-                    photos=photos,
-                    contact_email=contact.get('email', ''),
-                    contact_phone=contact.get('phone', ''),
-                    shelter_name=animal.get('organization_id', 'Unknown Shelter'),
-                    distance=animal.get('distance', 0.0)
-                )
-                
-                # Derive personality traits from description and breeds
-                self._enhance_cat_profile(cat)
+                # Derive personality traits from description and breeds,
+                # unless this listing was already enhanced in an earlier search
+                if not self.animal_cache.restore(cat):
+                    self._enhance_cat_profile(cat)
                 
                 # Store in our tracking dictionary and add to results
                 seen_cats[cat_id] = cat
                 cats.append(cat)
             
+            # Cache after in-response merging so merged photos/contact info are kept
+            for cat in cats:
+                self.animal_cache.store(cat)
+            if self.search_cache is not None and cats:
+                self.search_cache.put(cache_key, [replace(cat) for cat in cats])
+            
             print(f"Found {len(cats)} unique adoptable cats near {location}")
             return cats
             
         except requests.RequestException as e:
             print(f"ERROR: Error searching Petfinder: {e}")
             return []
-
+        except ValueError as e:
+            print(f"ERROR: Malformed Petfinder response: {e}")
+            return []
+    
+    def iter_search_pages(self, location: str, limit: int = 20, max_pages: int = 5,
+                          distance: int = None, deadline: Deadline = None):
+        """Yield the new cats from each page of search results as it arrives"""
+        seen_ids = set()
+        for page in range(1, max_pages + 1):
+            if deadline and deadline.expired:
+                print(f"WARNING: Search deadline reached after {page - 1} page(s)")
+                break
+            cats = self.search_cats(location, limit=limit, distance=distance, page=page, deadline=deadline)
+            # Listings can shift between pages while we read them
+            new_cats = [cat for cat in cats if cat.petfinder_id not in seen_ids]
+            seen_ids.update(cat.petfinder_id for cat in new_cats)
+            if new_cats:
+                yield new_cats
+            if len(cats) < limit:
+                break
     
     def _enhance_cat_profile(self, cat: CatProfile):
         """Enhance cat profile with derived personality traits"""
@@ -323,20 +1180,353 @@ class PetfinderAPIClient:
 # COMPATIBILITY ALGORITHM
 # =============================================================================
 
+@dataclass(frozen=True)
+class ScoringWeights:
+    """Weights, thresholds and explanation tiers for compatibility scoring.
+
+    Frozen so that every change goes through CompatibilityCalculator.weights,
+    which recompiles the lookup tables. Use dataclasses.replace() to tune, or
+    load_scoring_rules() to read them from a rules file.
+    """
+    # Work schedule compatibility (hours away from home)
+    short_absence_hours: int = 4
+    long_absence_hours: int = 8
+    schedule_short: int = 20
+    schedule_medium_independent: int = 20
+    schedule_medium: int = 12
+    schedule_long_independent: int = 15
+    schedule_long: int = 5
+    medium_absence_independence: int = 7  # Independence needed for a medium absence
+    long_absence_independence: int = 8  # Independence needed for a long absence
+    
+    # Living space compatibility
+    apartment_calm_energy: int = 5
+    apartment_moderate_energy: int = 7
+    apartment_calm: int = 10
+    apartment_moderate: int = 6
+    apartment_energetic: int = 2
+    house: int = 10
+    
+    # Activity level match and overall cap
+    activity_match: int = 10
+    lifestyle_max: int = 40
+    
+    # Experience points indexed by [ExperienceLevel][temperament code]
+    experience_points: Tuple[Tuple[int, int, int], ...] = (
+        (30, 20, 10),  # First-time owner
+        (30, 30, 25),  # Some experience
+        (30, 30, 30),  # Very experienced
+    )
+    
+    # Personality compatibility
+    personality_base: int = 15
+    trait_match_points: int = 5  # Per desired trait the cat has
+    trait_match_max: int = 15
+    allergy_penalty: int = 10  # Allergic adopter, non-hypoallergenic breed
+    personality_max: int = 30
+    
+    # Explanations as (minimum score, reason) tiers, highest first; the last tier catches the rest
+    lifestyle_reasons: Tuple[Tuple[int, str], ...] = (
+        (35, "Excellent lifestyle match for your schedule and home"),
+        (25, "Good lifestyle compatibility"),
+        (0, "Some lifestyle adjustments may be needed"),
+    )
+    experience_reasons: Tuple[Tuple[int, str], ...] = (
+        (25, "Perfect match for your experience level"),
+        (20, "Suitable for your cat experience"),
+        (0, "May be challenging for your current experience"),
+    )
+    personality_reasons: Tuple[Tuple[int, str], ...] = (
+        (25, "Strong personality and trait compatibility"),
+        (15, "Good personality match"),
+        (0, "Some personality differences to consider"),
+    )
+
+# =============================================================================
+# SCORING RULES FILES
+# =============================================================================
+
+SCORING_RULES_VERSION = 1
+
+# Rules file sections and the ScoringWeights fields each one may set
+RULE_SECTIONS = {
+    'lifestyle': (
+        'short_absence_hours', 'long_absence_hours', 'schedule_short', 'schedule_medium_independent',
+        'schedule_medium', 'schedule_long_independent', 'schedule_long', 'medium_absence_independence',
+        'long_absence_independence', 'apartment_calm_energy', 'apartment_moderate_energy',
+        'apartment_calm', 'apartment_moderate', 'apartment_energetic', 'house', 'activity_match',
+        'lifestyle_max',
+    ),
+    'personality': (
+        'personality_base', 'trait_match_points', 'trait_match_max', 'allergy_penalty', 'personality_max',
+    ),
+}
+REASON_COMPONENTS = ('lifestyle', 'experience', 'personality')
+
+def scoring_rules_to_dict(weights: ScoringWeights) -> Dict:
+    """Express scoring weights in the declarative rules format"""
+    return {
+        'version': SCORING_RULES_VERSION,
+        **{section: {name: getattr(weights, name) for name in names} for section, names in RULE_SECTIONS.items()},
+        'experience': {
+            level.value: dict(zip(TEMPERAMENTS, weights.experience_points[i]))
+            for i, level in enumerate(ExperienceLevel)
+        },
+        'reasons': {
+            component: [list(tier) for tier in getattr(weights, f"{component}_reasons")]
+            for component in REASON_COMPONENTS
+        },
+    }
+
+def parse_scoring_rules(rules: Dict, base: ScoringWeights = None) -> ScoringWeights:
+    """Validate a rules document and turn it into ScoringWeights.
+
+    Sections are optional; anything not given keeps its value from base
+    (the built-in defaults unless another ScoringWeights is passed).
+    Raises ValueError describing the first problem found.
+    """
+    if not isinstance(rules, dict):
+        raise ValueError("Scoring rules must be a mapping")
+    if rules.get('version', SCORING_RULES_VERSION) != SCORING_RULES_VERSION:
+        raise ValueError(f"Unsupported scoring rules version: {rules.get('version')}")
+    unknown = set(rules) - set(RULE_SECTIONS) - {'version', 'experience', 'reasons'}
+    if unknown:
+        raise ValueError(f"Unknown scoring rules section(s): {', '.join(sorted(unknown))}")
+    
+    def points(where: str, value) -> int:
+        if isinstance(value, bool) or not isinstance(value, int) or not 0 <= value <= 100:
+            raise ValueError(f"{where} must be a whole number from 0 to 100, got {value!r}")
+        return value
+    
+    changes = {}
+    for section, names in RULE_SECTIONS.items():
+        values = rules.get(section, {})
+        if not isinstance(values, dict):
+            raise ValueError(f"'{section}' must be a mapping")
+        for name, value in values.items():
+            if name not in names:
+                raise ValueError(f"Unknown {section} rule: {name}")
+            changes[name] = points(f"{section}.{name}", value)
+    
+    if 'experience' in rules:
+        experience = rules['experience']
+        if not isinstance(experience, dict) or set(experience) != {level.value for level in ExperienceLevel}:
+            raise ValueError(f"'experience' must give points for: {', '.join(l.value for l in ExperienceLevel)}")
+        rows = []
+        for level in ExperienceLevel:
+            row = experience[level.value]
+            if not isinstance(row, dict) or set(row) != set(TEMPERAMENTS):
+                raise ValueError(f"experience.{level.value} must give points for: {', '.join(TEMPERAMENTS)}")
+            rows.append(tuple(points(f"experience.{level.value}.{t}", row[t]) for t in TEMPERAMENTS))
+        changes['experience_points'] = tuple(rows)
+    
+    reasons = rules.get('reasons', {})
+    if not isinstance(reasons, dict) or set(reasons) - set(REASON_COMPONENTS):
+        raise ValueError(f"'reasons' may only contain: {', '.join(REASON_COMPONENTS)}")
+    for component, tiers in reasons.items():
+        parsed = []
+        for tier in tiers if isinstance(tiers, list) else [None]:
+            if not (isinstance(tier, (list, tuple)) and len(tier) == 2 and isinstance(tier[1], str)):
+                raise ValueError(f"reasons.{component} must be a list of [minimum score, reason] pairs")
+            parsed.append((points(f"reasons.{component} threshold", tier[0]), tier[1]))
+        if not parsed or any(a[0] <= b[0] for a, b in zip(parsed, parsed[1:])):
+            raise ValueError(f"reasons.{component} thresholds must be given highest first")
+        changes[f"{component}_reasons"] = tuple(parsed)
+    
+    weights = replace(base or ScoringWeights(), **changes)
+    if weights.short_absence_hours > weights.long_absence_hours:
+        raise ValueError("lifestyle.short_absence_hours cannot exceed long_absence_hours")
+    return weights
+
+def load_scoring_rules(path: str, base: ScoringWeights = None) -> ScoringWeights:
+    """Load and validate a JSON (or, with PyYAML installed, YAML) scoring rules file"""
+    with open(path, 'rb') as f:
+        content = f.read()
+    if path.endswith(('.yaml', '.yml')):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError("PyYAML is required for YAML scoring rules; use JSON instead")
+        rules = yaml.safe_load(content)
+    else:
+        rules = json_loads(content)
+    return parse_scoring_rules(rules, base)
+
+class RulesWatcher:
+    """Hot-swaps a calculator's scoring rules when the rules file changes.
+
+    Invalid edits are reported and ignored, leaving the previous rules in place.
+    """
+    
+    def __init__(self, path: str, calculator: 'CompatibilityCalculator', poll_interval: float = 2.0):
+        self.path = path
+        self.calculator = calculator
+        self.poll_interval = poll_interval
+        self._mtime = None
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def check(self) -> bool:
+        """Reload the rules if the file changed; return True if new rules were applied"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError as e:
+            print(f"WARNING: Cannot read scoring rules {self.path}: {e}")
+            return False
+        if mtime == self._mtime:
+            return False
+        self._mtime = mtime
+        try:
+            self.calculator.weights = load_scoring_rules(self.path)
+        except (OSError, ValueError) as e:
+            print(f"ERROR: Keeping previous scoring rules; {self.path} is invalid: {e}")
+            return False
+        print(f"Loaded scoring rules from {self.path}")
+        return True
+    
+    def start(self):
+        """Apply the rules now and keep watching the file on a daemon thread"""
+        self.check()
+        self._thread = threading.Thread(target=self._watch, name="rules-watcher", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+    
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            self.check()
+
+# Domains covered by the compiled lookup tables
+HOME_TYPES = list(HomeType)
+EXPERIENCE_LEVELS = list(ExperienceLevel)
+LEVEL_RANGE = range(1, 11)  # Activity, energy and independence are 1-10 scales
+
+class CompiledRules:
+    """One set of scoring weights compiled into lookup tables and closures.
+
+    Never modified after construction, so a calculator can swap in a new set
+    with a single attribute assignment while other threads keep scoring.
+    """
+    
+    def __init__(self, weights: ScoringWeights, lifestyle_table: array, home_offsets: Dict,
+                 experience_table: Dict, personality, reason_tables: Tuple[List[str], ...]):
+        self.weights = weights
+        self.lifestyle_table = lifestyle_table
+        self.home_offsets = home_offsets
+        self.experience_table = experience_table
+        self.personality = personality
+        self.reason_tables = reason_tables
+    
+    def lifestyle_base(self, user: UserProfile) -> Optional[int]:
+        """Table offset for a user's answers, so each cat's lifestyle score is one indexed read.
+
+        The score is lifestyle_table[base + energy * 10 + independence]; None if
+        the user's activity level is outside the tabulated 1-10 scale.
+        """
+        if not 1 <= user.activity_level <= 10:
+            return None
+        w = self.weights
+        # Hours-away bucket: short, medium or long absence
+        if user.hours_away <= w.short_absence_hours:
+            bucket = 0
+        elif user.hours_away <= w.long_absence_hours:
+            bucket = 1000
+        else:
+            bucket = 2000
+        return self.home_offsets[user.home_type] + bucket + user.activity_level * 100 - 111
+
 class CompatibilityCalculator:
     """Calculates compatibility scores between users and cats"""
     
+    def __init__(self, weights: ScoringWeights = None):
+        self.weights = weights or ScoringWeights()
+    
+    @property
+    def weights(self) -> ScoringWeights:
+        return self.rules.weights
+    
+    @weights.setter
+    def weights(self, weights: ScoringWeights):
+        """Replace the scoring weights, publishing the recompiled tables atomically"""
+        self.rules = self._compile(weights)
+    
+    def _compile(self, weights: ScoringWeights) -> CompiledRules:
+        """Compile the scoring rules into dense lookup tables and closures.
+
+        The lifestyle table is indexed by home type, hours bucket, activity,
+        energy and independence (3 x 3 x 10 x 10 x 10 entries); the experience
+        table by experience level and temperament code. Personality scoring
+        becomes a closure over its constants, and each explanation tier list
+        becomes a table indexed by score.
+        """
+        lifestyle = array('B')
+        for home_type in HOME_TYPES:
+            for hours_away in (0, weights.long_absence_hours, weights.long_absence_hours + 1):
+                for activity in LEVEL_RANGE:
+                    for energy in LEVEL_RANGE:
+                        for independence in LEVEL_RANGE:
+                            lifestyle.append(self._compute_lifestyle_score(
+                                home_type, hours_away, activity, energy, independence, weights))
+        
+        return CompiledRules(
+            weights=weights,
+            lifestyle_table=lifestyle,
+            home_offsets={home_type: i * 3000 for i, home_type in enumerate(HOME_TYPES)},
+            experience_table={
+                level: array('B', weights.experience_points[i])
+                for i, level in enumerate(EXPERIENCE_LEVELS)
+            },
+            personality=self._compile_personality(weights),
+            reason_tables=tuple(
+                self._compile_reasons(getattr(weights, f"{component}_reasons"))
+                for component in REASON_COMPONENTS
+            ),
+        )
+    
+    @staticmethod
+    def _compile_personality(w: ScoringWeights):
+        """Build the personality scorer with its weights bound as locals"""
+        base, points, trait_max = w.personality_base, w.trait_match_points, w.trait_match_max
+        penalty, score_max = w.allergy_penalty, w.personality_max
+        
+        def personality(user: UserProfile, cat: CatProfile, breed_info: BreedInfo = None) -> int:
+            score = base
+            
+            # User desired traits vs cat traits
+            if user.desired_traits and cat.personality_traits:
+                matches = len(set(user.desired_traits).intersection(cat.personality_traits))
+                score += min(matches * points, trait_max)
+            
+            # Allergy consideration: penalty for non-hypoallergenic breeds
+            if user.allergies and breed_info and not breed_info.hypoallergenic:
+                score -= penalty
+            
+            return max(0, min(score, score_max))
+        
+        return personality
+    
+    @staticmethod
+    def _compile_reasons(tiers: Tuple[Tuple[int, str], ...]) -> List[str]:
+        """Expand (minimum score, reason) tiers into a reason per score from 0 to 100"""
+        table = []
+        for score in range(101):
+            table.append(next((reason for minimum, reason in tiers if score >= minimum), tiers[-1][1]))
+        return table
+    
     def calculate_compatibility(self, user: UserProfile, cat: CatProfile, 
                               breed_info: BreedInfo = None) -> CompatibilityScore:
         """Calculate total compatibility score (0-100 points)"""
+        # One rule set for the whole score, even if new rules are published meanwhile
+        rules = self.rules
         
-        lifestyle_score = self._calculate_lifestyle_score(user, cat)
-        experience_score = self._calculate_experience_score(user, cat)
-        personality_score = self._calculate_personality_score(user, cat, breed_info)
+        lifestyle_score = self._calculate_lifestyle_score(user, cat, rules)
+        experience_score = self._calculate_experience_score(user, cat, rules)
+        personality_score = rules.personality(user, cat, breed_info)
         
         total_score = lifestyle_score + experience_score + personality_score
         
-        reasons = self._generate_reasons(user, cat, lifestyle_score, experience_score, personality_score)
+        reasons = self._generate_reasons(user, cat, lifestyle_score, experience_score, personality_score, rules)
         
         return CompatibilityScore(
             cat_id=cat.petfinder_id,
@@ -347,132 +1537,706 @@ class CompatibilityCalculator:
             reasons=reasons
         )
     
-    def _calculate_lifestyle_score(self, user: UserProfile, cat: CatProfile) -> int:
+    def _calculate_lifestyle_score(self, user: UserProfile, cat: CatProfile, rules: CompiledRules = None) -> int:
         """Calculate lifestyle compatibility (0-40 points)"""
+        rules = rules or self.rules
+        activity, energy, independence = user.activity_level, cat.energy_level, cat.independence
+        if 1 <= activity <= 10 and 1 <= energy <= 10 and 1 <= independence <= 10:
+            hours_away, w = user.hours_away, rules.weights
+            # Hours-away bucket: short, medium or long absence
+            if hours_away <= w.short_absence_hours:
+                offset = 0
+            elif hours_away <= w.long_absence_hours:
+                offset = 1000
+            else:
+                offset = 2000
+            return rules.lifestyle_table[
+                rules.home_offsets[user.home_type] + offset + activity * 100 + energy * 10 + independence - 111
+            ]
+        # Values outside the tabulated 1-10 scales are scored directly
+        return self._compute_lifestyle_score(user.home_type, user.hours_away, activity, energy, independence,
+                                             rules.weights)
+    
+    def lifestyle_scores(self, user: UserProfile, cats: List[CatProfile], rules: CompiledRules = None) -> List[int]:
+        """Lifestyle scores of many cats for one user, one table read per cat"""
+        rules = rules or self.rules
+        base = rules.lifestyle_base(user)
+        table = rules.lifestyle_table
+        scores = []
+        for cat in cats:
+            energy, independence = cat.energy_level, cat.independence
+            if base is not None and 1 <= energy <= 10 and 1 <= independence <= 10:
+                scores.append(table[base + energy * 10 + independence])
+            else:
+                # Values outside the tabulated 1-10 scales are scored directly
+                scores.append(self._compute_lifestyle_score(user.home_type, user.hours_away, user.activity_level,
+                                                            energy, independence, rules.weights))
+        return scores
+    
+    def _compute_lifestyle_score(self, home_type: HomeType, hours_away: int, activity: int,
+                                 energy: int, independence: int, weights: ScoringWeights = None) -> int:
+        """Evaluate the lifestyle rules directly (used to build the lookup table)"""
+        w = weights or self.rules.weights
         score = 0
         
         # Work schedule compatibility (20 points)
-        if user.hours_away <= 4:
-            score += 20
-        elif user.hours_away <= 8:
-            if cat.independence >= 7:
-                score += 20
+        if hours_away <= w.short_absence_hours:
+            score += w.schedule_short
+        elif hours_away <= w.long_absence_hours:
+            if independence >= w.medium_absence_independence:
+                score += w.schedule_medium_independent
             else:
-                score += 12
+                score += w.schedule_medium
         else:  # Away 8+ hours
-            if cat.independence >= 8:
-                score += 15
+            if independence >= w.long_absence_independence:
+                score += w.schedule_long_independent
             else:
-                score += 5
+                score += w.schedule_long
         
         # Living space compatibility (10 points)
-        if user.home_type == HomeType.APARTMENT:
-            if cat.energy_level <= 5:
-                score += 10
-            elif cat.energy_level <= 7:
-                score += 6
+        if home_type == HomeType.APARTMENT:
+            if energy <= w.apartment_calm_energy:
+                score += w.apartment_calm
+            elif energy <= w.apartment_moderate_energy:
+                score += w.apartment_moderate
             else:
-                score += 2
+                score += w.apartment_energetic
         else:  # House or farm
-            score += 10
+            score += w.house
         
         # Activity level match (10 points)
-        activity_diff = abs(user.activity_level - cat.energy_level)
-        score += max(0, 10 - activity_diff)
+        activity_diff = abs(activity - energy)
+        score += max(0, w.activity_match - activity_diff)
         
-        return min(score, 40)
+        return min(score, w.lifestyle_max)
     
-    def _calculate_experience_score(self, user: UserProfile, cat: CatProfile) -> int:
+    def _calculate_experience_score(self, user: UserProfile, cat: CatProfile, rules: CompiledRules = None) -> int:
         """Calculate experience compatibility (0-30 points)"""
-        if user.experience == ExperienceLevel.FIRST_TIME:
-            if cat.temperament == "easy":
-                return 30
-            elif cat.temperament == "moderate":
-                return 20
-            else:
-                return 10
-        elif user.experience == ExperienceLevel.SOME_EXPERIENCE:
-            if cat.temperament in ["easy", "moderate"]:
-                return 30
-            else:
-                return 25
-        else:  # Very experienced
-            return 30
+        # Unknown temperaments are treated like challenging cats
+        return (rules or self.rules).experience_table[user.experience][TEMPERAMENT_CODES.get(cat.temperament, 2)]
+    
+    def experience_scores(self, user: UserProfile, cats: List[CatProfile], rules: CompiledRules = None) -> List[int]:
+        """Experience scores of many cats for one user"""
+        row, codes = (rules or self.rules).experience_table[user.experience], TEMPERAMENT_CODES
+        return [row[codes.get(cat.temperament, 2)] for cat in cats]
     
     def _calculate_personality_score(self, user: UserProfile, cat: CatProfile, 
-                                   breed_info: BreedInfo = None) -> int:
+                                   breed_info: BreedInfo = None, rules: CompiledRules = None) -> int:
         """Calculate personality compatibility (0-30 points)"""
-        score = 15  # Base score
-        
-        # User desired traits vs cat traits
-        if user.desired_traits and cat.personality_traits:
-            matches = len(set(user.desired_traits) & set(cat.personality_traits))
-            trait_bonus = min(matches * 5, 15)
-            score += trait_bonus
-        
-        # Allergy consideration
-        if user.allergies and breed_info:
-            if breed_info.hypoallergenic:
-                score += 0  # No penalty
-            else:
-                score -= 10  # Penalty for non-hypoallergenic
+        return (rules or self.rules).personality(user, cat, breed_info)
+    
+    def personality_scores(self, user: UserProfile, cats: List[CatProfile], breed_infos: List[Optional[BreedInfo]],
+                           rules: CompiledRules = None, traits: 'TraitIndex' = None) -> List[int]:
+        """Personality scores of many cats for one user, counting trait matches with bitmasks"""
+        w = (rules or self.rules).weights
+        traits = traits or TraitIndex.from_cats(cats)
+        trait_points = [min(n * w.trait_match_points, w.trait_match_max) for n in range(len(PERSONALITY_TRAITS) + 1)]
+        base, penalty, score_max = w.personality_base, w.allergy_penalty, w.personality_max
         
-        return max(0, min(score, 30))
+        scores = []
+        for count, breed_info in zip(traits.match_counts(user.desired_traits), breed_infos):
+            score = base + trait_points[count]
+            if user.allergies and breed_info and not breed_info.hypoallergenic:
+                score -= penalty
+            scores.append(max(0, min(score, score_max)))
+        return scores
     
-    def _generate_reasons(self, user: UserProfile, cat: CatProfile, 
-                         lifestyle: int, experience: int, personality: int) -> List[str]:
+    def _generate_reasons(self, user: UserProfile, cat: CatProfile, lifestyle: int, experience: int,
+                          personality: int, rules: CompiledRules = None) -> List[str]:
         """Generate explanatory reasons for the compatibility score"""
-        reasons = []
-        
-        if lifestyle >= 35:
-            reasons.append("Excellent lifestyle match for your schedule and home")
-        elif lifestyle >= 25:
-            reasons.append("Good lifestyle compatibility")
-        else:
-            reasons.append("Some lifestyle adjustments may be needed")
-        
-        if experience >= 25:
-            reasons.append("Perfect match for your experience level")
-        elif experience >= 20:
-            reasons.append("Suitable for your cat experience")
-        else:
-            reasons.append("May be challenging for your current experience")
-        
-        if personality >= 25:
-            reasons.append("Strong personality and trait compatibility")
-        elif personality >= 15:
-            reasons.append("Good personality match")
-        else:
-            reasons.append("Some personality differences to consider")
-        
-        return reasons
+        lifestyle_reasons, experience_reasons, personality_reasons = (rules or self.rules).reason_tables
+        if not (0 <= lifestyle <= 100 and 0 <= experience <= 100 and 0 <= personality <= 100):
+            lifestyle, experience, personality = (min(max(s, 0), 100) for s in (lifestyle, experience, personality))
+        return [lifestyle_reasons[lifestyle], experience_reasons[experience], personality_reasons[personality]]
 
 # =============================================================================
-# DATABASE
+# FEATURE STORE
 # =============================================================================
 
-class Database:
-    """Simple SQLite database for storing user profiles and matches"""
+@dataclass
+class CatFeatures:
+    """Scoring features for a single cat, as stored in CatFeatureStore"""
+    petfinder_id: str
+    energy_level: int
+    independence: int
+    temperament: int  # Index into TEMPERAMENTS
+    traits: int  # Bitmask over PERSONALITY_TRAITS
+    hypoallergenic: int  # 0 or 1, from the primary breed
+
+class CatFeatureStore:
+    """Columnar (struct-of-arrays) store of the cat features used for scoring.
+
+    Each feature lives in its own compact buffer (int8 levels, uint8 codes and
+    trait bitmasks) instead of being spread across CatProfile objects. Stores
+    can be saved to disk and loaded back as read-only memory maps, so several
+    worker processes share one copy of the data.
+    """
+
+    # (column name, array typecode)
+    COLUMNS = (
+        ("energy_level", "b"),
+        ("independence", "b"),
+        ("temperament", "B"),
+        ("traits", "B"),
+        ("hypoallergenic", "B"),
+    )
+    MAGIC = b"PFCS"
+    VERSION = 1
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self._columns = {name: array(code) for name, code in self.COLUMNS}
+        self._mmap = None
     
-    def __init__(self, db_path: str = "purrfect_match.db"):
-        self.db_path = db_path
-        self._init_db()
+    @classmethod
+    def from_cats(cls, cats: List[CatProfile],
+                  breed_infos: List[Optional[BreedInfo]] = None) -> 'CatFeatureStore':
+        """Build a store from cat profiles (and optional per-cat breed info)"""
+        store = cls()
+        store.extend(cats, breed_infos)
+        return store
     
-    def _init_db(self):
-        """Initialize database tables"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id TEXT UNIQUE,
-                    home_type TEXT,
-                    hours_away INTEGER,
-                    activity_level INTEGER,
-                    experience TEXT,
-                    allergies BOOLEAN,
-                    desired_traits TEXT,
-                    zip_code TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    @property
+    def read_only(self) -> bool:
+        return self._mmap is not None
+    
+    def append(self, cat: CatProfile, breed_info: BreedInfo = None) -> int:
+        """Append a cat's features and return its row index"""
+        if self.read_only:
+            raise ValueError("Memory-mapped feature stores are read-only")
+        
+        columns = self._columns
+        columns["energy_level"].append(int(cat.energy_level))
+        columns["independence"].append(int(cat.independence))
+        columns["temperament"].append(TEMPERAMENT_CODES.get(cat.temperament, TEMPERAMENT_CODES["moderate"]))
+        columns["traits"].append(encode_traits(cat.personality_traits))
+        columns["hypoallergenic"].append(1 if breed_info and breed_info.hypoallergenic else 0)
+        self.ids.append(cat.petfinder_id)
+        return len(self.ids) - 1
+    
+    def extend(self, cats: List[CatProfile], breed_infos: List[Optional[BreedInfo]] = None):
+        """Append several cats at once"""
+        if breed_infos is None:
+            breed_infos = [None] * len(cats)
+        for cat, breed_info in zip(cats, breed_infos):
+            self.append(cat, breed_info)
+    
+    def column(self, name: str):
+        """Return one feature column (a NumPy view if NumPy is installed).
+
+        Views share memory with the store; release them before appending more rows.
+        """
+        data = self._columns[name]
+        if np is not None:
+            return np.frombuffer(data, dtype=np.int8 if dict(self.COLUMNS)[name] == "b" else np.uint8)
+        return data
+    
+    def row(self, index: int) -> CatFeatures:
+        """Return the features of a single cat"""
+        columns = self._columns
+        return CatFeatures(
+            petfinder_id=self.ids[index],
+            energy_level=columns["energy_level"][index],
+            independence=columns["independence"][index],
+            temperament=columns["temperament"][index],
+            traits=columns["traits"][index],
+            hypoallergenic=columns["hypoallergenic"][index]
+        )
+    
+    def take(self, indices: List[int]) -> 'CatFeatureStore':
+        """Return a new in-memory store containing only the given rows, in order"""
+        result = CatFeatureStore()
+        result.ids = [self.ids[i] for i in indices]
+        for name, code in self.COLUMNS:
+            source = self._columns[name]
+            result._columns[name] = array(code, [source[i] for i in indices])
+        return result
+    
+    def trait_index(self) -> 'TraitIndex':
+        """Build an inverted trait index over the store's rows"""
+        return TraitIndex(self._columns["traits"])
+    
+    def save(self, path: str):
+        """Write the store to disk in a layout that can be memory-mapped"""
+        count = len(self.ids)
+        
+        # Columns are laid out back to back after the header, 8-byte aligned
+        offset = 0
+        layout = []
+        for name, code in self.COLUMNS:
+            layout.append([name, code, offset])
+            offset += (count + 7) // 8 * 8
+        
+        header = json.dumps({
+            "version": self.VERSION,
+            "count": count,
+            "ids": self.ids,
+            "columns": layout
+        }).encode("utf-8")
+        data_start = (len(self.MAGIC) + 4 + len(header) + 7) // 8 * 8
+        
+        # Write to a temporary file first so readers never see a partial store
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(self.MAGIC)
+            f.write(struct.pack("<I", len(header)))
+            f.write(header)
+            for name, code, column_offset in layout:
+                f.seek(data_start + column_offset)
+                f.write(bytes(self._columns[name]))
+            f.truncate(data_start + offset)
+        os.replace(tmp_path, path)
+    
+    @classmethod
+    def load(cls, path: str, use_mmap: bool = True) -> 'CatFeatureStore':
+        """Load a saved store, memory-mapped (read-only, shared) by default"""
+        with open(path, "rb") as f:
+            if use_mmap:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                buffer = f.read()
+        
+        if bytes(buffer[:len(cls.MAGIC)]) != cls.MAGIC:
+            raise ValueError(f"{path} is not a cat feature store")
+        (header_len,) = struct.unpack_from("<I", buffer, len(cls.MAGIC))
+        header_start = len(cls.MAGIC) + 4
+        header = json.loads(bytes(buffer[header_start:header_start + header_len]))
+        if header.get("version") != cls.VERSION:
+            raise ValueError(f"Unsupported feature store version: {header.get('version')}")
+        data_start = (header_start + header_len + 7) // 8 * 8
+        
+        store = cls()
+        store.ids = header["ids"]
+        count = header["count"]
+        view = memoryview(buffer)
+        for name, code, column_offset in header["columns"]:
+            start = data_start + column_offset
+            column = view[start:start + count].cast(code)
+            store._columns[name] = column if use_mmap else array(code, column)
+        if use_mmap:
+            store._mmap = buffer
+        return store
+    
+    def close(self):
+        """Release the memory map backing a loaded store"""
+        if self._mmap is None:
+            return
+        for column in self._columns.values():
+            column.release()
+        self._columns = {name: array(code) for name, code in self.COLUMNS}
+        self.ids = []
+        self._mmap.close()
+        self._mmap = None
+
+class TraitIndex:
+    """Inverted index from each personality trait to a bitmap of cat positions.
+
+    Bit i of a trait's bitmap (a Python int) is set when the cat at position i
+    has that trait, so filters like "must be calm and affectionate" are one AND
+    over the whole inventory and counting cats is a popcount. Each cat's own
+    trait bitmask is kept too, for per-cat match counts.
+    """
+    
+    def __init__(self, masks):
+        self.masks = array("B", masks)
+        self.bitmaps = {}
+        for trait, bit in TRAIT_BITS.items():
+            # Built as a binary string (position 0 last) rather than OR-ing one bit at a time
+            bits = "".join("1" if mask & bit else "0" for mask in reversed(self.masks))
+            self.bitmaps[trait] = int(bits, 2) if bits else 0
+    
+    @classmethod
+    def from_cats(cls, cats: List[CatProfile]) -> 'TraitIndex':
+        """Index cats by their derived personality traits"""
+        return cls(encode_traits(cat.personality_traits) for cat in cats)
+    
+    def __len__(self) -> int:
+        return len(self.masks)
+    
+    def matching(self, traits: List[str]) -> int:
+        """Bitmap of the cats having every one of traits (unknown traits match no cat)"""
+        bitmap = (1 << len(self.masks)) - 1
+        for trait in traits:
+            bitmap &= self.bitmaps.get(trait, 0)
+        return bitmap
+    
+    @staticmethod
+    def count(bitmap: int) -> int:
+        """Number of cats in a bitmap"""
+        return bin(bitmap).count("1")
+    
+    @staticmethod
+    def positions(bitmap: int) -> List[int]:
+        """Cat positions in a bitmap, in ascending order"""
+        positions = []
+        while bitmap:
+            lowest = bitmap & -bitmap
+            positions.append(lowest.bit_length() - 1)
+            bitmap ^= lowest
+        return positions
+    
+    def match_counts(self, traits: List[str]) -> List[int]:
+        """How many of traits each cat has"""
+        wanted, popcount = encode_traits(traits), TRAIT_POPCOUNT
+        return [popcount[mask & wanted] for mask in self.masks]
+    
+    def trait_counts(self) -> Dict[str, int]:
+        """Number of cats with each trait"""
+        return {trait: self.count(bitmap) for trait, bitmap in self.bitmaps.items()}
+
+# =============================================================================
+# MATCH SESSIONS
+# =============================================================================
+
+# Score component fed by each quiz answer
+PROFILE_FIELD_COMPONENTS = {
+    'home_type': 'lifestyle',
+    'hours_away': 'lifestyle',
+    'activity_level': 'lifestyle',
+    'experience': 'experience',
+    'allergies': 'personality',
+    'desired_traits': 'personality',
+}
+
+class MatchSession:
+    """Candidate cats and per-component scores for one adopter.
+
+    When a quiz answer changes, only the component that depends on it is
+    re-scored and the candidates are re-ranked, without searching again.
+    """
+    
+    def __init__(self, user: UserProfile, cats: List[CatProfile],
+                 breed_infos: List[Optional[BreedInfo]], calculator: CompatibilityCalculator):
+        self.user = user
+        self.cats = list(cats)
+        self.breed_infos = list(breed_infos)
+        self.calculator = calculator
+        # Scored against one rule set throughout, even if the calculator's rules are swapped
+        self.rules = calculator.rules
+        self.traits = TraitIndex.from_cats(self.cats)
+        self.scores = {component: [] for component in ('lifestyle', 'experience', 'personality')}
+        for component in self.scores:
+            self._rescore(component)
+        self._update_totals()
+    
+    def __len__(self) -> int:
+        return len(self.cats)
+    
+    def _rescore(self, component: str):
+        """Recompute one score component for every candidate"""
+        user, calculator, rules = self.user, self.calculator, self.rules
+        if component == 'lifestyle':
+            self.scores['lifestyle'] = calculator.lifestyle_scores(user, self.cats, rules)
+        elif component == 'experience':
+            self.scores['experience'] = calculator.experience_scores(user, self.cats, rules)
+        else:
+            self.scores['personality'] = calculator.personality_scores(user, self.cats, self.breed_infos,
+                                                                      rules, self.traits)
+    
+    def _update_totals(self):
+        scores = self.scores
+        self.totals = list(map(sum, zip(scores['lifestyle'], scores['experience'], scores['personality'])))
+    
+    def update(self, k: int = 5, **answers) -> List[tuple]:
+        """Apply changed quiz answers to the session's user and return the new top k"""
+        for field in answers:
+            if field not in PROFILE_FIELD_COMPONENTS:
+                raise ValueError(f"Cannot update '{field}' in a match session")
+        
+        changed = {
+            PROFILE_FIELD_COMPONENTS[field]
+            for field, value in answers.items()
+            if getattr(self.user, field) != value
+        }
+        for field, value in answers.items():
+            setattr(self.user, field, value)
+        
+        for component in changed:
+            self._rescore(component)
+        if changed:
+            self._update_totals()
+        return self.top(k)
+    
+    def _match(self, index: int) -> tuple:
+        """Build the (cat, score, breed_info) tuple for one candidate"""
+        cat = self.cats[index]
+        lifestyle = self.scores['lifestyle'][index]
+        experience = self.scores['experience'][index]
+        personality = self.scores['personality'][index]
+        score = CompatibilityScore(
+            cat_id=cat.petfinder_id,
+            total_score=self.totals[index],
+            lifestyle_score=lifestyle,
+            experience_score=experience,
+            personality_score=personality,
+            reasons=self.calculator._generate_reasons(self.user, cat, lifestyle, experience, personality,
+                                                      self.rules)
+        )
+        return (cat, score, self.breed_infos[index])
+    
+    def top(self, k: int = 5, required_traits: List[str] = None) -> List[tuple]:
+        """Return the k best matches, best first (ties keep search order).
+
+        With required_traits, only cats having all of them are considered.
+        """
+        candidates = range(len(self.cats))
+        if required_traits:
+            candidates = self.traits.positions(self.traits.matching(required_traits))
+        order = heapq.nlargest(k, candidates, key=self.totals.__getitem__)
+        return [self._match(i) for i in order]
+    
+    def ranked(self, required_traits: List[str] = None) -> List[tuple]:
+        """Return every candidate (having all required_traits) as a match, best first"""
+        return self.top(len(self.cats), required_traits)
+
+# =============================================================================
+# PRECOMPUTED RECOMMENDATIONS
+# =============================================================================
+
+# Activity bands of the precomputed archetypes: (lowest, highest, level each band is scored at)
+ACTIVITY_BANDS = ((1, 3, 2), (4, 7, 5), (8, 10, 9))
+
+def hours_bucket(hours_away: int, weights: ScoringWeights) -> int:
+    """Absence bucket lifestyle scoring uses: 0 short, 1 medium, 2 long"""
+    if hours_away <= weights.short_absence_hours:
+        return 0
+    if hours_away <= weights.long_absence_hours:
+        return 1
+    return 2
+
+def archetype_key(user: UserProfile, weights: ScoringWeights) -> Optional[str]:
+    """Archetype a quiz falls into, or None if its activity level is outside every band"""
+    for band, (low, high, _) in enumerate(ACTIVITY_BANDS):
+        if low <= user.activity_level <= high:
+            return (f"{user.home_type.value}:{hours_bucket(user.hours_away, weights)}:"
+                    f"{user.experience.value}:{int(bool(user.allergies))}:{band}")
+    return None
+
+def iter_archetypes(weights: ScoringWeights, zip_code: str = ""):
+    """Yield (key, quiz answers) for every archetype, scored without desired traits"""
+    hours = (weights.short_absence_hours, weights.long_absence_hours, weights.long_absence_hours + 1)
+    for home_type in HomeType:
+        for hours_away in hours:
+            for experience in ExperienceLevel:
+                for allergies in (False, True):
+                    for _, _, level in ACTIVITY_BANDS:
+                        user = UserProfile(home_type=home_type, hours_away=hours_away, activity_level=level,
+                                           experience=experience, allergies=allergies, zip_code=zip_code)
+                        yield archetype_key(user, weights), user
+
+def rules_fingerprint(weights: ScoringWeights) -> str:
+    """Short hash identifying a set of scoring weights"""
+    rules = json.dumps(scoring_rules_to_dict(weights), sort_keys=True).encode('utf-8')
+    return hashlib.sha1(rules).hexdigest()[:16]
+
+def archetype_score_bound(user: UserProfile, weights: ScoringWeights) -> Optional[int]:
+    """Most a user can score above their archetype's score for the same cat.
+
+    Lifestyle moves at most one point per activity level away from the band's
+    level, and desired traits add at most their trait-match points.
+    """
+    for low, high, level in ACTIVITY_BANDS:
+        if low <= user.activity_level <= high:
+            matched = TRAIT_POPCOUNT[encode_traits(user.desired_traits)]
+            return abs(user.activity_level - level) + min(matched * weights.trait_match_points,
+                                                          weights.trait_match_max)
+    return None
+
+# =============================================================================
+# DATABASE
+# =============================================================================
+
+CROCKFORD_BASE32 = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+_ulid_lock = threading.Lock()
+_last_ulid = (0, 0)  # (milliseconds, randomness) of the last ID issued by this process
+
+def new_ulid(timestamp: float = None) -> str:
+    """Return a 26-character ULID: 48-bit millisecond time then 80 random bits, Crockford base32.
+
+    IDs sort by creation time; within one millisecond this process increments
+    the random part, so its IDs stay strictly increasing. Other processes draw
+    independent randomness, so they can't realistically collide.
+    """
+    global _last_ulid
+    milliseconds = int((time.time() if timestamp is None else timestamp) * 1000)
+    with _ulid_lock:
+        last_milliseconds, last_randomness = _last_ulid
+        if milliseconds <= last_milliseconds and timestamp is None:
+            milliseconds, randomness = last_milliseconds, last_randomness + 1
+            if randomness >> 80:
+                # 2^80 IDs in one millisecond: borrow the next millisecond
+                milliseconds, randomness = milliseconds + 1, int.from_bytes(os.urandom(10), 'big')
+        else:
+            randomness = int.from_bytes(os.urandom(10), 'big')
+        if timestamp is None:
+            _last_ulid = (milliseconds, randomness)
+    
+    value = (milliseconds << 80) | randomness
+    return "".join(CROCKFORD_BASE32[(value >> shift) & 31] for shift in range(125, -1, -5))
+
+class ConnectionPool:
+    """SQLite connections for one database: a pool of read-only readers and one serialized writer.
+
+    Connections stay open, so each keeps its prepared-statement cache warm.
+    Readers and the writer can work at the same time once the database is
+    in WAL mode; waits for locks held by other processes use busy_timeout.
+    """
+    
+    def __init__(self, db_path: str, readers: int = 4, busy_timeout: float = 30.0,
+                 cached_statements: int = 256):
+        self.db_path = db_path
+        self.max_readers = readers
+        self.busy_timeout = busy_timeout
+        self.cached_statements = cached_statements
+        self._readers = queue.LifoQueue()
+        self._reader_count = 0
+        self._readers_lock = threading.Lock()
+        self._writer = None
+        self._writer_lock = threading.RLock()
+    
+    def _open(self, read_only: bool = False) -> sqlite3.Connection:
+        if read_only:
+            target, uri = f"file:{os.path.abspath(self.db_path)}?mode=ro", True
+        else:
+            target, uri = self.db_path, False
+        conn = sqlite3.connect(target, uri=uri, timeout=self.busy_timeout, isolation_level=None,
+                               check_same_thread=False, cached_statements=self.cached_statements)
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout * 1000)}")
+        return conn
+    
+    @contextmanager
+    def reader(self):
+        """Borrow a read-only connection, opening one if fewer than readers exist"""
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            with self._readers_lock:
+                opened = self._reader_count < self.max_readers
+                if opened:
+                    self._reader_count += 1
+            try:
+                conn = self._open(read_only=True) if opened else self._readers.get()
+            except sqlite3.Error:
+                with self._readers_lock:
+                    self._reader_count -= 1
+                raise
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._readers.put(conn)
+    
+    @contextmanager
+    def writer(self):
+        """Hold the writer connection (in autocommit mode) for a sequence of statements"""
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = self._open()
+            yield self._writer
+    
+    @contextmanager
+    def transaction(self):
+        """Run statements on the writer in one BEGIN IMMEDIATE transaction"""
+        with self.writer() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                # Never leave the shared writer inside an open transaction
+                if conn.in_transaction:
+                    conn.rollback()
+                raise
+    
+    def close(self):
+        """Close every pooled connection"""
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._readers_lock:
+            self._reader_count = 0
+
+# Exportable tables and views: key (first column, used as the resume cursor), date and ZIP
+# columns for filters, and the (name, expression) columns written out
+EXPORT_VIEWS = {
+    'users': {
+        'from': "users u", 'key': "u.id", 'created': "u.created_at", 'zip': "u.zip_code",
+        'columns': (("id", "u.id"), ("user_id", "u.user_id"), ("home_type", "u.home_type"),
+                    ("hours_away", "u.hours_away"), ("activity_level", "u.activity_level"),
+                    ("experience", "u.experience"), ("allergies", "u.allergies"),
+                    ("desired_traits", "u.desired_traits"), ("zip_code", "u.zip_code"),
+                    ("created_at", "u.created_at")),
+    },
+    'matches': {
+        'from': "matches m", 'key': "m.id", 'created': "m.created_at",
+        'zip': "(SELECT zip_code FROM users WHERE user_id = m.user_id)",
+        'columns': (("id", "m.id"), ("user_id", "m.user_id"), ("cat_id", "m.cat_id"), ("cat_name", "m.cat_name"),
+                    ("cat_breed", "m.cat_breed"), ("total_score", "m.total_score"),
+                    ("lifestyle_score", "m.lifestyle_score"), ("experience_score", "m.experience_score"),
+                    ("personality_score", "m.personality_score"), ("created_at", "m.created_at")),
+    },
+    # Matches joined with their adopters, as shown in past matches
+    'past_matches': {
+        'from': "matches m JOIN users u ON u.user_id = m.user_id", 'key': "m.id",
+        'created': "m.created_at", 'zip': "u.zip_code",
+        'columns': (("id", "m.id"), ("user_id", "u.user_id"), ("zip_code", "u.zip_code"),
+                    ("home_type", "u.home_type"), ("experience", "u.experience"), ("user_created", "u.created_at"),
+                    ("cat_name", "m.cat_name"), ("total_score", "m.total_score"), ("match_date", "m.created_at")),
+    },
+}
+
+class Database:
+    """Simple SQLite database for storing user profiles and matches"""
+    
+    def __init__(self, db_path: str = "purrfect_match.db", archive_dir: str = None,
+                 busy_timeout: float = 30.0, readers: int = 4):
+        self.db_path = db_path
+        # Archived matches live next to the database by default
+        self.archive_dir = archive_dir or f"{os.path.splitext(db_path)[0]}_archive"
+        # Seconds a connection waits for another thread or process to release its write lock
+        self.busy_timeout = busy_timeout
+        self.pool = ConnectionPool(db_path, readers=readers, busy_timeout=busy_timeout)
+        self._init_db()
+    
+    def close(self):
+        """Close the pooled connections"""
+        self.pool.close()
+    
+    def _init_db(self):
+        """Initialize database tables"""
+        with self.pool.writer() as conn:
+            # New databases allow space freed by archival to be reclaimed incrementally
+            # (this has to be set before anything else is written)
+            if not conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone():
+                conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            # WAL lets the pool's readers work while the writer commits
+            conn.execute("PRAGMA journal_mode = WAL")
+        
+        with self.pool.transaction() as conn:
+            
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS users (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT UNIQUE,
+                    home_type TEXT,
+                    hours_away INTEGER,
+                    activity_level INTEGER,
+                    experience TEXT,
+                    allergies BOOLEAN,
+                    desired_traits TEXT,
+                    zip_code TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             ''')
             
@@ -487,38 +2251,709 @@ class Database:
                     experience_score INTEGER,
                     personality_score INTEGER,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    cat_breed TEXT,
                     FOREIGN KEY (user_id) REFERENCES users (user_id)
                 )
             ''')
+            
+            # Databases created before cat_breed was recorded
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(matches)")]
+            if 'cat_breed' not in columns:
+                conn.execute("ALTER TABLE matches ADD COLUMN cat_breed TEXT")
+            
+            self._init_rollups(conn)
+            self._init_precomputed(conn)
+    
+    def _init_precomputed(self, conn: sqlite3.Connection):
+        """Create the tables holding precomputed recommendations per ZIP and archetype"""
+        # When each ZIP was last precomputed, with which rules and how many cats it had
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS precomputed_zips (
+                zip_code TEXT PRIMARY KEY,
+                computed_at REAL,
+                rules_hash TEXT,
+                inventory INTEGER
+            )
+        ''')
+        
+        # The cats ranked for a ZIP (as JSON), in search order
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS precomputed_cats (
+                zip_code TEXT,
+                cat_id TEXT,
+                position INTEGER,
+                cat TEXT,
+                breed_info TEXT,
+                PRIMARY KEY (zip_code, cat_id)
+            )
+        ''')
+        
+        # Top cats per ZIP and archetype, best first
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS precomputed_matches (
+                zip_code TEXT,
+                archetype TEXT,
+                rank INTEGER,
+                cat_id TEXT,
+                score INTEGER,
+                PRIMARY KEY (zip_code, archetype, rank)
+            )
+        ''')
+    
+    def _init_rollups(self, conn: sqlite3.Connection):
+        """Create the match analytics rollup tables, backfilling them from history once"""
+        existing = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'match_rollup_daily'"
+        ).fetchone()
+        
+        # Match volume and score totals per day and ZIP
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS match_rollup_daily (
+                day TEXT,
+                zip_code TEXT,
+                match_count INTEGER,
+                score_sum INTEGER,
+                score_min INTEGER,
+                score_max INTEGER,
+                PRIMARY KEY (day, zip_code)
+            )
+        ''')
+        
+        # Score histogram (10-point buckets) per day and ZIP
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS match_rollup_scores (
+                day TEXT,
+                zip_code TEXT,
+                bucket INTEGER,
+                match_count INTEGER,
+                PRIMARY KEY (day, zip_code, bucket)
+            )
+        ''')
+        
+        # Matched breeds per day and ZIP
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS match_rollup_breeds (
+                day TEXT,
+                zip_code TEXT,
+                breed TEXT,
+                match_count INTEGER,
+                PRIMARY KEY (day, zip_code, breed)
+            )
+        ''')
+        
+        if not existing:
+            self._rebuild_rollups(conn)
+    
+    def _rebuild_rollups(self, conn: sqlite3.Connection):
+        """Recompute every rollup table from the matches table"""
+        for table in ('match_rollup_daily', 'match_rollup_scores', 'match_rollup_breeds'):
+            conn.execute(f"DELETE FROM {table}")
+        
+        history = '''
+            SELECT date(m.created_at) AS day, COALESCE(u.zip_code, '') AS zip_code,
+                   m.total_score, COALESCE(m.cat_breed, 'Unknown') AS breed
+            FROM matches m LEFT JOIN users u ON u.user_id = m.user_id
+        '''
+        conn.execute(f'''
+            INSERT INTO match_rollup_daily
+            SELECT day, zip_code, COUNT(*), SUM(total_score), MIN(total_score), MAX(total_score)
+            FROM ({history}) GROUP BY day, zip_code
+        ''')
+        conn.execute(f'''
+            INSERT INTO match_rollup_scores
+            SELECT day, zip_code, MIN(total_score / 10, 9), COUNT(*)
+            FROM ({history}) GROUP BY day, zip_code, MIN(total_score / 10, 9)
+        ''')
+        conn.execute(f'''
+            INSERT INTO match_rollup_breeds
+            SELECT day, zip_code, breed, COUNT(*)
+            FROM ({history}) GROUP BY day, zip_code, breed
+        ''')
+    
+    def _update_rollups(self, conn: sqlite3.Connection, user_id: str, breed: str, score: CompatibilityScore):
+        """Fold one new match into today's rollup rows"""
+        row = conn.execute("SELECT zip_code FROM users WHERE user_id = ?", (user_id,)).fetchone()
+        zip_code = row[0] if row and row[0] is not None else ''
+        day = conn.execute("SELECT date('now')").fetchone()[0]
+        total = score.total_score
+        
+        conn.execute('''
+            INSERT INTO match_rollup_daily (day, zip_code, match_count, score_sum, score_min, score_max)
+            VALUES (?, ?, 1, ?, ?, ?)
+            ON CONFLICT (day, zip_code) DO UPDATE SET
+                match_count = match_count + 1,
+                score_sum = score_sum + excluded.score_sum,
+                score_min = MIN(score_min, excluded.score_min),
+                score_max = MAX(score_max, excluded.score_max)
+        ''', (day, zip_code, total, total, total))
+        conn.execute('''
+            INSERT INTO match_rollup_scores (day, zip_code, bucket, match_count)
+            VALUES (?, ?, ?, 1)
+            ON CONFLICT (day, zip_code, bucket) DO UPDATE SET match_count = match_count + 1
+        ''', (day, zip_code, min(total // 10, 9)))
+        conn.execute('''
+            INSERT INTO match_rollup_breeds (day, zip_code, breed, match_count)
+            VALUES (?, ?, ?, 1)
+            ON CONFLICT (day, zip_code, breed) DO UPDATE SET match_count = match_count + 1
+        ''', (day, zip_code, breed))
+    
+    @staticmethod
+    def new_user_id() -> str:
+        """Collision-free user ID that sorts by creation time: user_<ULID> (the ZIP has its own column)"""
+        return f"user_{new_ulid()}"
+    
+    @staticmethod
+    def _user_row(user: UserProfile) -> tuple:
+        return (
+            user.user_id, user.home_type.value, user.hours_away, user.activity_level,
+            user.experience.value, user.allergies, json.dumps(user.desired_traits), user.zip_code
+        )
     
     def save_user(self, user: UserProfile) -> str:
         """Save user profile and return user_id"""
-        user_id = f"user_{user.zip_code}_{int(time.time())}"
+        user_id = self.new_user_id()
         user.user_id = user_id
         
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute('''
-                INSERT OR REPLACE INTO users 
-                (user_id, home_type, hours_away, activity_level, experience, allergies, desired_traits, zip_code)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                user_id, user.home_type.value, user.hours_away, user.activity_level,
-                user.experience.value, user.allergies, json.dumps(user.desired_traits), user.zip_code
-            ))
+        with self.pool.transaction() as conn:
+            self._insert_user(conn, user)
         
         return user_id
     
+    def _insert_user(self, conn: sqlite3.Connection, user: UserProfile):
+        """Insert a user whose user_id is already assigned"""
+        conn.execute('''
+            INSERT INTO users 
+            (user_id, home_type, hours_away, activity_level, experience, allergies, desired_traits, zip_code)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', self._user_row(user))
+    
+    def save_users(self, users: List[UserProfile], batch_size: int = 5000) -> List[str]:
+        """Save many user profiles, batch_size per transaction, and return their user_ids.
+
+        Each transaction takes the write lock up front (BEGIN IMMEDIATE), so
+        concurrent callers in other threads or processes queue on the busy
+        timeout instead of failing to upgrade a read lock.
+        """
+        for user in users:
+            user.user_id = self.new_user_id()
+        
+        for start in range(0, len(users), batch_size):
+            with self.pool.transaction() as conn:
+                conn.executemany('''
+                    INSERT INTO users 
+                    (user_id, home_type, hours_away, activity_level, experience, allergies, desired_traits, zip_code)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', [self._user_row(user) for user in users[start:start + batch_size]])
+        
+        return [user.user_id for user in users]
+    
     def save_match(self, user_id: str, cat: CatProfile, score: CompatibilityScore):
-        """Save a compatibility match result"""
-        with sqlite3.connect(self.db_path) as conn:
+        """Save a compatibility match result and update the analytics rollups"""
+        with self.pool.transaction() as conn:
+            self._insert_match(conn, user_id, cat, score)
+    
+    def _insert_match(self, conn: sqlite3.Connection, user_id: str, cat: CatProfile, score: CompatibilityScore):
+        """Insert a match and fold it into the rollups, in the caller's transaction"""
+        breed = cat.breeds[0] if cat.breeds else 'Unknown'
+        conn.execute('''
+            INSERT INTO matches 
+            (user_id, cat_id, cat_name, total_score, lifestyle_score, experience_score, personality_score, cat_breed)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            user_id, cat.petfinder_id, cat.name, score.total_score,
+            score.lifestyle_score, score.experience_score, score.personality_score, breed
+        ))
+        self._update_rollups(conn, user_id, breed, score)
+    
+    def get_match_report(self, zip_code: str = None, days: int = None, top_breeds: int = 5) -> Dict:
+        """Summarize matches from the rollup tables, optionally for one ZIP and the last N days"""
+        conditions, params = [], []
+        if zip_code:
+            conditions.append("zip_code = ?")
+            params.append(zip_code)
+        if days:
+            conditions.append("day > date('now', ?)")
+            params.append(f"-{days} days")
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        with self.pool.reader() as conn:
+            count, score_sum, score_min, score_max = conn.execute(f'''
+                SELECT COALESCE(SUM(match_count), 0), SUM(score_sum), MIN(score_min), MAX(score_max)
+                FROM match_rollup_daily {where}
+            ''', params).fetchone()
+            
+            daily = conn.execute(f'''
+                SELECT day, zip_code, match_count, score_sum
+                FROM match_rollup_daily {where}
+                ORDER BY day DESC, zip_code
+            ''', params).fetchall()
+            
+            buckets = dict(conn.execute(f'''
+                SELECT bucket, SUM(match_count) FROM match_rollup_scores {where} GROUP BY bucket
+            ''', params).fetchall())
+            
+            breeds = conn.execute(f'''
+                SELECT breed, SUM(match_count) AS total FROM match_rollup_breeds {where}
+                GROUP BY breed ORDER BY total DESC, breed LIMIT ?
+            ''', params + [top_breeds]).fetchall()
+        
+        return {
+            'match_count': count,
+            'average_score': round(score_sum / count, 1) if count else None,
+            'min_score': score_min,
+            'max_score': score_max,
+            'score_distribution': {
+                f"{bucket * 10}-{bucket * 10 + (10 if bucket == 9 else 9)}": buckets.get(bucket, 0)
+                for bucket in range(10)
+            },
+            'top_breeds': [{'breed': breed, 'match_count': total} for breed, total in breeds],
+            'daily': [
+                {'day': day, 'zip_code': zip_code, 'match_count': n, 'average_score': round(total / n, 1)}
+                for day, zip_code, n, total in daily
+            ],
+        }
+    
+    def save_precomputed(self, zip_code: str, cats: List[CatProfile], breed_infos: List[Optional[BreedInfo]],
+                         rankings: Dict[str, List[Tuple[str, int]]], rules_hash: str, computed_at: float = None):
+        """Replace a ZIP's precomputed recommendations.
+
+        rankings maps archetype keys to (cat_id, score) lists, best first.
+        Readers see either the old or the new set, never a mix.
+        """
+        with self.pool.transaction() as conn:
+            for table in ('precomputed_zips', 'precomputed_cats', 'precomputed_matches'):
+                conn.execute(f"DELETE FROM {table} WHERE zip_code = ?", (zip_code,))
             conn.execute('''
-                INSERT INTO matches 
-                (user_id, cat_id, cat_name, total_score, lifestyle_score, experience_score, personality_score)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                user_id, cat.petfinder_id, cat.name, score.total_score,
-                score.lifestyle_score, score.experience_score, score.personality_score
-            ))
+                INSERT INTO precomputed_zips (zip_code, computed_at, rules_hash, inventory) VALUES (?, ?, ?, ?)
+            ''', (zip_code, time.time() if computed_at is None else computed_at, rules_hash, len(cats)))
+            conn.executemany('''
+                INSERT INTO precomputed_cats (zip_code, cat_id, position, cat, breed_info) VALUES (?, ?, ?, ?, ?)
+            ''', [
+                (zip_code, cat.petfinder_id, position, json.dumps(asdict(cat)),
+                 json.dumps(asdict(breed_info)) if breed_info else None)
+                for position, (cat, breed_info) in enumerate(zip(cats, breed_infos))
+            ])
+            conn.executemany('''
+                INSERT INTO precomputed_matches (zip_code, archetype, rank, cat_id, score) VALUES (?, ?, ?, ?, ?)
+            ''', [
+                (zip_code, archetype, rank, cat_id, score)
+                for archetype, ranking in rankings.items()
+                for rank, (cat_id, score) in enumerate(ranking)
+            ])
+    
+    def get_precomputed(self, zip_code: str, archetype: str) -> Optional[Tuple[float, str, int, List[tuple]]]:
+        """Return (computed_at, rules_hash, inventory, rows) for a ZIP and archetype, or None.
+
+        Rows are (score, position, cat, breed_info) best first, with the cat
+        and breed info rebuilt from their stored JSON.
+        """
+        with self.pool.reader() as conn:
+            rows = conn.execute('''
+                SELECT z.computed_at, z.rules_hash, z.inventory, m.score, c.position, c.cat, c.breed_info
+                FROM precomputed_matches m
+                JOIN precomputed_zips z ON z.zip_code = m.zip_code
+                JOIN precomputed_cats c ON c.zip_code = m.zip_code AND c.cat_id = m.cat_id
+                WHERE m.zip_code = ? AND m.archetype = ?
+                ORDER BY m.rank
+            ''', (zip_code, archetype)).fetchall()
+        if not rows:
+            return None
+        
+        computed_at, rules_hash, inventory = rows[0][:3]
+        return computed_at, rules_hash, inventory, [
+            (score, position, CatProfile(**json.loads(cat)),
+             BreedInfo(**json.loads(breed_info)) if breed_info else None)
+            for _, _, _, score, position, cat, breed_info in rows
+        ]
+    
+    def get_active_zip_codes(self, days: int = 30) -> List[str]:
+        """ZIP codes of adopters who took the quiz in the last N days, busiest first"""
+        with self.pool.reader() as conn:
+            rows = conn.execute('''
+                SELECT zip_code FROM users
+                WHERE zip_code != '' AND created_at > datetime('now', ?)
+                GROUP BY zip_code ORDER BY COUNT(*) DESC, zip_code
+            ''', (f"-{days} days",)).fetchall()
+        return [row[0] for row in rows]
+    
+    def get_last_zip_code(self) -> Optional[str]:
+        """Return the ZIP code of the most recently saved user profile"""
+        with self.pool.reader() as conn:
+            row = conn.execute(
+                "SELECT zip_code FROM users WHERE zip_code != '' ORDER BY id DESC LIMIT 1"
+            ).fetchone()
+        return row[0] if row else None
+    
+    def get_past_matches(self, include_archived: bool = False) -> List[tuple]:
+        """Return past matches joined with their user profiles, newest first.
+
+        Rows are (user_id, zip_code, home_type, experience, user_created,
+        cat_name, total_score, match_date). With include_archived, matches
+        moved to the archive by archive_matches() are included as well.
+        """
+        with self.pool.reader() as conn:
+            matches = conn.execute('''
+                SELECT u.user_id, u.zip_code, u.home_type, u.experience, u.created_at,
+                       m.cat_name, m.total_score, m.created_at as match_date
+                FROM users u 
+                JOIN matches m ON u.user_id = m.user_id 
+                ORDER BY m.created_at DESC
+            ''').fetchall()
+            
+            if not include_archived:
+                return matches
+            
+            archived = list(self.iter_archived_matches())
+            if not archived:
+                return matches
+            
+            live_ids = {row[0] for row in conn.execute("SELECT id FROM matches")}
+            users = {
+                row[0]: row for row in conn.execute(
+                    "SELECT user_id, zip_code, home_type, experience, created_at FROM users"
+                )
+            }
+        
+        seen = set()
+        for row in archived:
+            # Rows can appear twice if an archival run was interrupted before its delete
+            if row['id'] in live_ids or row['id'] in seen or row['user_id'] not in users:
+                continue
+            seen.add(row['id'])
+            matches.append(users[row['user_id']] + (row['cat_name'], row['total_score'], row['created_at']))
+        
+        matches.sort(key=lambda match: match[7], reverse=True)
+        return matches
+    
+    def iter_archived_matches(self):
+        """Yield archived match rows (as dicts) from every monthly archive file"""
+        for path in self.iter_archive_paths():
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    yield json.loads(line)
+    
+    def iter_archive_paths(self):
+        """Yield the paths of the monthly match archive files, oldest first"""
+        if not os.path.isdir(self.archive_dir):
+            return
+        for name in sorted(os.listdir(self.archive_dir)):
+            if name.startswith("matches-") and name.endswith(".jsonl.gz"):
+                yield os.path.join(self.archive_dir, name)
+    
+    def archive_matches(self, older_than_days: int = 365, batch_size: int = 1000) -> int:
+        """Move matches older than the given age into monthly gzip JSONL archives.
+
+        Each batch is appended to archive_dir/matches-YYYY-MM.jsonl.gz and
+        synced to disk before it is deleted from the database; freed pages
+        are then reclaimed with an incremental vacuum. Returns the number of
+        rows archived. Rollup tables are left untouched, so reports still
+        cover archived history.
+        """
+        os.makedirs(self.archive_dir, exist_ok=True)
+        archived = 0
+        with self.pool.reader() as conn:
+            cutoff = conn.execute("SELECT datetime('now', ?)", (f"-{older_than_days} days",)).fetchone()[0]
+        
+        # The writer is only taken to delete each batch, so saves carry on between batches
+        while True:
+            with self.pool.reader() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = sqlite3.Row
+                rows = [dict(row) for row in cursor.execute(
+                    "SELECT * FROM matches WHERE created_at < ? ORDER BY id LIMIT ?",
+                    (cutoff, batch_size)
+                )]
+            if not rows:
+                break
+            
+            by_month = {}
+            for row in rows:
+                by_month.setdefault(row['created_at'][:7], []).append(row)
+            
+            for month, month_rows in by_month.items():
+                path = os.path.join(self.archive_dir, f"matches-{month}.jsonl.gz")
+                # Appending a new gzip member keeps earlier batches intact
+                with open(path, 'ab') as raw:
+                    with gzip.GzipFile(fileobj=raw, mode='ab') as archive:
+                        for row in month_rows:
+                            archive.write((json.dumps(row) + "\n").encode('utf-8'))
+                    raw.flush()
+                    os.fsync(raw.fileno())
+            
+            with self.pool.transaction() as conn:
+                conn.executemany("DELETE FROM matches WHERE id = ?", [(row['id'],) for row in rows])
+            archived += len(rows)
+        
+        if archived:
+            with self.pool.writer() as conn:
+                if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                    # One-time conversion for databases created before incremental vacuum
+                    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                    conn.execute("VACUUM")
+                conn.execute("PRAGMA incremental_vacuum")
+        
+        return archived
+
+    def iter_export(self, view: str, after_id: int = 0, chunk_size: int = 5000, since: str = None,
+                    until: str = None, zip_code: str = None):
+        """Yield rows of an export view in key order, chunk_size rows at a time.
+
+        Each chunk is a separate keyset query (key > last key seen) on a
+        pooled reader that is returned between chunks, so memory stays
+        constant and writers are never held up by a long-running read.
+        since and until are inclusive YYYY-MM-DD dates (ValueError otherwise).
+        Only the database is read: matches already moved to archive files by
+        archive_matches() are not included.
+        """
+        spec = EXPORT_VIEWS[view]
+        conditions, params = [], []
+        if since:
+            conditions.append(f"{spec['created']} >= ?")
+            params.append(self._parse_export_date(since, 'since').isoformat())
+        if until:
+            conditions.append(f"{spec['created']} < date(?, '+1 day')")
+            params.append(self._parse_export_date(until, 'until').isoformat())
+        if zip_code:
+            conditions.append(f"{spec['zip']} = ?")
+            params.append(zip_code)
+        query = f'''
+            SELECT {', '.join(expression for _, expression in spec['columns'])}
+            FROM {spec['from']}
+            WHERE {' AND '.join([f"{spec['key']} > ?"] + conditions)}
+            ORDER BY {spec['key']} LIMIT ?
+        '''
+        
+        while True:
+            with self.pool.reader() as conn:
+                rows = conn.execute(query, [after_id] + params + [chunk_size]).fetchall()
+            if not rows:
+                return
+            yield rows
+            after_id = rows[-1][0]
+    
+    @staticmethod
+    def _parse_export_date(value: str, name: str) -> date:
+        try:
+            return date.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid {name} date '{value}' (expected YYYY-MM-DD)")
+    
+    def export(self, view: str, output_path: str, fmt: str = None, compress: bool = None, since: str = None,
+               until: str = None, zip_code: str = None, resume: bool = False, chunk_size: int = 5000) -> int:
+        """Stream an export view to a CSV or JSON Lines file and return the number of rows written.
+
+        The format defaults from the file name (.csv, else JSON Lines) and
+        .gz names are gzip-compressed, one gzip member per chunk. After each
+        chunk is synced, the last key and file size are saved to
+        <output_path>.cursor; with resume, an export continues from there
+        (dropping anything written after it), and a finished export picks up
+        rows added since. Archived matches are not exported (see iter_export).
+        """
+        if view not in EXPORT_VIEWS:
+            raise ValueError(f"Unknown export view '{view}' (choose from {', '.join(EXPORT_VIEWS)})")
+        for value, name in ((since, 'since'), (until, 'until')):
+            if value:
+                self._parse_export_date(value, name)
+        if view != 'users' and any(self.iter_archive_paths()):
+            print(f"WARNING: Matches archived to {self.archive_dir} are not included in this export")
+        fmt = fmt or ('csv' if output_path.removesuffix('.gz').endswith('.csv') else 'jsonl')
+        if fmt not in ('csv', 'jsonl'):
+            raise ValueError(f"Unknown export format '{fmt}' (choose from csv, jsonl)")
+        compress = output_path.endswith('.gz') if compress is None else compress
+        
+        cursor_path = f"{output_path}.cursor"
+        state = {'view': view, 'format': fmt, 'compress': compress,
+                 'filters': {'since': since, 'until': until, 'zip_code': zip_code},
+                 'last_id': 0, 'offset': 0, 'rows': 0}
+        if resume and os.path.exists(cursor_path) and os.path.exists(output_path):
+            with open(cursor_path) as f:
+                saved = json.load(f)
+            if any(saved.get(field) != state[field] for field in ('view', 'format', 'compress', 'filters')):
+                raise ValueError(f"{cursor_path} belongs to a different export; remove it or drop --resume")
+            state = saved
+        
+        names = [name for name, _ in EXPORT_VIEWS[view]['columns']]
+        written = 0
+        with open(output_path, 'r+b' if state['offset'] else 'wb') as raw:
+            raw.truncate(state['offset'])
+            raw.seek(state['offset'])
+            
+            def write_chunk(text: str, rows: List[tuple]):
+                data = text.encode('utf-8')
+                raw.write(gzip.compress(data) if compress else data)
+                raw.flush()
+                os.fsync(raw.fileno())
+                if rows:
+                    state.update(last_id=rows[-1][0], rows=state['rows'] + len(rows))
+                state['offset'] = raw.tell()
+                # Saved after the data is on disk, so the cursor never runs ahead of the file
+                tmp_path = f"{cursor_path}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump(state, f)
+                os.replace(tmp_path, cursor_path)
+            
+            if fmt == 'csv' and state['offset'] == 0:
+                buffer = io.StringIO()
+                csv.writer(buffer).writerow(names)
+                write_chunk(buffer.getvalue(), [])
+            
+            for rows in self.iter_export(view, state['last_id'], chunk_size, since, until, zip_code):
+                buffer = io.StringIO()
+                if fmt == 'csv':
+                    csv.writer(buffer).writerows(rows)
+                else:
+                    for row in rows:
+                        buffer.write(json.dumps(dict(zip(names, row))) + "\n")
+                write_chunk(buffer.getvalue(), rows)
+                written += len(rows)
+        
+        return written
+
+# Write-behind durability modes: (wait for commit, PRAGMA synchronous)
+DURABILITY_MODES = {
+    'strict': (True, 'FULL'),    # save_* returns once its batch is committed and synced
+    'batched': (False, 'FULL'),  # save_* returns at once; batches are synced when committed
+    'relaxed': (False, 'OFF'),   # Like batched, but commits leave syncing to the OS
+}
+
+class WriteBehindWriter:
+    """Saves users and matches on a background thread, in batched transactions.
+
+    Offers the same save_user/save_match calls as Database. Producers block
+    when the bounded queue is full (backpressure), and pending work is
+    flushed on close() and at interpreter exit.
+    """
+    
+    def __init__(self, db: Database, durability: str = 'batched', max_queue: int = 1000,
+                 batch_size: int = 200, batch_wait: float = 0.05):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown durability mode '{durability}' (choose from {', '.join(DURABILITY_MODES)})")
+        self.db = db
+        self.durability = durability
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait  # Seconds to wait for more work before committing a partial batch
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        self.batches = 0
+        self.writes = 0
+        self.errors = 0
+        self.last_error: Optional[Exception] = None
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+    
+    def save_user(self, user: UserProfile) -> str:
+        """Queue a user profile and return its (already assigned) user_id"""
+        user.user_id = self.db.new_user_id()
+        self._submit(self.db._insert_user, user)
+        return user.user_id
+    
+    def save_match(self, user_id: str, cat: CatProfile, score: CompatibilityScore):
+        """Queue a match result"""
+        self._submit(self.db._insert_match, user_id, cat, score)
+    
+    def _submit(self, write, *args):
+        if self._closed:
+            raise RuntimeError("Write-behind writer is closed")
+        done = Future()
+        self._queue.put((write, args, done))  # Blocks while the queue is full
+        if DURABILITY_MODES[self.durability][0]:
+            done.result()
+    
+    def flush(self):
+        """Block until everything queued so far is committed"""
+        self._queue.join()
+    
+    def close(self):
+        """Commit pending work and stop the writer thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        atexit.unregister(self.close)
+    
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.batch_size and batch[-1] is not None:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            if batch[-1] is None:
+                stopping = True
+                batch.pop()
+            try:
+                self._commit(batch)
+            finally:
+                # Always, so flush() and close() can't wait forever on a failed batch
+                for _ in range(len(batch) + stopping):
+                    self._queue.task_done()
+    
+    def _commit(self, batch: List[tuple]):
+        """Write one batch in a single transaction, retrying its writes one at a time if it fails.
+
+        Every item's future is resolved whatever happens, so one bad write
+        neither takes the rest of its batch down with it nor stalls the writer.
+        """
+        if not batch:
+            return
+        try:
+            with self.db.pool.writer() as conn:
+                # The pool's writer is shared, so the durability setting only applies to this batch
+                conn.execute(f"PRAGMA synchronous = {DURABILITY_MODES[self.durability][1]}")
+                try:
+                    error = self._write(batch)
+                    if error and len(batch) > 1:
+                        print(f"WARNING: Write-behind batch of {len(batch)} writes failed ({error}); "
+                              f"retrying them one at a time")
+                        for item in batch:
+                            item_error = self._write([item])
+                            if item_error:
+                                self._fail([item], item_error)
+                    elif error:
+                        self._fail(batch, error)
+                finally:
+                    conn.execute("PRAGMA synchronous = FULL")
+        except Exception as e:
+            self._fail([item for item in batch if not item[2].done()], e)
+    
+    def _write(self, items: List[tuple]) -> Optional[Exception]:
+        """Commit items in one transaction and resolve their futures; returns the error if it failed"""
+        try:
+            with self.db.pool.transaction() as conn:
+                for write, args, _ in items:
+                    write(conn, *args)
+        except Exception as e:
+            return e
+        self.batches += 1
+        self.writes += len(items)
+        for _, _, done in items:
+            done.set_result(None)
+        return None
+    
+    def _fail(self, items: List[tuple], error: Exception):
+        if not items:
+            return
+        self.errors += len(items)
+        self.last_error = error
+        print(f"ERROR: {len(items)} write-behind write(s) failed: {error}")
+        for _, _, done in items:
+            done.set_exception(error)
+    
+    def stats(self) -> Dict:
+        """Return queue depth and batch/write/error counters"""
+        return {
+            'durability': self.durability,
+            'queued': self._queue.qsize(),
+            'max_queue': self._queue.maxsize,
+            'batches': self.batches,
+            'writes': self.writes,
+            'errors': self.errors,
+        }
 
 # =============================================================================
 # CLI APPLICATION
@@ -527,20 +2962,65 @@ class Database:
 class PurrfectMatchApp:
     """Main CLI application"""
     
-    def __init__(self):
-        self.db = Database()
+    def __init__(self, db_path: str = "purrfect_match.db"):
+        self.db = Database(db_path)
         self.calculator = CompatibilityCalculator()
         
         # Initialize API clients (you'll need to set your API keys)
-        self.cat_api = TheCatAPIClient()  # Works without API key for basic features
+        # The breed catalog snapshot is kept next to the database
+        self.breed_snapshot_path = f"{os.path.splitext(db_path)[0]}_breeds.json.gz"
+        self.cat_api = TheCatAPIClient(snapshot_path=self.breed_snapshot_path)  # Works without API key for basic features
+        self.cat_api.load_snapshot()
         self.petfinder_api = None  # Will be initialized with API keys if provided
+        self.include_archived = False  # Show archived history in past matches
+        
+        # Region search: extra ZIPs searched alongside the user's, and a search radius in miles
+        self.region_zips: List[str] = []
+        self.search_radius: Optional[int] = None
+        self.search_budget = 15.0  # Seconds allowed for all region searches together
+        
+        # Total seconds a match search may spend on API calls before degrading
+        self.request_deadline = 30.0
+        
+        # Progressive mode: show provisional matches after each page of results
+        self.progressive = False
+        self.max_pages = 5
+        
+        # Background warm-up while the quiz runs: ZIP -> Future of search results,
+        # usable for speculative_searches.ttl seconds
+        self.warmup_threads: List[threading.Thread] = []
+        self.speculative_searches = BoundedCache("speculative", max_entries=16, ttl=300.0,
+                                                 sizeof=sys.getsizeof)
+        
+        # Optional write-behind writer taking saves off the interactive path (see enable_write_behind)
+        self.writer: Optional[WriteBehindWriter] = None
+        
+        # Precomputed recommendations (see precompute_recommendations) older than this are ignored,
+        # and answers must prove at least this many matches exact to be used
+        self.precompute_max_age = 3600.0
+        self.precompute_min_results = 5
     
     def set_api_keys(self, petfinder_key: str = None, petfinder_secret: str = None, cat_api_key: str = None):
         """Set API keys for external services"""
         if petfinder_key and petfinder_secret:
             self.petfinder_api = PetfinderAPIClient(petfinder_key, petfinder_secret)
         if cat_api_key:
-            self.cat_api = TheCatAPIClient(cat_api_key)
+            self.cat_api = TheCatAPIClient(cat_api_key, snapshot_path=self.breed_snapshot_path)
+            self.cat_api.load_snapshot()
+    
+    def enable_write_behind(self, durability: str = 'batched'):
+        """Save users and matches through a background write-behind writer"""
+        self.writer = WriteBehindWriter(self.db, durability)
+    
+    @property
+    def store(self):
+        """Where saves go: the write-behind writer if enabled, else the database"""
+        return self.writer or self.db
+    
+    def flush_writes(self):
+        """Make queued saves visible before reading history back"""
+        if self.writer:
+            self.writer.flush()
     
     def show_main_menu(self):
         """Show main menu and handle user choice"""
@@ -571,43 +3051,34 @@ class PurrfectMatchApp:
     
     def view_past_matches(self):
         """View past matches from database"""
+        self.flush_writes()
         print("\n" + "=" * 60)
         print("YOUR PAST MATCHES")
         print("=" * 60)
         
         # Get all matches from database
-        import sqlite3
         try:
-            with sqlite3.connect(self.db.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT u.user_id, u.zip_code, u.home_type, u.experience, u.created_at,
-                           m.cat_name, m.total_score, m.created_at as match_date
-                    FROM users u 
-                    JOIN matches m ON u.user_id = m.user_id 
-                    ORDER BY m.created_at DESC
-                ''')
-                matches = cursor.fetchall()
-                
-                if not matches:
-                    print("No past matches found. Take the quiz to get your first matches!")
-                    return
-                
-                current_user = None
-                for match in matches:
-                    user_id, zip_code, home_type, experience, user_created, cat_name, score, match_date = match
-                    if user_id != current_user:
-                        current_user = user_id
-                        print(f"\nUser Profile: {home_type.title()} dweller in {zip_code}")
-                        print(f"Experience: {experience.replace('_', ' ').title()}")
-                        print(f"Profile created: {user_created}")
-                        print("-" * 40)
-                    
-                    rating = "EXCELLENT" if score >= 80 else "GOOD" if score >= 60 else "FAIR"
-                    print(f"  {cat_name} - {score}% Compatible ({rating}) - {match_date}")
-                
-                print(f"\nTotal matches found: {len(matches)}")
+            matches = self.db.get_past_matches(include_archived=self.include_archived)
+            
+            if not matches:
+                print("No past matches found. Take the quiz to get your first matches!")
+                return
+            
+            current_user = None
+            for match in matches:
+                user_id, zip_code, home_type, experience, user_created, cat_name, score, match_date = match
+                if user_id != current_user:
+                    current_user = user_id
+                    print(f"\nUser Profile: {home_type.title()} dweller in {zip_code}")
+                    print(f"Experience: {experience.replace('_', ' ').title()}")
+                    print(f"Profile created: {user_created}")
+                    print("-" * 40)
                 
+                rating = "EXCELLENT" if score >= 80 else "GOOD" if score >= 60 else "FAIR"
+                print(f"  {cat_name} - {score}% Compatible ({rating}) - {match_date}")
+            
+            print(f"\nTotal matches found: {len(matches)}")
+            
         except Exception as e:
             print(f"Error retrieving matches: {e}")
 
@@ -618,6 +3089,36 @@ class PurrfectMatchApp:
             if user:
                 self.process_new_user(user)
     
+    def display_report(self, zip_code: str = None, days: int = None):
+        """Display match analytics from the rollup tables"""
+        self.flush_writes()
+        report = self.db.get_match_report(zip_code=zip_code, days=days)
+        
+        scope = f"ZIP {zip_code}" if zip_code else "all ZIPs"
+        period = f"last {days} days" if days else "all time"
+        print("\n" + "=" * 60)
+        print(f"MATCH REPORT ({scope}, {period})")
+        print("=" * 60)
+        
+        if not report['match_count']:
+            print("No matches recorded yet.")
+            return
+        
+        print(f"Matches: {report['match_count']}")
+        print(f"Scores: avg {report['average_score']} | min {report['min_score']} | max {report['max_score']}")
+        
+        print("\nScore distribution:")
+        for bucket, count in report['score_distribution'].items():
+            print(f"  {bucket:>6}: {count}")
+        
+        print("\nTop breeds:")
+        for row in report['top_breeds']:
+            print(f"  {row['breed']}: {row['match_count']}")
+        
+        print("\nDaily volume:")
+        for row in report['daily']:
+            print(f"  {row['day']}  {row['zip_code'] or '-':>7}  {row['match_count']:>5} matches  (avg {row['average_score']})")
+    
     def take_quiz(self) -> UserProfile:
         """Take the compatibility quiz"""
         print("\nLet's find your perfect cat companion!")
@@ -675,39 +3176,247 @@ class PurrfectMatchApp:
     
     def find_matches(self, user: UserProfile) -> List[tuple]:
         """Find compatible cats using real API data"""
+        if self.region_zips or self.search_radius:
+            return self.find_matches_in_region(user, [user.zip_code] + self.region_zips, self.search_radius)
+        matches = self.precomputed_matches(user)
+        if matches is not None:
+            return matches
+        session = self.start_match_session(user, Deadline(self.request_deadline))
+        return session.ranked() if session else []
+    
+    def precomputed_matches(self, user: UserProfile) -> Optional[List[tuple]]:
+        """Answer a quiz from the precomputed recommendations, or None to score it live.
+
+        The archetype's stored cats are re-scored for the user's exact answers.
+        If only the archetype's top cats were stored, the answer is kept only
+        as far as no unstored cat could outscore it, and only if that covers
+        at least precompute_min_results matches.
+        """
+        weights = self.calculator.weights
+        key = archetype_key(user, weights)
+        found = self.db.get_precomputed(user.zip_code, key) if key else None
+        if not found:
+            return None
+        computed_at, rules_hash, inventory, rows = found
+        if time.time() - computed_at > self.precompute_max_age or rules_hash != rules_fingerprint(weights):
+            return None
+        
+        lowest_stored = rows[-1][0]
+        rows.sort(key=lambda row: row[1])  # Search order, so ties rank as in a live search
+        session = MatchSession(user, [row[2] for row in rows], [row[3] for row in rows], self.calculator)
+        matches = session.ranked()
+        if len(rows) < inventory:
+            # Unstored cats scored at most lowest_stored for the archetype
+            bound = lowest_stored + archetype_score_bound(user, weights)
+            exact = sum(1 for _, score, _ in matches if score.total_score > bound)
+            if exact < self.precompute_min_results:
+                return None
+            matches = matches[:exact]
+        return matches
+    
+    def precompute_recommendations(self, zip_codes: List[str], top_n: int = 20) -> int:
+        """Rank each ZIP's current cats for every adopter archetype and store the top_n.
+
+        Meant to run on a schedule; returns the number of ZIPs precomputed.
+        """
+        done = 0
+        for zip_code in zip_codes:
+            session = self.start_match_session(UserProfile(zip_code=zip_code), Deadline(self.request_deadline))
+            if not session:
+                print(f"WARNING: No cats to precompute for {zip_code}")
+                continue
+            
+            # Each archetype only re-scores the components its answers change
+            rankings = {}
+            for key, archetype in iter_archetypes(session.rules.weights, zip_code):
+                session.update(k=0, home_type=archetype.home_type, hours_away=archetype.hours_away,
+                               activity_level=archetype.activity_level, experience=archetype.experience,
+                               allergies=archetype.allergies)
+                order = heapq.nlargest(top_n, range(len(session)), key=session.totals.__getitem__)
+                rankings[key] = [(session.cats[i].petfinder_id, session.totals[i]) for i in order]
+            
+            self.db.save_precomputed(zip_code, session.cats, session.breed_infos, rankings,
+                                     rules_fingerprint(session.rules.weights))
+            done += 1
+        return done
+    
+    def find_matches_in_region(self, user: UserProfile, zip_codes: List[str], radius: int = None,
+                               k: int = None, budget: float = None) -> List[tuple]:
+        """Search several ZIPs concurrently and rank all their cats together.
+
+        Cats listed under more than one ZIP are kept once, with the smallest
+        distance. Searches still running when the latency budget runs out are
+        abandoned and ranking uses whatever has arrived.
+        """
+        if not self.petfinder_api:
+            print("WARNING: Petfinder API not configured - using demo mode")
+            return []
+        
+        zip_codes = list(dict.fromkeys(z for z in zip_codes if z))
+        budget = budget if budget is not None else self.search_budget
+        radius_note = f" (within {radius} miles)" if radius else ""
+        print(f"\nSearching for cats near {', '.join(zip_codes)}{radius_note}...")
+        
+        best = {}  # petfinder_id -> (cat, score, breed_info)
+        deadline = Deadline(budget)
+        executor = ThreadPoolExecutor(max_workers=min(8, len(zip_codes)) or 1, thread_name_prefix="region-search")
+        futures = {
+            executor.submit(self.petfinder_api.search_cats, zip_code, 20, radius, deadline=deadline): zip_code
+            for zip_code in zip_codes
+        }
+        try:
+            # Score each source's cats as soon as its search completes
+            for future in as_completed(futures, timeout=budget):
+                try:
+                    cats = future.result()
+                except Exception as e:
+                    print(f"ERROR: Search near {futures[future]} failed: {e}")
+                    continue
+                for cat in cats:
+                    existing = best.get(cat.petfinder_id)
+                    if existing and existing[0].distance <= cat.distance:
+                        continue
+                    breed_info = self.cat_api.get_breed_by_name(cat.breeds[0], deadline) if cat.breeds else None
+                    best[cat.petfinder_id] = (cat, self.calculator.calculate_compatibility(user, cat, breed_info), breed_info)
+        except FuturesTimeoutError:
+            late = [futures[future] for future in futures if not future.done()]
+            print(f"WARNING: Search budget exceeded; skipping results for {', '.join(late)}")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        if not best:
+            print("ERROR: No cats found. Check your location or API configuration.")
+            return []
+        
+        # Ties keep the order in which cats arrived
+        return heapq.nlargest(k or len(best), best.values(), key=lambda match: match[1].total_score)
+    
+    def start_warmup(self):
+        """Warm up the token, breed catalog, database and a likely search in the background"""
+        deadline = Deadline(self.request_deadline)
+        tasks = [("warmup-breeds", lambda: self.cat_api.load_catalog(deadline=deadline)),
+                 ("warmup-db", self._warm_up_database)]
+        if self.petfinder_api:
+            tasks.append(("warmup-token", lambda: self.petfinder_api._get_access_token(deadline)))
+        
+        for name, task in tasks:
+            thread = threading.Thread(target=self._run_warmup_task, args=(name, task), name=name, daemon=True)
+            thread.start()
+            self.warmup_threads.append(thread)
+    
+    def _run_warmup_task(self, name: str, task):
+        try:
+            task()
+        except Exception as e:
+            # Warm-up is best effort; the real request will retry and report errors
+            print(f"WARNING: {name} failed: {e}")
+    
+    def _warm_up_database(self):
+        """Open the database and start a speculative search near the last adopter's ZIP"""
+        zip_code = self.db.get_last_zip_code()
+        if zip_code and self.petfinder_api:
+            self.start_speculative_search(zip_code)
+    
+    def start_speculative_search(self, zip_code: str):
+        """Search a ZIP ahead of time so a quiz finishing there finds results ready"""
+        if zip_code in self.speculative_searches:
+            return
+        future = Future()
+        self.speculative_searches.put(zip_code, future)
+        try:
+            future.set_result(self.petfinder_api.search_cats(zip_code, limit=20,
+                                                             deadline=Deadline(self.request_deadline)))
+        except Exception as e:
+            future.set_exception(e)
+    
+    def cache_stats(self) -> Dict[str, Dict]:
+        """Return the stats of every cache the app's layers keep, by cache name"""
+        index = getattr(self.cat_api, 'breed_index', None)
+        caches = [
+            getattr(index, 'resolved', None),
+            getattr(self.petfinder_api, 'search_cache', None),
+            getattr(getattr(self.petfinder_api, 'animal_cache', None), 'entries', None),
+            self.speculative_searches,
+        ]
+        return {cache.name: cache.stats() for cache in caches if isinstance(cache, BoundedCache)}
+    
+    def wait_for_warmup(self, timeout: float = None):
+        """Block until background warm-up work has finished (mainly for tests and batch runs)"""
+        for thread in self.warmup_threads:
+            thread.join(timeout)
+    
+    def _take_speculative_search(self, zip_code: str, deadline: Deadline = None) -> Optional[List[CatProfile]]:
+        """Return warmed-up search results for a ZIP if they are still fresh"""
+        future = self.speculative_searches.pop(zip_code)
+        if future is None:
+            return None
+        try:
+            # Wait for an in-flight speculative search rather than issuing a duplicate
+            return future.result(timeout=deadline.remaining() if deadline else None) or None
+        except Exception:
+            return None
+    
+    def start_match_session(self, user: UserProfile, deadline: Deadline = None) -> Optional[MatchSession]:
+        """Search for cats and score them, keeping the results for later re-ranking.
+
+        API calls share the deadline; if breed data can't be fetched in time
+        cats are scored without it.
+        """
         print(f"\nSearching for cats near {user.zip_code}...")
         
-        # Get cats from Petfinder
+        # Get cats from Petfinder (possibly already fetched during warm-up)
         if self.petfinder_api:
-            cats = self.petfinder_api.search_cats(user.zip_code, limit=20)
+            cats = self._take_speculative_search(user.zip_code, deadline)
+            if cats is None:
+                cats = self.petfinder_api.search_cats(user.zip_code, limit=20, deadline=deadline)
         else:
             print("WARNING: Petfinder API not configured - using demo mode")
-            return []
+            return None
         
         if not cats:
             print("ERROR: No cats found. Check your location or API configuration.")
-            return []
+            return None
         
         # Get breed information
         breed_cache = {}
         
-        matches = []
+        breed_infos = []
         for cat in cats:
             # Get breed info for first breed
             breed_info = None
             if cat.breeds:
                 breed_name = cat.breeds[0]
                 if breed_name not in breed_cache:
-                    breed_cache[breed_name] = self.cat_api.get_breed_by_name(breed_name)
+                    breed_cache[breed_name] = self.cat_api.get_breed_by_name(breed_name, deadline)
                 breed_info = breed_cache[breed_name]
-            
-            # Calculate compatibility
-            score = self.calculator.calculate_compatibility(user, cat, breed_info)
-            matches.append((cat, score, breed_info))
+            breed_infos.append(breed_info)
         
-        # Sort by compatibility score
-        matches.sort(key=lambda x: x[1].total_score, reverse=True)
-        return matches
+        # Calculate compatibility
+        return MatchSession(user, cats, breed_infos, self.calculator)
+    
+    def iter_progressive_matches(self, user: UserProfile, max_pages: int = 5):
+        """Yield the ranking so far (best first) after each page of search results is scored"""
+        if not self.petfinder_api:
+            print("WARNING: Petfinder API not configured - using demo mode")
+            return
+        
+        print(f"\nSearching for cats near {user.zip_code}...")
+        deadline = Deadline(self.request_deadline)
+        matches = []
+        for cats in self.petfinder_api.iter_search_pages(user.zip_code, limit=20, max_pages=max_pages,
+                                                         deadline=deadline):
+            for cat in cats:
+                breed_info = self.cat_api.get_breed_by_name(cat.breeds[0], deadline) if cat.breeds else None
+                matches.append((cat, self.calculator.calculate_compatibility(user, cat, breed_info), breed_info))
+            # Stable sort: ties keep the order cats arrived in
+            matches.sort(key=lambda match: match[1].total_score, reverse=True)
+            yield matches
+    
+    def display_provisional_matches(self, matches: List[tuple], page: int):
+        """Display a compact provisional top 5 while more results are loading"""
+        print(f"\nProvisional top matches after page {page} ({len(matches)} cats scored):")
+        for i, (cat, score, _) in enumerate(matches[:5], 1):
+            print(f"  {i}. {cat.name} - {score.total_score}% Compatible ({cat.distance:.1f} miles)")
     
     def display_matches(self, matches: List[tuple]):
         """Display compatibility matches"""
@@ -735,18 +3444,26 @@ class PurrfectMatchApp:
     def process_new_user(self, user: UserProfile):
         """Process a new user quiz and find matches"""
         # Save user
-        user_id = self.db.save_user(user)
+        user_id = self.store.save_user(user)
         print(f"\nProfile saved! ID: {user_id}")
         
         # Find and display matches
-        matches = self.find_matches(user)
+        if self.progressive:
+            matches = []
+            for page, matches in enumerate(self.iter_progressive_matches(user, self.max_pages), 1):
+                self.display_provisional_matches(matches, page)
+            if not matches:
+                print("ERROR: No cats found. Check your location or API configuration.")
+        else:
+            matches = self.find_matches(user)
         
+        # Matches are only persisted once the final ranking is known
         if matches:
             self.display_matches(matches)
             
             # Save top matches
             for cat, score, _ in matches[:5]:
-                self.db.save_match(user_id, cat, score)
+                self.store.save_match(user_id, cat, score)
             
             print(f"\nSaved {min(5, len(matches))} matches to database!")
         
@@ -754,6 +3471,8 @@ class PurrfectMatchApp:
     
     def run(self):
         """Run the main application"""
+        # Fetch what the search will need while the user is busy with the menu and quiz
+        self.start_warmup()
         try:
             while True:
                 # Show main menu
@@ -788,19 +3507,403 @@ class PurrfectMatchApp:
             print("\n\nGoodbye!")
         except Exception as e:
             print(f"\nError: {e}")
+    
+    def run_batch(self, input_path: str, output_path: str) -> int:
+        """Match every quiz in a JSON Lines file, saving results like the interactive quiz.
+
+        Each output line holds the adopter's ID and ranked matches; returns the
+        number of quizzes processed. Invalid lines are reported and skipped.
+        """
+        processed = 0
+        with open(input_path, 'rb') as f, open(output_path, 'w') as output:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    user = user_profile_from_dict(json_loads(line))
+                except ValueError as e:
+                    print(f"ERROR: Skipping line {line_number} of {input_path}: {e}")
+                    continue
+                
+                user_id = self.store.save_user(user)
+                matches = self.find_matches(user)
+                for cat, score, _ in matches[:5]:
+                    self.store.save_match(user_id, cat, score)
+                
+                output.write(json.dumps({
+                    'user_id': user_id,
+                    'matches': [{'cat_id': cat.petfinder_id, 'name': cat.name, 'score': score.total_score}
+                                for cat, score, _ in matches],
+                }) + "\n")
+                processed += 1
+        return processed
+
+# =============================================================================
+# PROFILING
+# =============================================================================
+
+# Functions that mark a stage of a run; samples belong to the innermost one on the stack
+PROFILE_STAGES = {
+    'PurrfectMatchApp.__init__': 'startup',
+    'PurrfectMatchApp.take_quiz': 'quiz',
+    'PetfinderAPIClient._get_access_token': 'auth',
+    'PetfinderAPIClient.search_cats': 'search',
+    'PetfinderAPIClient.iter_search_pages': 'search',
+    'TheCatAPIClient.load_catalog': 'breeds',
+    'TheCatAPIClient.get_breed_by_name': 'breeds',
+    'MatchSession.__init__': 'scoring',
+    'MatchSession.update': 'scoring',
+    'CompatibilityCalculator.calculate_compatibility': 'scoring',
+    'Database.save_user': 'database',
+    'Database.save_match': 'database',
+    'WriteBehindWriter._commit': 'database',
+    'Database.get_past_matches': 'database',
+    'PurrfectMatchApp.display_matches': 'display',
+    'PurrfectMatchApp.display_provisional_matches': 'display',
+}
+MODULE_FILENAME = os.path.basename(__file__)
+# Leaf functions of threads that are parked rather than working
+IDLE_FUNCTIONS = {'wait', 'select', 'poll', 'accept', '_worker', '_watch', 'serve_forever', '_wait_for_tstate_lock'}
+
+class Profiler:
+    """Profiles one end-to-end run with cProfile, tracemalloc and stack sampling.
+
+    stop() writes <prefix>.pstats (for pstats/snakeviz), <prefix>.folded
+    (collapsed stacks for flamegraph tools) and <prefix>.memory.txt, then
+    prints a short per-stage summary.
+    """
+    
+    def __init__(self, prefix: str, top: int = 5, interval: float = 0.002):
+        self.prefix = prefix
+        self.top = top
+        self.interval = interval
+        self.stacks = {}  # Collapsed stack -> samples
+        self._profiles = []
+        self._profiles_lock = threading.Lock()
+        self._main_profile = None
+        self._started = None
+        self._stop = threading.Event()
+        self._sampler = None
+    
+    def start(self):
+        """Start memory tracing, the stack sampler and profiling of the calling thread"""
+        tracemalloc.start()
+        self._started = time.perf_counter()
+        self._sampler = threading.Thread(target=self._sample, name="profiler", daemon=True)
+        self._sampler.start()
+        self._main_profile = cProfile.Profile()
+        self._main_profile.enable()
+    
+    def profile_call(self, func, *args, **kwargs):
+        """Run func under cProfile on the current thread (cProfile only sees one thread)"""
+        profile = cProfile.Profile()
+        try:
+            return profile.runcall(func, *args, **kwargs)
+        finally:
+            with self._profiles_lock:
+                self._profiles.append(profile)
+    
+    def _sample(self):
+        """Record the stacks of every thread that is running this module's code"""
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == me or frame.f_code.co_name in IDLE_FUNCTIONS:
+                    continue
+                stack, ours = [], False
+                while frame is not None:
+                    code = frame.f_code
+                    filename = os.path.basename(code.co_filename)
+                    ours = ours or filename == MODULE_FILENAME
+                    stack.append(f"{getattr(code, 'co_qualname', code.co_name)} ({filename}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                if ours:
+                    key = ";".join(reversed(stack))
+                    self.stacks[key] = self.stacks.get(key, 0) + 1
+    
+    @staticmethod
+    def stage_of(stack: str) -> str:
+        """Name the innermost stage function on a collapsed stack"""
+        for frame in reversed(stack.split(";")):
+            stage = PROFILE_STAGES.get(frame.split(" (")[0])
+            if stage:
+                return stage
+        return 'other'
+    
+    def stop(self) -> Dict:
+        """Stop profiling, write the output files and print the summary"""
+        self._main_profile.disable()
+        elapsed = time.perf_counter() - self._started
+        self._stop.set()
+        self._sampler.join()
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        
+        directory = os.path.dirname(self.prefix)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        stats = pstats.Stats(self._main_profile)
+        for profile in self._profiles:
+            stats.add(profile)
+        stats.dump_stats(f"{self.prefix}.pstats")
+        
+        with open(f"{self.prefix}.folded", 'w') as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f"{stack} {count}\n")
+        
+        allocations = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)]).statistics('lineno')
+        with open(f"{self.prefix}.memory.txt", 'w') as f:
+            f.write(f"current {current} bytes, peak {peak} bytes\n")
+            for stat in allocations[:50]:
+                f.write(f"{stat}\n")
+        
+        # Per-stage samples and the leaf functions that took them
+        stages = {}
+        for stack, count in self.stacks.items():
+            stage = stages.setdefault(self.stage_of(stack), {'samples': 0, 'functions': {}})
+            stage['samples'] += count
+            leaf = stack.rsplit(";", 1)[-1]
+            stage['functions'][leaf] = stage['functions'].get(leaf, 0) + count
+        
+        # Stage times are the run's wall time split by share of samples
+        total = sum(stage['samples'] for stage in stages.values()) or 1
+        print(f"\nProfile ({elapsed:.2f}s, {total} samples, peak traced memory {peak / 1024 / 1024:.1f} MiB)")
+        for name, stage in sorted(stages.items(), key=lambda item: -item[1]['samples']):
+            print(f"  {name:<10} {stage['samples'] / total * elapsed * 1000:8.0f} ms  "
+                  f"{stage['samples'] / total:6.1%}")
+            for leaf, count in heapq.nlargest(self.top, stage['functions'].items(), key=lambda item: item[1]):
+                print(f"      {count / total:6.1%}  {leaf}")
+        print(f"Wrote {self.prefix}.pstats, {self.prefix}.folded and {self.prefix}.memory.txt")
+        return stages
+
+# =============================================================================
+# SERVICE MODE
+# =============================================================================
+
+class MatchRequestHandler(BaseHTTPRequestHandler):
+    """JSON API: POST /match with quiz answers, GET /health and /stats"""
+    
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        elif self.path == '/stats':
+            self._send_json(200, {'caches': self.server.app.cache_stats()})
+        else:
+            self._send_json(404, {'error': 'not found'})
+    
+    def do_POST(self):
+        if self.path != '/match':
+            self._send_json(404, {'error': 'not found'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            user = user_profile_from_dict(json_loads(self.rfile.read(length)))
+        except ValueError as e:
+            self._send_json(400, {'error': str(e)})
+            return
+        
+        profiler = getattr(self.server, 'profiler', None)
+        if profiler:
+            user_id, matches = profiler.profile_call(self._match, user)
+        else:
+            user_id, matches = self._match(user)
+        self._send_json(200, {
+            'user_id': user_id,
+            'matches': [{'cat': asdict(cat), 'score': asdict(score)} for cat, score, _ in matches],
+        })
+    
+    def _match(self, user: UserProfile) -> Tuple[str, List[tuple]]:
+        app = self.server.app
+        user_id = app.store.save_user(user)
+        matches = app.find_matches(user)
+        for cat, score, _ in matches[:5]:
+            app.store.save_match(user_id, cat, score)
+        return user_id, matches
+    
+    def _send_json(self, status: int, body: Dict):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+    
+    def log_message(self, format, *args):
+        pass
+
+def make_server(app: 'PurrfectMatchApp', host: str = "127.0.0.1", port: int = 8080,
+                profiler: Profiler = None) -> ThreadingHTTPServer:
+    """Create the matching service for an app (call serve_forever() to run it)"""
+    server = ThreadingHTTPServer((host, port), MatchRequestHandler)
+    server.daemon_threads = True
+    server.app = app
+    server.profiler = profiler
+    return server
 
 # =============================================================================
 # MAIN ENTRY POINT
 # =============================================================================
 
-if __name__ == "__main__":
-    app = PurrfectMatchApp()
+def build_arg_parser() -> argparse.ArgumentParser:
+    """Build the command-line interface"""
+    parser = argparse.ArgumentParser(description="PurrfectMatch - Cat Adoption Matching System")
+    parser.add_argument('--db', default="purrfect_match.db", help="SQLite database path")
+    parser.add_argument('--rules', help="Scoring rules file (JSON, or YAML with PyYAML installed)")
+    parser.add_argument('--stub-api', metavar='FIXTURES',
+                        help="Answer API requests from a JSON fixtures file instead of the network")
+    parser.add_argument('--record', metavar='CASSETTE',
+                        help="Record every API request and response to a gzip cassette file")
+    parser.add_argument('--replay', metavar='CASSETTE',
+                        help="Answer API requests from a recorded cassette instead of the network")
+    parser.add_argument('--replay-latency', type=float, default=0.0, metavar='SCALE',
+                        help="Delay replayed responses by their recorded time times SCALE (default: no delay)")
+    parser.add_argument('--profile', metavar='PREFIX',
+                        help="Profile the run, writing PREFIX.pstats, PREFIX.folded and PREFIX.memory.txt")
+    parser.add_argument('--profile-top', type=int, default=5, help="Functions listed per stage in the profile")
+    parser.add_argument('--write-behind', choices=list(DURABILITY_MODES), metavar='MODE',
+                        help="Save users and matches in the background (strict, batched or relaxed durability)")
+    parser.add_argument('--precomputed-max-age', type=float, default=3600.0, metavar='SECONDS',
+                        help="Answer quizzes from precomputed recommendations up to this old (0 disables)")
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    
+    interactive = commands.add_parser('interactive', help="Run the interactive quiz (default)")
+    interactive.add_argument('--include-archived', action='store_true',
+                             help="Include archived history in past matches")
+    interactive.add_argument('--extra-zips', default="",
+                             help="Comma-separated ZIP codes to search alongside the quiz ZIP")
+    interactive.add_argument('--radius', type=int, help="Search radius in miles around each ZIP")
+    interactive.add_argument('--search-budget', type=float, default=15.0,
+                             help="Seconds allowed for region searches")
+    interactive.add_argument('--deadline', type=float, default=30.0,
+                             help="Seconds a match search may spend on API calls")
+    interactive.add_argument('--progressive', action='store_true',
+                             help="Show provisional matches as each page of results arrives")
+    interactive.add_argument('--pages', type=int, default=5, help="Result pages to fetch in progressive mode")
+    
+    report = commands.add_parser('report', help="Show match analytics")
+    report.add_argument('--zip', dest='zip_code', help="Only include this ZIP code")
+    report.add_argument('--days', type=int, help="Only include the last N days")
+    report.add_argument('--json', action='store_true', help="Print the report as JSON")
+    
+    archive = commands.add_parser('archive', help="Move old matches into compressed archive files")
+    archive.add_argument('--older-than-days', type=int, default=365, help="Archive matches older than this")
+    archive.add_argument('--batch-size', type=int, default=1000, help="Rows deleted per transaction")
+    archive.add_argument('--archive-dir', help="Archive directory (default: next to the database)")
+    
+    batch = commands.add_parser('batch', help="Match every quiz in a JSON Lines file")
+    batch.add_argument('input', help="JSON Lines file of quiz answers")
+    batch.add_argument('output', help="JSON Lines file to write matches to")
+    batch.add_argument('--deadline', type=float, default=30.0,
+                       help="Seconds each match search may spend on API calls")
+    
+    serve = commands.add_parser('serve', help="Run the JSON matching service")
+    serve.add_argument('--host', default="127.0.0.1", help="Address to listen on")
+    serve.add_argument('--port', type=int, default=8080, help="Port to listen on")
+    serve.add_argument('--rules-poll', type=float, default=2.0,
+                       help="Seconds between checks of the --rules file for changes")
+    
+    commands.add_parser('rules', help="Print the active scoring rules as JSON")
+    
+    export = commands.add_parser('export', help="Stream users, matches or past matches to CSV or JSON Lines "
+                                                "(archived matches are not included)")
+    export.add_argument('view', choices=list(EXPORT_VIEWS), help="What to export")
+    export.add_argument('output', help="Output file (.csv or .jsonl; add .gz to compress)")
+    export.add_argument('--format', choices=['csv', 'jsonl'], help="Output format (default: from the file name)")
+    export.add_argument('--gzip', action='store_true', default=None, help="Compress even without a .gz name")
+    export.add_argument('--since', help="Only rows created on or after this date (YYYY-MM-DD)")
+    export.add_argument('--until', help="Only rows created on or before this date (YYYY-MM-DD)")
+    export.add_argument('--zip', dest='zip_code', help="Only rows for adopters in this ZIP code")
+    export.add_argument('--resume', action='store_true',
+                        help="Continue from the cursor saved by an earlier run into the same file")
+    export.add_argument('--chunk-size', type=int, default=5000, help="Rows read and written at a time")
+    
+    precompute = commands.add_parser('precompute',
+                                     help="Precompute recommendations for common adopter archetypes")
+    precompute.add_argument('--zips', default="",
+                            help="Comma-separated ZIP codes (default: ZIPs of recent adopters)")
+    precompute.add_argument('--days', type=int, default=30, help="Adopters from the last N days count as recent")
+    precompute.add_argument('--top', type=int, default=20, help="Cats stored per ZIP and archetype")
+    precompute.add_argument('--deadline', type=float, default=30.0,
+                            help="Seconds each ZIP's search may spend on API calls")
+    
+    return parser
+
+def main(argv: List[str] = None):
+    """Command-line entry point"""
+    args = build_arg_parser().parse_args(argv)
+    if args.stub_api:
+        set_http_transport(StubTransport.from_file(args.stub_api))
+    if args.replay:
+        set_http_transport(CassetteTransport.from_file(args.replay, args.replay_latency))
+    recorder = None
+    if args.record:
+        recorder = CassetteRecorder(args.record, http_transport)
+        set_http_transport(recorder)
+    
+    profiler = None
+    if args.profile:
+        profiler = Profiler(args.profile, top=args.profile_top)
+        profiler.start()
+    try:
+        run_command(args, profiler)
+    finally:
+        if profiler:
+            profiler.stop()
+        if recorder:
+            recorder.save()
+            print(f"Recorded {len(recorder.interactions)} API requests to {args.record}")
+
+def run_command(args: argparse.Namespace, profiler: Profiler = None):
+    """Run the parsed command"""
+    app = PurrfectMatchApp(args.db)
+    
+    if args.rules and args.command != 'serve':
+        try:
+            app.calculator.weights = load_scoring_rules(args.rules)
+        except (OSError, ValueError) as e:
+            print(f"ERROR: Cannot load scoring rules: {e}")
+            return
+    
+    if args.command == 'rules':
+        print(json.dumps(scoring_rules_to_dict(app.calculator.weights), indent=2))
+        return
+    
+    if args.command == 'archive':
+        if args.archive_dir:
+            app.db.archive_dir = args.archive_dir
+        count = app.db.archive_matches(older_than_days=args.older_than_days, batch_size=args.batch_size)
+        print(f"Archived {count} matches to {app.db.archive_dir}")
+        return
+    
+    if args.command == 'export':
+        try:
+            count = app.db.export(args.view, args.output, fmt=args.format, compress=args.gzip, since=args.since,
+                                  until=args.until, zip_code=args.zip_code, resume=args.resume,
+                                  chunk_size=args.chunk_size)
+        except (OSError, ValueError) as e:
+            print(f"ERROR: Export failed: {e}")
+            return
+        print(f"Exported {count} {args.view} rows to {args.output}")
+        return
+    
+    if args.command == 'report':
+        if args.json:
+            print(json.dumps(app.db.get_match_report(zip_code=args.zip_code, days=args.days), indent=2))
+        else:
+            app.display_report(zip_code=args.zip_code, days=args.days)
+        return
     
     # Load API keys from environment
     cat_api_key = os.getenv('CAT_API_KEY')
     petfinder_key = os.getenv('PETFINDER_API_KEY')
     petfinder_secret = os.getenv('PETFINDER_SECRET')
     
+    # Canned responses don't need real credentials
+    if args.stub_api or args.replay:
+        petfinder_key, petfinder_secret = petfinder_key or "stub", petfinder_secret or "stub"
+    
     # Set API keys if available
     if petfinder_key and petfinder_secret:
         print("Loading API keys from environment...")
@@ -812,4 +3915,47 @@ if __name__ == "__main__":
     else:
         print("WARNING: Petfinder API keys not found in environment")
     
-    app.run() 
\ No newline at end of file
+    app.include_archived = getattr(args, 'include_archived', False)
+    app.region_zips = [z.strip() for z in getattr(args, 'extra_zips', "").split(",") if z.strip()]
+    app.search_radius = getattr(args, 'radius', None)
+    app.search_budget = getattr(args, 'search_budget', 15.0)
+    app.request_deadline = getattr(args, 'deadline', 30.0)
+    app.progressive = getattr(args, 'progressive', False)
+    app.max_pages = getattr(args, 'pages', 5)
+    app.precompute_max_age = args.precomputed_max_age
+    if args.write_behind:
+        app.enable_write_behind(args.write_behind)
+    try:
+        if args.command == 'precompute':
+            zip_codes = [z.strip() for z in args.zips.split(",") if z.strip()] or \
+                app.db.get_active_zip_codes(args.days)
+            count = app.precompute_recommendations(zip_codes, args.top)
+            print(f"Precomputed recommendations for {count} of {len(zip_codes)} ZIP codes")
+            return
+        
+        if args.command == 'batch':
+            count = app.run_batch(args.input, args.output)
+            print(f"Matched {count} quizzes from {args.input} into {args.output}")
+            return
+        
+        if args.command == 'serve':
+            if args.rules:
+                RulesWatcher(args.rules, app.calculator, args.rules_poll).start()
+            server = make_server(app, args.host, args.port, profiler)
+            print(f"Serving PurrfectMatch on http://{args.host}:{args.port}")
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                server.server_close()
+            return
+        
+        app.run()
+    finally:
+        # Commit queued saves before the command returns
+        if app.writer:
+            app.writer.close()
+
+if __name__ == "__main__":
+    main()
@@ -11,8 +11,25 @@ from unittest.mock import Mock, patch
 from purrfect_match import (
     UserProfile, CatProfile, BreedInfo, CompatibilityScore,
     HomeType, ExperienceLevel,
-    TheCatAPIClient, PetfinderAPIClient, CompatibilityCalculator, Database
+    TheCatAPIClient, PetfinderAPIClient, CompatibilityCalculator, Database,
+    CatFeatureStore, TraitIndex, encode_traits, decode_traits,
+    set_json_backend, iter_petfinder_animals, extract_animal_fields,
+    ScoringWeights, MatchSession, AnimalCache, BreedIndex, normalize_breed_name,
+    save_breed_snapshot, load_breed_snapshot, PurrfectMatchApp,
+    Deadline, DeadlineExceeded, CircuitBreaker, CircuitOpenError,
+    parse_scoring_rules, load_scoring_rules, scoring_rules_to_dict, RulesWatcher, make_server,
+    StubTransport, set_http_transport, Profiler, BoundedCache, approximate_size, WriteBehindWriter,
+    CassetteRecorder, make_response, http_request, CassetteTransport, archetype_key
 )
+import requests
+import gzip
+import multiprocessing
+import sqlite3
+import threading
+import time
+from dataclasses import replace
+import json
+import purrfect_match
 
 class TestUserProfile:
     """Test UserProfile data model"""
@@ -129,6 +146,104 @@ class TestTheCatAPIClient:
         assert breed.name == 'Persian'
         assert breed.temperament == ['Affectionate', 'Loyal']
 
+class TestBreedIndex:
+    """Test resolving Petfinder breed names to TheCatAPI breeds"""
+    
+    def setup_method(self):
+        """Set up a small breed catalog"""
+        self.breeds = [
+            BreedInfo(name=name, temperament=[], origin="", description="", life_span="")
+            for name in ["Abyssinian", "American Shorthair", "Exotic Shorthair", "Siamese", "Sphynx"]
+        ]
+        self.index = BreedIndex(self.breeds)
+
+    def test_normalize_breed_name(self):
+        """Test breed name normalization"""
+        assert normalize_breed_name("Domestic Short Hair") == "domestic shorthair"
+        assert normalize_breed_name("Sphynx / Hairless Cat") == "sphynx hairless cat"
+
+    def test_resolve_names_and_aliases(self):
+        """Test exact, alias, token and fuzzy resolution"""
+        assert self.index.resolve("siamese").name == "Siamese"
+        assert self.index.resolve("Exotic Short Hair").name == "Exotic Shorthair"
+        assert self.index.resolve("Domestic Short Hair").name == "American Shorthair"
+        assert self.index.resolve("Sphynx / Hairless Cat").name == "Sphynx"
+        assert self.index.resolve("Siamese Mix").name == "Siamese"
+        assert self.index.resolve("Abysinian").name == "Abyssinian"
+
+    def test_misses_are_cached(self):
+        """Test unresolvable names are only resolved once"""
+        assert self.index.resolve("Tabby") is None
+        assert self.index.resolve("Zebra Cat") is None
+        with patch.object(self.index, '_resolve_uncached') as resolve:
+            assert self.index.resolve("Tabby") is None
+            assert self.index.resolve("Zebra Cat") is None
+            resolve.assert_not_called()
+        assert self.index.misses == 2
+
+    @patch('purrfect_match.requests.get')
+    def test_catalog_loaded_once(self, mock_get):
+        """Test breed lookups share one catalog fetch"""
+        mock_get.return_value.json.return_value = [{'name': 'Siamese'}, {'name': 'American Shorthair'}]
+        client = TheCatAPIClient()
+        assert client.get_breed_by_name('Siamese').name == 'Siamese'
+        assert client.get_breed_by_name('Domestic Short Hair').name == 'American Shorthair'
+        assert mock_get.call_count == 1
+
+class TestBreedSnapshot:
+    """Test the offline breed catalog snapshot"""
+    
+    def setup_method(self):
+        """Set up a snapshot path"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "breeds.json.gz")
+        self.breeds = [BreedInfo(name="Siberian", temperament=["Curious"], origin="Russia",
+                                 description="", life_span="12 - 15", hypoallergenic=1)]
+
+    def teardown_method(self):
+        """Remove the snapshot"""
+        self.temp_dir.cleanup()
+
+    def test_snapshot_round_trip(self):
+        """Test saving and loading a snapshot"""
+        save_breed_snapshot(self.path, self.breeds, fetched_at=1000.0)
+        assert load_breed_snapshot(self.path) == (self.breeds, 1000.0)
+
+    def test_unusable_snapshots_ignored(self):
+        """Test missing, corrupt and unknown-version snapshots are ignored"""
+        assert load_breed_snapshot(self.path) is None
+        with gzip.open(self.path, 'wt') as f:
+            json.dump({'format': 'purrfect-breeds', 'version': 99, 'breeds': []}, f)
+        assert load_breed_snapshot(self.path) is None
+        with open(self.path, 'wb') as f:
+            f.write(b"not gzip")
+        assert load_breed_snapshot(self.path) is None
+
+    @patch('purrfect_match.requests.get')
+    def test_fresh_snapshot_used_without_network(self, mock_get):
+        """Test a fresh snapshot serves lookups with no API calls"""
+        save_breed_snapshot(self.path, self.breeds)
+        client = TheCatAPIClient(snapshot_path=self.path)
+        
+        assert client.get_breed_by_name('Siberian').hypoallergenic == 1
+        mock_get.assert_not_called()
+
+    @patch('purrfect_match.requests.get')
+    def test_stale_snapshot_refreshed_in_background(self, mock_get):
+        """Test a stale snapshot is served while being refreshed"""
+        mock_get.return_value.json.return_value = [{'name': 'Siberian', 'hypoallergenic': 0},
+                                                   {'name': 'Bengal'}]
+        save_breed_snapshot(self.path, self.breeds, fetched_at=time.time() - 30 * 24 * 3600)
+        client = TheCatAPIClient(snapshot_path=self.path)
+        
+        assert client.get_breed_by_name('Siberian').hypoallergenic == 1
+        client._refresh_thread.join(timeout=5)
+        
+        assert client.get_breed_by_name('Bengal') is not None
+        breeds, fetched_at = load_breed_snapshot(self.path)
+        assert [breed.name for breed in breeds] == ['Siberian', 'Bengal']
+        assert not client.snapshot_stale
+
 class TestPetfinderAPIClient:
     """Test Petfinder API client"""
     
@@ -161,7 +276,7 @@ class TestPetfinderAPIClient:
         mock_post.return_value.raise_for_status.return_value = None
         
         # Mock cat search
-        mock_get.return_value.json.return_value = {
+        mock_get.return_value = make_response("https://api.petfinder.com/v2/animals", 200, {
             'animals': [
                 {
                     'id': 12345,
@@ -177,8 +292,7 @@ class TestPetfinderAPIClient:
                     'distance': 2.5
                 }
             ]
-        }
-        mock_get.return_value.raise_for_status.return_value = None
+        })
         
         client = PetfinderAPIClient('test_key', 'test_secret')
         cats = client.search_cats('12345')
@@ -191,6 +305,279 @@ class TestPetfinderAPIClient:
         assert 'calm' in cat.personality_traits  # Should be derived from description
         assert 'playful' in cat.personality_traits
 
+class TestPetfinderJSONDecoding:
+    """Test the Petfinder response decoding fast path"""
+    
+    def setup_method(self):
+        """Set up a raw search response body"""
+        self.animals = [
+            {'id': 1, 'name': 'Mochi', 'breeds': {'primary': 'Siamese', 'secondary': None},
+             'photos': [], 'contact': {'email': '', 'phone': '555-0001'}, 'distance': 1.5,
+             'description': 'Calm and gentle'},
+            {'id': 2, 'name': 'Tiger', 'breeds': {'primary': 'Tabby', 'secondary': 'Bengal'},
+             'photos': [{'large': 'http://example.com/tiger.jpg', 'small': 'x'}],
+             'contact': {'email': 'a@example.com'}, 'description': 'Loves "toys", ]{'},
+            {'id': 1, 'name': 'Mochi', 'photos': [{'large': 'http://example.com/mochi.jpg'}],
+             'contact': {'email': 'mochi@example.com', 'phone': ''}},
+        ]
+        self.payload = json.dumps({
+            'pagination': {'total_count': 3}, 'animals': self.animals
+        }, indent=1).encode('utf-8')
+        self.original_backend = purrfect_match.json_backend
+
+    def teardown_method(self):
+        """Restore the JSON backend"""
+        set_json_backend(self.original_backend)
+
+    def test_unknown_backend_rejected(self):
+        """Test selecting a backend that is not installed"""
+        with pytest.raises(ValueError):
+            set_json_backend('no-such-parser')
+
+    def test_iter_animals_with_stdlib_backend(self):
+        """Test the stdlib backend yields the same records"""
+        set_json_backend('json')
+        assert list(iter_petfinder_animals(self.payload)) == self.animals
+
+    def test_extract_animal_fields(self):
+        """Test extracting CatProfile fields from an animal record"""
+        fields = extract_animal_fields(self.animals[1])
+        assert fields['petfinder_id'] == '2'
+        assert fields['breeds'] == ['Tabby', 'Bengal']
+        assert fields['photos'] == ['http://example.com/tiger.jpg']
+        assert fields['contact_email'] == 'a@example.com'
+        assert fields['shelter_name'] == 'Unknown Shelter'
+        assert CatProfile(**fields).name == 'Tiger'
+
+    @patch('purrfect_match.requests.get')
+    @patch('purrfect_match.requests.post')
+    def test_search_cats_from_raw_bytes(self, mock_post, mock_get):
+        """Test search_cats decodes raw response bytes and merges duplicates"""
+        mock_post.return_value.json.return_value = {'access_token': 'token', 'expires_in': 3600}
+        mock_get.return_value.content = self.payload
+        
+        client = PetfinderAPIClient('test_key', 'test_secret')
+        cats = client.search_cats('12345')
+        
+        assert [cat.petfinder_id for cat in cats] == ['1', '2']
+        assert cats[0].photos == ['http://example.com/mochi.jpg']
+        assert cats[0].contact_email == 'mochi@example.com'
+        assert cats[0].contact_phone == '555-0001'
+
+class TestAnimalCache:
+    """Test the cross-search animal enhancement cache"""
+    
+    def make_cat(self, cat_id="1", description="Calm and independent", photos=None, email=""):
+        return CatProfile(
+            petfinder_id=cat_id, name="Mochi", age="Adult", breeds=["Siamese"], size="Small",
+            gender="Female", description=description, photos=photos or [],
+            contact_email=email, contact_phone="", shelter_name=""
+        )
+
+    def test_restore_reuses_derived_attributes(self):
+        """Test unchanged animals reuse derived traits and merge contact info"""
+        cache = AnimalCache()
+        cat = self.make_cat(photos=["http://example.com/mochi.jpg"], email="a@example.com")
+        PetfinderAPIClient("key", "secret")._enhance_cat_profile(cat)
+        cache.store(cat)
+        
+        again = self.make_cat()
+        assert cache.restore(again)
+        assert again.personality_traits == cat.personality_traits
+        assert again.independence == cat.independence
+        assert again.temperament == cat.temperament
+        assert again.photos == ["http://example.com/mochi.jpg"]
+        assert again.contact_email == "a@example.com"
+
+    def test_changed_description_is_a_miss(self):
+        """Test edited listings are derived again"""
+        cache = AnimalCache()
+        cache.store(self.make_cat())
+        assert not cache.restore(self.make_cat(description="Very active and energetic"))
+        assert cache.stats()['stale'] == 1
+
+    def test_bounded_size_and_eviction_stats(self):
+        """Test the least recently used animals are evicted"""
+        cache = AnimalCache(max_size=2)
+        for cat_id in ("1", "2"):
+            cache.store(self.make_cat(cat_id))
+        assert cache.restore(self.make_cat("1"))
+        cache.store(self.make_cat("3"))
+        
+        assert len(cache) == 2
+        assert not cache.restore(self.make_cat("2"))
+        stats = cache.stats()
+        assert stats['evictions'] == 1
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+
+    @patch('purrfect_match.requests.get')
+    @patch('purrfect_match.requests.post')
+    def test_search_skips_enhancement_for_cached_animals(self, mock_post, mock_get):
+        """Test repeated searches only enhance each listing once"""
+        mock_post.return_value.json.return_value = {'access_token': 'token', 'expires_in': 3600}
+        mock_get.return_value = make_response("https://api.petfinder.com/v2/animals", 200, {
+            'animals': [{'id': 7, 'name': 'Mochi', 'description': 'Calm cat', 'photos': [], 'contact': {}}]
+        })
+        # Without the search cache, so the second search reaches the animal cache
+        client = PetfinderAPIClient('test_key', 'test_secret', search_ttl=0)
+        
+        with patch.object(client, '_enhance_cat_profile', wraps=client._enhance_cat_profile) as enhance:
+            first = client.search_cats('12345')
+            second = client.search_cats('12345')
+        
+        assert mock_get.call_count == 2
+        assert enhance.call_count == 1
+        assert client.animal_cache.stats()['hits'] == 1
+        assert second[0].personality_traits == first[0].personality_traits == ['calm']
+
+class TestBoundedCache:
+    """Test the shared memory-bounded cache"""
+
+    def test_lru_eviction_by_entries_and_bytes(self):
+        """Test entries are evicted least recently used first to stay within both budgets"""
+        # Keys are charged too, so three 100-byte values don't fit in 350 bytes
+        cache = BoundedCache("test", max_entries=3, max_bytes=350, sizeof=lambda value: 100)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        assert cache.get("a") == 1
+        cache.put("c", 3)
+        assert "b" not in cache and "a" in cache and "c" in cache
+        assert cache.bytes <= 350
+        
+        cache.max_bytes = None
+        for key in "defg":
+            cache.put(key, 0)
+        assert len(cache) == 3
+        assert cache.stats()['evictions'] == 4
+        assert not BoundedCache("test", max_bytes=10).put("big", "x" * 100)
+
+    def test_ttl_expiry(self):
+        """Test expired entries are misses and per-entry TTLs override the default"""
+        cache = BoundedCache("test", ttl=10)
+        with patch('purrfect_match.time.monotonic', return_value=100.0):
+            cache.put("short", 1)
+            cache.put("long", 2, ttl=60)
+        with patch('purrfect_match.time.monotonic', return_value=120.0):
+            assert cache.get("short") is None
+            assert cache.get("long") == 2
+        
+        stats = cache.stats()
+        assert (stats['hits'], stats['misses'], stats['expirations']) == (1, 1, 1)
+
+    def test_size_accounting(self):
+        """Test approximate sizes follow references and count shared objects once"""
+        cat = CatProfile(petfinder_id="1", name="Mochi", age="Adult", breeds=["Siamese"], size="Small",
+                         gender="Female", description="x" * 1000, photos=[], contact_email="",
+                         contact_phone="", shelter_name="")
+        assert approximate_size(cat) > 1000
+        assert approximate_size([cat, cat]) < 2 * approximate_size(cat)
+        
+        cache = BoundedCache("test")
+        cache.put("cat", cat)
+        assert cache.bytes >= approximate_size(cat)
+        cache.clear()
+        assert cache.bytes == 0 and len(cache) == 0
+
+    @patch('purrfect_match.requests.get')
+    @patch('purrfect_match.requests.post')
+    def test_search_results_are_cached(self, mock_post, mock_get):
+        """Test repeated searches for the same area share one API call"""
+        mock_post.return_value.json.return_value = {'access_token': 'token', 'expires_in': 3600}
+        mock_get.return_value = make_response("https://api.petfinder.com/v2/animals", 200, {
+            'animals': [{'id': 7, 'name': 'Mochi', 'description': 'Calm cat', 'photos': [], 'contact': {}}]
+        })
+        client = PetfinderAPIClient('test_key', 'test_secret')
+        first = client.search_cats('12345')
+        first[0].name = "Changed"
+        second = client.search_cats('12345')
+        
+        assert mock_get.call_count == 1
+        assert second[0].name == "Mochi"
+        assert client.search_cache.stats()['hits'] == 1
+        
+        client.search_cats('12345', page=2)
+        assert mock_get.call_count == 2
+
+class TestResilience:
+    """Test deadlines, timeouts and circuit breakers"""
+    
+    def test_deadline_bounds_request_timeouts(self):
+        """Test request timeouts never exceed the remaining deadline"""
+        assert Deadline(60).timeout(cap=5) == 5
+        assert Deadline(1).timeout(cap=5) <= 1
+        with pytest.raises(DeadlineExceeded):
+            Deadline(-1).timeout()
+
+    def test_circuit_breaker_opens_and_recovers(self):
+        """Test the breaker fails fast once open and closes after a good probe"""
+        breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=0.05)
+        breaker.record_failure()
+        breaker.before_call()
+        breaker.record_failure()
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        
+        time.sleep(0.06)
+        breaker.before_call()  # Probe allowed
+        assert breaker.state == "half_open"
+        breaker.record_success()
+        assert breaker.state == "closed"
+
+    @patch('purrfect_match.requests.get')
+    def test_half_open_probe_survives_expired_deadline_and_odd_errors(self, mock_get):
+        """Test a half-open breaker is not left waiting on a probe that never reports back"""
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.01)
+        breaker.record_failure()
+        time.sleep(0.02)
+        
+        # The deadline runs out before the probe would be sent: the breaker is untouched
+        with pytest.raises(DeadlineExceeded):
+            http_request('GET', "https://api.example/x", breaker, Deadline(-1))
+        assert breaker.state == "open"
+        
+        # Errors other than connection failures still settle the probe
+        mock_get.side_effect = requests.TooManyRedirects("loop")
+        with pytest.raises(requests.TooManyRedirects):
+            http_request('GET', "https://api.example/x", breaker, Deadline(5))
+        assert breaker.state == "open"
+        
+        time.sleep(0.02)
+        mock_get.side_effect = None
+        mock_get.return_value = make_response("https://api.example/x", 200, {})
+        http_request('GET', "https://api.example/x", breaker, Deadline(5))
+        assert breaker.state == "closed"
+
+    @patch('purrfect_match.requests.get')
+    @patch('purrfect_match.requests.post')
+    def test_requests_carry_timeouts(self, mock_post, mock_get):
+        """Test every API request is sent with a timeout"""
+        mock_post.return_value.json.return_value = {'access_token': 'token', 'expires_in': 3600}
+        mock_get.return_value = make_response("https://api.petfinder.com/v2/animals", 200, {'animals': []})
+        
+        PetfinderAPIClient('key', 'secret').search_cats('12345', deadline=Deadline(3))
+        assert 0 < mock_post.call_args.kwargs['timeout'] <= 3
+        assert 0 < mock_get.call_args.kwargs['timeout'] <= 3
+
+    @patch('purrfect_match.requests.get')
+    def test_failing_breed_api_degrades_gracefully(self, mock_get):
+        """Test matching scores without breed info when TheCatAPI is down"""
+        mock_get.side_effect = requests.ConnectionError("down")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            app = PurrfectMatchApp(os.path.join(temp_dir, "test.db"))
+            app.petfinder_api = Mock()
+            app.petfinder_api.search_cats.return_value = [
+                CatProfile(petfinder_id=str(i), name=f"Cat {i}", age="Adult", breeds=[f"Breed {i}"],
+                           size="Medium", gender="Female", description="", photos=[], contact_email="",
+                           contact_phone="", shelter_name="")
+                for i in range(10)
+            ]
+            matches = app.find_matches(UserProfile(zip_code="12345"))
+        
+        assert len(matches) == 10
+        assert all(breed_info is None for _, _, breed_info in matches)
+        assert mock_get.call_count == app.cat_api.breaker.failure_threshold
+
 class TestCompatibilityCalculator:
     """Test compatibility scoring algorithm"""
     
@@ -282,6 +669,37 @@ class TestCompatibilityCalculator:
         score = self.calculator._calculate_experience_score(self.user, self.poor_cat)
         assert score <= 10, f"First-time + challenging cat should get ≤10 points, got {score}"
 
+    def test_lookup_tables_match_rules(self):
+        """Test the compiled lifestyle table agrees with the rules everywhere"""
+        for home_type in HomeType:
+            for hours_away in (3, 6, 10):
+                for activity in range(1, 11):
+                    user = UserProfile(home_type=home_type, hours_away=hours_away, activity_level=activity)
+                    for energy in range(1, 11):
+                        for independence in range(1, 11):
+                            self.perfect_cat.energy_level = energy
+                            self.perfect_cat.independence = independence
+                            expected = self.calculator._compute_lifestyle_score(
+                                home_type, hours_away, activity, energy, independence)
+                            assert self.calculator._calculate_lifestyle_score(user, self.perfect_cat) == expected
+
+    def test_out_of_range_levels_fall_back_to_rules(self):
+        """Test values outside the tabulated scales are still scored"""
+        user = UserProfile(activity_level=15)
+        score = self.calculator._calculate_lifestyle_score(user, self.poor_cat)
+        assert score == self.calculator._compute_lifestyle_score(HomeType.APARTMENT, 8, 15, 9, 3)
+
+    def test_tables_rebuilt_when_weights_change(self):
+        """Test changing weights recompiles the lookup tables"""
+        house_user = UserProfile(home_type=HomeType.HOUSE_WITH_YARD, hours_away=3, activity_level=5)
+        assert self.calculator._calculate_lifestyle_score(house_user, self.perfect_cat) == 39
+        
+        self.calculator.weights = replace(self.calculator.weights, house=4)
+        assert self.calculator._calculate_lifestyle_score(house_user, self.perfect_cat) == 33
+        
+        self.calculator.weights = replace(self.calculator.weights, experience_points=((5, 5, 5),) * 3)
+        assert self.calculator._calculate_experience_score(self.user, self.perfect_cat) == 5
+
     def test_personality_score_with_trait_matching(self):
         """Test personality scoring with trait matching"""
         # User wants calm & independent, cat has calm & independent
@@ -321,6 +739,187 @@ class TestCompatibilityCalculator:
         assert 0 <= score.experience_score <= 30
         assert 0 <= score.personality_score <= 30
 
+class TestMatchSession:
+    """Test incremental re-ranking in match sessions"""
+    
+    def setup_method(self):
+        """Set up a session over a small inventory"""
+        self.calculator = CompatibilityCalculator()
+        self.user = UserProfile(activity_level=3, desired_traits=["calm"], zip_code="12345")
+        self.cats = [
+            CatProfile(
+                petfinder_id=f"cat_{energy}", name=f"Cat {energy}", age="Adult", breeds=[],
+                size="Medium", gender="Female", description="", photos=[],
+                contact_email="", contact_phone="", shelter_name="",
+                energy_level=energy, independence=6,
+                personality_traits=["calm"] if energy < 5 else ["playful"],
+                temperament="easy" if energy < 5 else "challenging"
+            )
+            for energy in (2, 4, 6, 9)
+        ]
+        self.session = MatchSession(self.user, self.cats, [None] * len(self.cats), self.calculator)
+
+    def assert_matches_full_scoring(self, matches):
+        for cat, score, _ in matches:
+            expected = self.calculator.calculate_compatibility(self.user, cat)
+            assert score == expected
+
+    def test_initial_ranking(self):
+        """Test the session ranks candidates like full scoring"""
+        matches = self.session.ranked()
+        assert len(matches) == 4
+        assert matches[0][0].petfinder_id in ("cat_2", "cat_4")
+        self.assert_matches_full_scoring(matches)
+
+    def test_update_rescores_only_affected_component(self):
+        """Test changing activity only re-scores lifestyle"""
+        with patch.object(self.calculator, 'personality_scores') as personality, \
+                patch.object(self.calculator, 'experience_scores') as experience:
+            top = self.session.update(k=2, activity_level=9, home_type=HomeType.FARM_RURAL)
+            personality.assert_not_called()
+            experience.assert_not_called()
+        
+        assert len(top) == 2
+        assert self.user.activity_level == 9
+        self.assert_matches_full_scoring(self.session.ranked())
+
+    def test_update_desired_traits(self):
+        """Test changing desired traits re-ranks the candidates"""
+        self.session.update(desired_traits=["playful"], experience=ExperienceLevel.VERY_EXPERIENCED)
+        self.assert_matches_full_scoring(self.session.ranked())
+
+    def test_required_traits_prune_candidates(self):
+        """Test only cats with every required trait are ranked"""
+        matches = self.session.ranked(required_traits=["playful"])
+        assert [cat.petfinder_id for cat, _, _ in matches] == ["cat_6", "cat_9"]
+        assert self.session.top(k=5, required_traits=["playful", "calm"]) == []
+
+    def test_update_rejects_search_fields(self):
+        """Test fields that need a new search cannot be updated"""
+        with pytest.raises(ValueError):
+            self.session.update(zip_code="54321")
+
+class TestScoringRules:
+    """Test declarative scoring rules files"""
+    
+    def setup_method(self):
+        """Set up a temporary rules file"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.rules_path = os.path.join(self.temp_dir.name, "rules.json")
+        self.user = UserProfile(allergies=True, desired_traits=["calm", "playful"])
+        self.cat = CatProfile(petfinder_id="1", name="Mochi", age="Adult", breeds=[], size="Small",
+                              gender="Female", description="", photos=[], contact_email="",
+                              contact_phone="", shelter_name="", personality_traits=["calm", "playful"])
+        self.breed = BreedInfo(name="Siamese", temperament=[], origin="", description="", life_span="")
+
+    def teardown_method(self):
+        """Remove the temporary rules file"""
+        self.temp_dir.cleanup()
+
+    def write_rules(self, rules):
+        with open(self.rules_path, 'w') as f:
+            json.dump(rules, f)
+
+    def test_default_rules_round_trip(self):
+        """Test the defaults survive conversion to the rules format and back"""
+        rules = json.loads(json.dumps(scoring_rules_to_dict(ScoringWeights())))
+        assert parse_scoring_rules(rules) == ScoringWeights()
+        assert parse_scoring_rules({}) == ScoringWeights()
+
+    def test_loaded_rules_change_scores_and_reasons(self):
+        """Test a partial rules file overrides only what it names"""
+        self.write_rules({
+            'version': 1,
+            'personality': {'allergy_penalty': 0},
+            'reasons': {'personality': [[20, "Purrfect personality"], [0, "Different personality"]]},
+        })
+        calculator = CompatibilityCalculator(load_scoring_rules(self.rules_path))
+        
+        score = calculator.calculate_compatibility(self.user, self.cat, self.breed)
+        assert score.personality_score == 25
+        assert score.reasons[2] == "Purrfect personality"
+        assert calculator.weights.experience_points == ScoringWeights().experience_points
+
+    def test_invalid_rules_rejected(self):
+        """Test validation catches unknown fields, bad values and unordered tiers"""
+        for rules in ({'personality': {'bonus': 5}},
+                      {'lifestyle': {'house': -1}},
+                      {'experience': {'first_time': {'easy': 30}}},
+                      {'reasons': {'lifestyle': [[0, "low"], [25, "high"]]}},
+                      {'version': 2}):
+            with pytest.raises(ValueError):
+                parse_scoring_rules(rules)
+
+    def test_watcher_hot_swaps_rules(self):
+        """Test edited rules are applied and invalid edits keep the previous rules"""
+        calculator = CompatibilityCalculator()
+        watcher = RulesWatcher(self.rules_path, calculator)
+        self.write_rules({'personality': {'personality_base': 5}})
+        assert watcher.check()
+        assert calculator.calculate_compatibility(self.user, self.cat).personality_score == 15
+        
+        self.write_rules({'personality': {'personality_base': "high"}})
+        os.utime(self.rules_path, ns=(0, 1))
+        assert not watcher.check()
+        assert calculator.weights.personality_base == 5
+
+    def test_hot_swap_is_atomic_for_concurrent_scoring(self):
+        """Test scores computed during rule swaps come entirely from one rule set"""
+        swapped = parse_scoring_rules({
+            'lifestyle': {'house': 0, 'short_absence_hours': 8},
+            'personality': {'personality_base': 0},
+            'reasons': {component: [[0, f"swapped {component}"]] for component in ('lifestyle', 'experience', 'personality')},
+        })
+        user = UserProfile(home_type=HomeType.HOUSE_WITH_YARD, hours_away=6, desired_traits=["calm"])
+        expected = {
+            repr(CompatibilityCalculator(weights).calculate_compatibility(user, self.cat))
+            for weights in (ScoringWeights(), swapped)
+        }
+        calculator = CompatibilityCalculator()
+        stop = threading.Event()
+        
+        def swap():
+            while not stop.is_set():
+                for weights in (swapped, ScoringWeights()):
+                    calculator.weights = weights
+        
+        swapper = threading.Thread(target=swap)
+        swapper.start()
+        try:
+            seen = {repr(calculator.calculate_compatibility(user, self.cat)) for _ in range(3000)}
+            sessions = [MatchSession(user, [self.cat], [None], calculator).ranked()[0][1] for _ in range(300)]
+        finally:
+            stop.set()
+            swapper.join(timeout=10)
+        
+        assert seen <= expected
+        assert {repr(score) for score in sessions} <= expected
+
+    def test_service_scores_posted_quiz(self):
+        """Test the JSON service matches a posted quiz and saves the adopter"""
+        app = PurrfectMatchApp(os.path.join(self.temp_dir.name, "test.db"))
+        app.cat_api = Mock()
+        app.cat_api.get_breed_by_name.return_value = None
+        app.petfinder_api = Mock()
+        app.petfinder_api.search_cats.return_value = [self.cat]
+        server = make_server(app, port=0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/match"
+            response = requests.post(url, json={'home_type': 'house_with_yard', 'zip_code': '12345'})
+            assert response.status_code == 200
+            assert response.json()['matches'][0]['cat']['name'] == "Mochi"
+            assert requests.post(url, json={'home_type': 'castle'}).status_code == 400
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert len(app.db.get_past_matches()) == 1
+
+def ingest_users(db_path: str):
+    """Bulk-save 500 profiles (module level so spawned processes can run it)"""
+    Database(db_path).save_users([UserProfile(zip_code="12345") for _ in range(500)], batch_size=200)
+
 class TestDatabase:
     """Test database operations"""
     
@@ -352,9 +951,34 @@ class TestDatabase:
         user_id = self.db.save_user(self.test_user)
         
         assert user_id is not None
-        assert user_id.startswith("user_12345_")
+        assert user_id.startswith("user_") and len(user_id) == len("user_") + 26
         assert self.test_user.user_id == user_id
 
+    def test_user_ids_are_unique_and_time_ordered(self):
+        """Test adopters saved in the same second get distinct IDs that sort by creation, whatever their ZIP"""
+        user_ids = [self.db.save_user(UserProfile(zip_code=["99999", "12345", "00501"][i % 3])) for i in range(50)]
+        
+        assert len(set(user_ids)) == 50
+        assert user_ids == sorted(user_ids)
+        with sqlite3.connect(self.temp_db.name) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 50
+
+    def test_save_users_from_many_threads_and_processes(self):
+        """Test concurrent bulk ingestion keeps every profile"""
+        # Spawned (not forked) processes can't inherit locks held by the threads
+        threads = [threading.Thread(target=ingest_users, args=(self.temp_db.name,)) for _ in range(4)]
+        processes = [multiprocessing.get_context('spawn').Process(target=ingest_users, args=(self.temp_db.name,))
+                     for _ in range(2)]
+        for worker in threads + processes:
+            worker.start()
+        for worker in threads + processes:
+            worker.join(timeout=60)
+        
+        assert not any(worker.is_alive() for worker in threads + processes)
+        assert all(process.exitcode == 0 for process in processes)
+        with sqlite3.connect(self.temp_db.name) as conn:
+            assert conn.execute("SELECT COUNT(DISTINCT user_id) FROM users").fetchone()[0] == 3000
+
     def test_save_match(self):
         """Test saving match result"""
         user_id = self.db.save_user(self.test_user)
@@ -385,6 +1009,853 @@ class TestDatabase:
         # Should not raise any exceptions
         self.db.save_match(user_id, cat, score)
 
+    def save_scored_matches(self, user, scores_and_breeds):
+        user_id = self.db.save_user(user)
+        for i, (total, breed) in enumerate(scores_and_breeds):
+            cat = CatProfile(
+                petfinder_id=f"cat_{i}", name=f"Cat {i}", age="Adult", breeds=[breed] if breed else [],
+                size="Medium", gender="Female", description="", photos=[],
+                contact_email="", contact_phone="", shelter_name=""
+            )
+            score = CompatibilityScore(cat_id=cat.petfinder_id, total_score=total, lifestyle_score=0,
+                                       experience_score=0, personality_score=0, reasons=[])
+            self.db.save_match(user_id, cat, score)
+
+    def test_match_report_from_rollups(self):
+        """Test match analytics are maintained on each save_match"""
+        self.save_scored_matches(self.test_user, [(85, "Siamese"), (62, "Siamese"), (100, None)])
+        self.save_scored_matches(UserProfile(zip_code="54321"), [(40, "Persian")])
+        
+        report = self.db.get_match_report()
+        assert report['match_count'] == 4
+        assert report['min_score'] == 40
+        assert report['max_score'] == 100
+        assert report['average_score'] == 71.8
+        assert report['score_distribution']['80-89'] == 1
+        assert report['score_distribution']['90-100'] == 1
+        assert report['top_breeds'][0] == {'breed': 'Siamese', 'match_count': 2}
+        
+        zip_report = self.db.get_match_report(zip_code="12345", days=1)
+        assert zip_report['match_count'] == 3
+        assert [row['zip_code'] for row in zip_report['daily']] == ["12345"]
+        assert {row['breed'] for row in zip_report['top_breeds']} == {"Siamese", "Unknown"}
+
+    def test_rollups_backfilled_for_existing_history(self):
+        """Test rollups are rebuilt from history when first created"""
+        self.save_scored_matches(self.test_user, [(85, "Siamese"), (62, "Bengal")])
+        expected = self.db.get_match_report()
+        
+        with sqlite3.connect(self.temp_db.name) as conn:
+            for table in ('match_rollup_daily', 'match_rollup_scores', 'match_rollup_breeds'):
+                conn.execute(f"DROP TABLE {table}")
+        
+        assert Database(self.temp_db.name).get_match_report() == expected
+
+    def test_archive_matches(self):
+        """Test old matches move to archive files and stay queryable"""
+        with tempfile.TemporaryDirectory() as archive_dir:
+            self.db.archive_dir = archive_dir
+            self.save_scored_matches(self.test_user, [(85, "Siamese"), (62, "Bengal"), (70, "Persian")])
+        
+            with sqlite3.connect(self.temp_db.name) as conn:
+                conn.execute("UPDATE matches SET created_at = '2020-01-15 10:00:00' WHERE cat_name != 'Cat 2'")
+        
+            assert self.db.archive_matches(older_than_days=30, batch_size=1) == 2
+            assert os.listdir(self.db.archive_dir) == ["matches-2020-01.jsonl.gz"]
+        
+            live = self.db.get_past_matches()
+            assert [match[5] for match in live] == ["Cat 2"]
+        
+            history = self.db.get_past_matches(include_archived=True)
+            assert [match[5] for match in history] == ["Cat 2", "Cat 0", "Cat 1"]
+            assert history[1][:2] == (self.test_user.user_id, "12345")
+        
+            # Reports still cover archived history
+            assert self.db.get_match_report()['match_count'] == 3
+
+    def test_archive_lets_other_threads_save_between_batches(self):
+        """Test archival doesn't hold the writer while reading and compressing, and failures don't wedge it"""
+        with tempfile.TemporaryDirectory() as archive_dir:
+            self.db.archive_dir = archive_dir
+            self.save_scored_matches(self.test_user, [(85, "Siamese"), (62, "Bengal")])
+            with sqlite3.connect(self.temp_db.name) as conn:
+                conn.execute("UPDATE matches SET created_at = '2020-01-15 10:00:00'")
+            
+            saved = []
+            fsync = os.fsync
+            
+            def fsync_then_save(fd):
+                fsync(fd)
+                saver = threading.Thread(target=lambda: saved.append(self.db.save_user(UserProfile(zip_code="1"))))
+                saver.start()
+                saver.join(timeout=5)
+            
+            with patch('purrfect_match.os.fsync', side_effect=fsync_then_save):
+                assert self.db.archive_matches(older_than_days=30, batch_size=1) == 2
+            assert len(saved) == 2
+        
+        with pytest.raises(sqlite3.OperationalError):
+            with self.db.pool.transaction() as conn:
+                conn.execute("DELETE FROM no_such_table")
+        self.db.save_user(UserProfile(zip_code="2"))
+
+    def test_new_database_uses_incremental_vacuum(self):
+        """Test new databases can reclaim archived space incrementally"""
+        with sqlite3.connect(self.temp_db.name) as conn:
+            assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+    def test_report_command(self, capsys):
+        """Test the report CLI command prints JSON"""
+        self.save_scored_matches(self.test_user, [(85, "Siamese")])
+        purrfect_match.main(['--db', self.temp_db.name, 'report', '--json'])
+        report = json.loads(capsys.readouterr().out)
+        assert report['match_count'] == 1
+
+class TestConnectionPool:
+    """Test pooled SQLite access from many threads"""
+    
+    def setup_method(self):
+        """Set up a temporary database"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.temp_dir.name, "test.db"), readers=2)
+
+    def teardown_method(self):
+        """Close the pool and remove the temporary database"""
+        self.db.close()
+        self.temp_dir.cleanup()
+
+    def test_wal_and_read_only_readers(self):
+        """Test the database runs in WAL mode and readers can't write"""
+        with self.db.pool.reader() as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            with pytest.raises(sqlite3.OperationalError):
+                conn.execute("DELETE FROM users")
+
+    def test_readers_work_during_a_write_transaction(self):
+        """Test readers see committed data without waiting for an open write transaction"""
+        self.db.save_user(UserProfile(zip_code="12345"))
+        with self.db.pool.transaction() as conn:
+            conn.execute("DELETE FROM users")
+            started = time.monotonic()
+            assert self.db.get_last_zip_code() == "12345"
+            assert time.monotonic() - started < 1
+        assert self.db.get_last_zip_code() is None
+
+    def test_concurrent_saves_and_reads(self):
+        """Test many threads writing and reading never hit a locked database"""
+        errors = []
+        
+        def work():
+            try:
+                for _ in range(25):
+                    self.db.save_user(UserProfile(zip_code="12345"))
+                    self.db.get_past_matches()
+            except sqlite3.Error as e:
+                errors.append(e)
+        
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=60)
+        
+        assert errors == []
+        assert self.db.pool._reader_count <= 2
+        with self.db.pool.reader() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 200
+
+class TestWriteBehind:
+    """Test background batched saving of users and matches"""
+    
+    def setup_method(self):
+        """Set up a temporary database and a scored match"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, "test.db")
+        self.db = Database(self.db_path)
+        self.cat = CatProfile(petfinder_id="1", name="Mochi", age="Adult", breeds=["Siamese"], size="Small",
+                              gender="Female", description="", photos=[], contact_email="",
+                              contact_phone="", shelter_name="")
+        self.score = CompatibilityScore(cat_id="1", total_score=80, lifestyle_score=30,
+                                        experience_score=25, personality_score=25, reasons=[])
+
+    def teardown_method(self):
+        """Remove the temporary database"""
+        self.temp_dir.cleanup()
+
+    def count(self, table):
+        with sqlite3.connect(self.db_path) as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def test_saves_are_batched_and_flushed(self):
+        """Test queued saves commit in few transactions and are visible after flush"""
+        writer = WriteBehindWriter(self.db, batch_wait=0.2)
+        for _ in range(20):
+            user_id = writer.save_user(UserProfile(zip_code="12345"))
+            writer.save_match(user_id, self.cat, self.score)
+        writer.flush()
+        
+        assert self.count("users") == 20 and self.count("matches") == 20
+        assert writer.stats()['batches'] < 40
+        assert self.db.get_match_report(zip_code="12345")['match_count'] == 20
+        writer.close()
+
+    def test_strict_mode_waits_for_commit(self):
+        """Test strict durability returns only once the write is committed"""
+        writer = WriteBehindWriter(self.db, durability='strict')
+        writer.save_user(UserProfile(zip_code="12345"))
+        assert self.count("users") == 1
+        writer.close()
+        
+        with pytest.raises(ValueError):
+            WriteBehindWriter(self.db, durability='eventually')
+
+    def test_backpressure_and_close_flushes(self):
+        """Test producers block while the queue is full and close() commits the rest"""
+        writer = WriteBehindWriter(self.db, max_queue=1, batch_size=1, batch_wait=0)
+        blocker = sqlite3.connect(self.db_path)
+        blocker.execute("BEGIN IMMEDIATE")  # Holds the write lock, stalling the writer
+        
+        producer = threading.Thread(target=lambda: [writer.save_user(UserProfile(zip_code="12345"))
+                                                    for _ in range(5)])
+        producer.start()
+        producer.join(timeout=0.3)
+        assert producer.is_alive()
+        
+        blocker.rollback()
+        blocker.close()
+        producer.join(timeout=10)
+        writer.close()
+        assert self.count("users") == 5
+
+    def test_poisoned_write_only_fails_itself(self):
+        """Test a bad write in a batch doesn't lose the good ones or stall flush() and strict saves"""
+        writer = WriteBehindWriter(self.db, batch_wait=0.2)
+        user_id = writer.save_user(UserProfile(zip_code="12345"))
+        writer.save_match(user_id, self.cat, replace(self.score, total_score=None))  # Rollups can't add None
+        writer.save_match(user_id, self.cat, self.score)
+        
+        flusher = threading.Thread(target=writer.flush)
+        flusher.start()
+        flusher.join(timeout=10)
+        assert not flusher.is_alive()
+        assert self.count("users") == 1 and self.count("matches") == 1
+        assert writer.stats()['errors'] == 1 and isinstance(writer.last_error, TypeError)
+        writer.close()
+        
+        strict = WriteBehindWriter(self.db, durability='strict')
+        with pytest.raises(TypeError):
+            strict.save_match(user_id, self.cat, replace(self.score, total_score=None))
+        strict.save_match(user_id, self.cat, self.score)
+        strict.close()
+        assert self.count("matches") == 2
+
+    def test_app_saves_through_writer(self):
+        """Test the app routes saves through the writer and flushes before reading reports"""
+        app = PurrfectMatchApp(self.db_path)
+        app.enable_write_behind()
+        app.cat_api = Mock()
+        app.cat_api.get_breed_by_name.return_value = None
+        app.petfinder_api = Mock()
+        app.petfinder_api.search_cats.return_value = [self.cat]
+        
+        app.process_new_user(UserProfile(zip_code="12345"))
+        app.display_report()
+        assert app.writer.stats()['writes'] == 2
+        assert len(app.db.get_past_matches()) == 1
+        app.writer.close()
+
+class TestExport:
+    """Test streaming exports of users and matches"""
+    
+    def setup_method(self):
+        """Set up adopters in two ZIPs with a few matches each"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, "test.db")
+        self.db = Database(self.db_path)
+        self.add_adopters(3)
+
+    def teardown_method(self):
+        """Close the pool and remove the temporary database"""
+        self.db.close()
+        self.temp_dir.cleanup()
+
+    def add_adopters(self, count):
+        for i in range(count):
+            user_id = self.db.save_user(UserProfile(zip_code="11111" if i % 2 else "22222"))
+            for j in range(2):
+                cat = CatProfile(petfinder_id=f"{i}-{j}", name=f"Cat {j}", age="Adult", breeds=["Siamese"],
+                                 size="Small", gender="Female", description="", photos=[], contact_email="",
+                                 contact_phone="", shelter_name="")
+                self.db.save_match(user_id, cat, CompatibilityScore(cat_id=cat.petfinder_id, total_score=70 + j,
+                                                                    lifestyle_score=30, experience_score=20,
+                                                                    personality_score=20 + j, reasons=[]))
+
+    def read_jsonl(self, path):
+        with gzip.open(path, 'rt') as f:
+            return [json.loads(line) for line in f]
+
+    def test_csv_and_filtered_jsonl(self):
+        """Test exporting users to CSV and one ZIP's past matches to gzip JSON Lines"""
+        users_path = os.path.join(self.temp_dir.name, "users.csv")
+        assert self.db.export('users', users_path, chunk_size=2) == 3
+        with open(users_path) as f:
+            lines = f.read().splitlines()
+        assert lines[0].startswith("id,user_id,home_type") and len(lines) == 4
+        
+        matches_path = os.path.join(self.temp_dir.name, "past.jsonl.gz")
+        assert self.db.export('past_matches', matches_path, zip_code="11111", since="2000-01-01") == 2
+        rows = self.read_jsonl(matches_path)
+        assert {row['zip_code'] for row in rows} == {"11111"} and rows[0]['cat_name'] == "Cat 0"
+        assert self.db.export('matches', matches_path, until="2000-01-01") == 0
+
+    def test_resume_after_interruption_and_new_rows(self):
+        """Test a resumed export neither repeats nor skips rows"""
+        path = os.path.join(self.temp_dir.name, "matches.jsonl.gz")
+        iter_export = self.db.iter_export
+        
+        def interrupted(*args, **kwargs):
+            chunks = iter_export(*args, **kwargs)
+            yield next(chunks)
+            raise KeyboardInterrupt
+        
+        with patch.object(self.db, 'iter_export', interrupted), pytest.raises(KeyboardInterrupt):
+            self.db.export('matches', path, chunk_size=4)
+        assert len(self.read_jsonl(path)) == 4
+        
+        assert self.db.export('matches', path, chunk_size=4, resume=True) == 2
+        self.add_adopters(1)
+        assert self.db.export('matches', path, chunk_size=4, resume=True) == 2
+        assert [row['id'] for row in self.read_jsonl(path)] == list(range(1, 9))
+        with pytest.raises(ValueError):
+            self.db.export('matches', path, zip_code="11111", resume=True)
+
+    def test_writers_proceed_during_export(self):
+        """Test saves succeed while an export is part-way through"""
+        chunks = self.db.iter_export('users', chunk_size=1)
+        assert len(next(chunks)) == 1
+        self.add_adopters(1)
+        assert sum(len(chunk) for chunk in chunks) == 3
+
+    def test_invalid_dates_are_rejected(self):
+        """Test malformed --since/--until values fail instead of silently filtering everything"""
+        path = os.path.join(self.temp_dir.name, "users.jsonl")
+        for filters in ({'since': "2026/01/01"}, {'until': "2026-02-30"}, {'until': "yesterday"}):
+            with pytest.raises(ValueError):
+                self.db.export('users', path, **filters)
+            with pytest.raises(ValueError):
+                next(self.db.iter_export('users', **filters))
+        assert not os.path.exists(path)
+        assert self.db.export('users', path, since="2000-01-01", until="2999-12-31") == 3
+
+    def test_warns_that_archived_matches_are_excluded(self, capsys):
+        """Test exporting matches after archival says archived history is left out"""
+        self.db.archive_dir = os.path.join(self.temp_dir.name, "archive")
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("UPDATE matches SET created_at = '2020-01-15 10:00:00' WHERE id = 1")
+        assert self.db.archive_matches(older_than_days=30) == 1
+        
+        path = os.path.join(self.temp_dir.name, "past.jsonl.gz")
+        assert self.db.export('past_matches', path) == 5
+        assert "not included" in capsys.readouterr().out
+
+    def test_export_command(self):
+        """Test the export command writes the requested view"""
+        path = os.path.join(self.temp_dir.name, "users.csv.gz")
+        purrfect_match.main(["--db", self.db_path, "export", "users", path, "--zip", "22222"])
+        with gzip.open(path, 'rt') as f:
+            assert len(f.read().splitlines()) == 3
+
+class TestCatFeatureStore:
+    """Test the columnar cat feature store"""
+    
+    def setup_method(self):
+        """Set up test cats"""
+        self.cats = [
+            CatProfile(
+                petfinder_id=f"cat_{i}", name=f"Cat {i}", age="Adult", breeds=[],
+                size="Medium", gender="Female", description="", photos=[],
+                contact_email="", contact_phone="", shelter_name="",
+                energy_level=i + 1, independence=10 - i,
+                personality_traits=["calm", "shy"] if i % 2 else ["playful"],
+                temperament=["easy", "moderate", "challenging"][i % 3]
+            )
+            for i in range(5)
+        ]
+        hypo = BreedInfo(name="Siberian", temperament=[], origin="", description="",
+                         life_span="", hypoallergenic=1)
+        self.store = CatFeatureStore.from_cats(self.cats, [hypo, None, None, hypo, None])
+
+    def test_trait_encoding_round_trip(self):
+        """Test trait bitmask encoding"""
+        mask = encode_traits(["calm", "shy", "unknown"])
+        assert mask == 0b100001
+        assert decode_traits(mask) == ["calm", "shy"]
+
+    def test_append_and_row(self):
+        """Test appending cats and reading rows back"""
+        assert len(self.store) == 5
+        row = self.store.row(3)
+        assert row.petfinder_id == "cat_3"
+        assert row.energy_level == 4
+        assert row.independence == 7
+        assert row.temperament == 0  # easy
+        assert decode_traits(row.traits) == ["calm", "shy"]
+        assert row.hypoallergenic == 1
+
+    def test_take_filters_rows(self):
+        """Test filtering the store by index"""
+        subset = self.store.take([4, 0])
+        assert subset.ids == ["cat_4", "cat_0"]
+        assert list(subset.column("energy_level")) == [5, 1]
+
+    def test_save_and_memory_mapped_load(self):
+        """Test saving and loading the store as a memory map"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "features.pfcs")
+            self.store.save(path)
+            
+            loaded = CatFeatureStore.load(path)
+            try:
+                assert loaded.read_only
+                assert loaded.ids == self.store.ids
+                for name, _ in CatFeatureStore.COLUMNS:
+                    assert list(loaded.column(name)) == list(self.store.column(name))
+                with pytest.raises(ValueError):
+                    loaded.append(self.cats[0])
+            finally:
+                loaded.close()
+
+class TestTraitIndex:
+    """Test the inverted trait index"""
+    
+    def setup_method(self):
+        """Set up cats with known traits"""
+        traits = [["calm", "affectionate"], ["playful"], [], ["calm", "social", "affectionate"], ["shy"]]
+        self.cats = [
+            CatProfile(
+                petfinder_id=f"cat_{i}", name=f"Cat {i}", age="Adult", breeds=[],
+                size="Medium", gender="Female", description="", photos=[],
+                contact_email="", contact_phone="", shelter_name="",
+                personality_traits=cat_traits
+            )
+            for i, cat_traits in enumerate(traits)
+        ]
+        self.index = TraitIndex.from_cats(self.cats)
+
+    def test_matching_bitmaps(self):
+        """Test trait filters select the right positions"""
+        assert self.index.positions(self.index.matching(["calm"])) == [0, 3]
+        assert self.index.positions(self.index.matching(["calm", "social"])) == [3]
+        assert self.index.matching(["unknown"]) == 0
+        assert self.index.positions(self.index.matching([])) == [0, 1, 2, 3, 4]
+        assert self.index.trait_counts()["affectionate"] == 2
+
+    def test_match_counts(self):
+        """Test per-cat counts of desired traits"""
+        assert self.index.match_counts(["calm", "affectionate", "nonsense"]) == [2, 0, 0, 2, 0]
+
+    def test_from_feature_store(self):
+        """Test an index built from a feature store's trait column"""
+        index = CatFeatureStore.from_cats(self.cats).trait_index()
+        assert index.bitmaps == self.index.bitmaps
+
+    def test_bulk_personality_scores_match_per_cat_scores(self):
+        """Test bitmask personality scoring agrees with per-cat scoring"""
+        calculator = CompatibilityCalculator()
+        hypo = BreedInfo(name="Siberian", temperament=[], origin="", description="",
+                         life_span="", hypoallergenic=1)
+        regular = BreedInfo(name="Tabby", temperament=[], origin="", description="", life_span="")
+        breed_infos = [hypo, regular, None, regular, hypo]
+        for user in (UserProfile(desired_traits=["calm", "affectionate", "social", "playful"]),
+                     UserProfile(desired_traits=[], allergies=True),
+                     UserProfile(desired_traits=["shy", "calm"], allergies=True)):
+            expected = [calculator._calculate_personality_score(user, cat, breed_info)
+                        for cat, breed_info in zip(self.cats, breed_infos)]
+            assert calculator.personality_scores(user, self.cats, breed_infos) == expected
+
+class TestRegionSearch:
+    """Test multi-ZIP region search"""
+    
+    def setup_method(self):
+        """Set up an app with stubbed API clients"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.app = PurrfectMatchApp(os.path.join(self.temp_dir.name, "test.db"))
+        self.app.cat_api = Mock()
+        self.app.cat_api.get_breed_by_name.return_value = None
+        self.app.petfinder_api = Mock()
+        self.user = UserProfile(activity_level=3, desired_traits=["calm"], zip_code="11111")
+
+    def teardown_method(self):
+        """Remove the temporary database"""
+        self.temp_dir.cleanup()
+
+    def make_cat(self, cat_id, distance, traits=()):
+        return CatProfile(
+            petfinder_id=cat_id, name=f"Cat {cat_id}", age="Adult", breeds=["Siamese"], size="Medium",
+            gender="Female", description="", photos=[], contact_email="", contact_phone="",
+            shelter_name="", distance=distance, energy_level=3, personality_traits=list(traits)
+        )
+
+    def test_merges_and_dedupes_across_zips(self):
+        """Test duplicates keep the smallest distance and results are ranked together"""
+        results = {
+            "11111": [self.make_cat("a", 9.0), self.make_cat("b", 2.0, ["calm"])],
+            "22222": [self.make_cat("a", 3.0), self.make_cat("c", 1.0)],
+        }
+        self.app.petfinder_api.search_cats.side_effect = lambda zip_code, limit, radius, **kwargs: results[zip_code]
+        
+        matches = self.app.find_matches_in_region(self.user, ["11111", "22222", "11111"], radius=25)
+        
+        assert self.app.petfinder_api.search_cats.call_count == 2
+        assert [cat.petfinder_id for cat, _, _ in matches][0] == "b"
+        assert {cat.petfinder_id: cat.distance for cat, _, _ in matches} == {"a": 3.0, "b": 2.0, "c": 1.0}
+        assert len(self.app.find_matches_in_region(self.user, ["11111", "22222"], k=2)) == 2
+
+    def test_latency_budget_skips_slow_zips(self):
+        """Test slow searches are abandoned when the budget runs out"""
+        def search(zip_code, limit, radius, deadline=None):
+            if zip_code == "22222":
+                time.sleep(1.0)
+            return [self.make_cat(zip_code, 1.0)]
+        self.app.petfinder_api.search_cats.side_effect = search
+        
+        start = time.time()
+        matches = self.app.find_matches_in_region(self.user, ["11111", "22222"], budget=0.2)
+        
+        assert time.time() - start < 0.9
+        assert [cat.petfinder_id for cat, _, _ in matches] == ["11111"]
+
+class TestPrecomputedRecommendations:
+    """Test per-ZIP archetype recommendations"""
+    
+    def setup_method(self):
+        """Set up an app whose searches return a fixed inventory"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.app = PurrfectMatchApp(os.path.join(self.temp_dir.name, "test.db"))
+        hypo = BreedInfo(name="Siberian", temperament=[], origin="", description="", life_span="",
+                         hypoallergenic=1)
+        self.app.cat_api = Mock()
+        self.app.cat_api.get_breed_by_name.side_effect = lambda name, deadline=None: hypo if name == "Siberian" else None
+        traits = [["calm"], ["playful", "social"], ["affectionate", "calm"], ["independent"], ["shy"], []]
+        self.cats = [
+            CatProfile(
+                petfinder_id=f"cat_{i}", name=f"Cat {i}", age="Adult", breeds=["Siberian" if i % 3 else "Tabby"],
+                size="Medium", gender="Female", description="", photos=[f"https://photos.example/{i}.jpg"],
+                contact_email="", contact_phone="", shelter_name="", distance=float(i),
+                energy_level=1 + i % 10, independence=10 - i % 7, personality_traits=traits[i % len(traits)],
+                temperament=["easy", "moderate", "challenging"][i % 3]
+            )
+            for i in range(12)
+        ]
+        self.app.petfinder_api = Mock()
+        self.app.petfinder_api.search_cats.side_effect = lambda *args, **kwargs: [replace(cat) for cat in self.cats]
+        self.users = [
+            UserProfile(home_type=home_type, hours_away=hours, activity_level=activity, experience=experience,
+                        allergies=allergies, desired_traits=desired, zip_code="11111")
+            for home_type in HomeType
+            for hours in (2, 7, 12)
+            for experience in ExperienceLevel
+            for allergies in (False, True)
+            for activity, desired in ((1, []), (6, ["calm"]), (10, ["playful", "social", "shy"]))
+        ]
+
+    def teardown_method(self):
+        """Remove the temporary database"""
+        self.app.db.close()
+        self.temp_dir.cleanup()
+
+    def live(self, user):
+        return [(cat.petfinder_id, score) for cat, score, _ in self.app.start_match_session(user).ranked()]
+
+    def test_full_inventory_answers_match_live_scoring(self):
+        """Test answers from a complete precomputed inventory equal live rankings"""
+        assert self.app.precompute_recommendations(["11111"], top_n=20) == 1
+        for user in self.users:
+            matches = self.app.precomputed_matches(user)
+            assert [(cat.petfinder_id, score) for cat, score, _ in matches] == self.live(user)
+        assert matches[0][0].photos == self.cats[int(matches[0][0].petfinder_id[4:])].photos
+
+    def test_top_n_answers_are_exact_or_fall_back(self):
+        """Test answers from a partial top N are exact prefixes, else scored live"""
+        self.app.precompute_recommendations(["11111"], top_n=8)
+        self.app.precompute_min_results = 3
+        answered = 0
+        for user in self.users:
+            matches = self.app.precomputed_matches(user)
+            if matches is not None:
+                answered += 1
+                assert len(matches) >= 3
+                assert [(cat.petfinder_id, score) for cat, score, _ in matches] == self.live(user)[:len(matches)]
+        assert 0 < answered < len(self.users)
+
+    def test_stale_unusual_or_missing_fall_back(self):
+        """Test stale data, changed rules, unknown ZIPs and unusual answers are scored live"""
+        self.app.precompute_recommendations(["11111"])
+        user = self.users[0]
+        assert self.app.precomputed_matches(user) is not None
+        assert self.app.precomputed_matches(replace(user, zip_code="22222")) is None
+        assert archetype_key(replace(user, activity_level=0), self.app.calculator.weights) is None
+        assert self.app.precomputed_matches(replace(user, activity_level=0)) is None
+        
+        self.app.calculator.weights = replace(self.app.calculator.weights, house=8)
+        assert self.app.precomputed_matches(user) is None
+        self.app.precompute_recommendations(["11111"])
+        self.app.precompute_max_age = 0
+        assert self.app.precomputed_matches(user) is None
+
+    def test_find_matches_uses_recent_zips(self):
+        """Test precomputing active ZIPs lets find_matches skip the search"""
+        self.app.db.save_user(self.users[0])
+        zip_codes = self.app.db.get_active_zip_codes()
+        assert zip_codes == ["11111"]
+        self.app.precompute_recommendations(zip_codes)
+        searches = self.app.petfinder_api.search_cats.call_count
+        
+        matches = self.app.find_matches(self.users[5])
+        assert self.app.petfinder_api.search_cats.call_count == searches
+        assert len(matches) == len(self.cats)
+
+class TestWarmup:
+    """Test background warm-up while the quiz runs"""
+    
+    def setup_method(self):
+        """Set up an app with a previous adopter and stubbed APIs"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.app = PurrfectMatchApp(os.path.join(self.temp_dir.name, "test.db"))
+        self.app.db.save_user(UserProfile(zip_code="12345"))
+        self.app.cat_api = Mock()
+        self.app.cat_api.get_breed_by_name.return_value = None
+        self.app.petfinder_api = Mock()
+        self.app.petfinder_api.search_cats.return_value = [
+            CatProfile(petfinder_id="1", name="Mochi", age="Adult", breeds=["Siamese"], size="Small",
+                       gender="Female", description="", photos=[], contact_email="",
+                       contact_phone="", shelter_name="")
+        ]
+
+    def teardown_method(self):
+        """Remove the temporary database"""
+        self.temp_dir.cleanup()
+
+    def test_warmup_fetches_token_catalog_and_search(self):
+        """Test warm-up starts every background task"""
+        self.app.start_warmup()
+        self.app.wait_for_warmup(timeout=5)
+        
+        self.app.cat_api.load_catalog.assert_called_once()
+        self.app.petfinder_api._get_access_token.assert_called_once()
+        self.app.petfinder_api.search_cats.assert_called_once()
+        assert self.app.petfinder_api.search_cats.call_args.args[0] == "12345"
+
+    def test_search_reuses_speculative_results(self):
+        """Test the post-quiz search uses the warmed-up results for the same ZIP"""
+        self.app.start_warmup()
+        self.app.wait_for_warmup(timeout=5)
+        
+        matches = self.app.find_matches(UserProfile(zip_code="12345"))
+        assert [cat.name for cat, _, _ in matches] == ["Mochi"]
+        assert self.app.petfinder_api.search_cats.call_count == 1
+        
+        # Speculative results are used once; other ZIPs search normally
+        self.app.find_matches(UserProfile(zip_code="12345"))
+        self.app.find_matches(UserProfile(zip_code="99999"))
+        assert self.app.petfinder_api.search_cats.call_count == 3
+
+class TestProgressiveSearch:
+    """Test progressive result display"""
+    
+    def setup_method(self):
+        """Set up an app with a paged search stub"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.app = PurrfectMatchApp(os.path.join(self.temp_dir.name, "test.db"))
+        self.app.cat_api = Mock()
+        self.app.cat_api.get_breed_by_name.return_value = None
+        self.app.petfinder_api = PetfinderAPIClient("key", "secret")
+        self.pages = {
+            1: [self.make_cat(str(i), energy=i % 10 + 1) for i in range(20)],
+            2: [self.make_cat("19"), self.make_cat("20", energy=3), self.make_cat("21")],
+        }
+
+    def teardown_method(self):
+        """Remove the temporary database"""
+        self.temp_dir.cleanup()
+
+    def make_cat(self, cat_id, energy=5):
+        return CatProfile(
+            petfinder_id=cat_id, name=f"Cat {cat_id}", age="Adult", breeds=[], size="Medium",
+            gender="Female", description="", photos=[], contact_email="", contact_phone="",
+            shelter_name="", energy_level=energy
+        )
+
+    def search(self, location, limit=20, distance=None, page=1, deadline=None):
+        return self.pages.get(page, [])
+
+    def test_iter_search_pages(self):
+        """Test paging stops at a short page and skips repeated cats"""
+        with patch.object(self.app.petfinder_api, 'search_cats', side_effect=self.search) as search:
+            pages = list(self.app.petfinder_api.iter_search_pages("12345", max_pages=5))
+        assert search.call_count == 2
+        assert [len(page) for page in pages] == [20, 2]
+
+    def test_progressive_mode_persists_once(self, capsys):
+        """Test provisional results are shown per page and saved once at the end"""
+        self.app.progressive = True
+        user = UserProfile(activity_level=3, zip_code="12345")
+        with patch.object(self.app.petfinder_api, 'search_cats', side_effect=self.search), \
+                patch.object(self.app.db, 'save_match', wraps=self.app.db.save_match) as save_match:
+            self.app.process_new_user(user)
+        
+        output = capsys.readouterr().out
+        assert "Provisional top matches after page 1 (20 cats scored)" in output
+        assert "Provisional top matches after page 2 (22 cats scored)" in output
+        assert save_match.call_count == 5
+        assert self.app.db.get_match_report()['match_count'] == 5
+
+class TestProfiling:
+    """Test profiled runs against stubbed API responses"""
+    
+    def setup_method(self):
+        """Set up canned Petfinder responses and a quiz file"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.fixtures_path = os.path.join(self.temp_dir.name, "fixtures.json")
+        self.quiz_path = os.path.join(self.temp_dir.name, "quiz.jsonl")
+        with open(self.fixtures_path, 'w') as f:
+            json.dump({
+                "POST https://api.petfinder.com/v2/oauth2/token": {"body": {"access_token": "t", "expires_in": 3600}},
+                "GET https://api.petfinder.com/v2/animals": {"body": {"animals": [
+                    {"id": 1, "name": "Mochi", "breeds": {"primary": "Siamese"}, "description": "calm lap cat"},
+                    {"id": 2, "name": "Ziggy", "breeds": {}, "description": "very playful and energetic"},
+                ]}},
+            }, f)
+        with open(self.quiz_path, 'w') as f:
+            f.write(json.dumps({"home_type": "apartment", "zip_code": "12345", "desired_traits": ["calm"]}) + "\n")
+            f.write("not json\n")
+
+    def teardown_method(self):
+        """Remove the temporary files and restore the network transport"""
+        set_http_transport(None)
+        self.temp_dir.cleanup()
+
+    def test_stub_transport_answers_api_requests(self):
+        """Test API clients run offline against the fixtures"""
+        transport = StubTransport.from_file(self.fixtures_path)
+        set_http_transport(transport)
+        
+        cats = PetfinderAPIClient("key", "secret").search_cats("12345")
+        assert [cat.name for cat in cats] == ["Mochi", "Ziggy"]
+        assert TheCatAPIClient().get_breeds() == []
+        assert ("GET", "https://api.thecatapi.com/v1/breeds") in transport.requests
+
+    def test_profiled_batch_run_writes_outputs(self):
+        """Test --profile on a batch run writes pstats, collapsed stacks and memory stats"""
+        prefix = os.path.join(self.temp_dir.name, "profile", "run")
+        output_path = os.path.join(self.temp_dir.name, "matches.jsonl")
+        purrfect_match.main(["--db", os.path.join(self.temp_dir.name, "test.db"),
+                             "--stub-api", self.fixtures_path, "--profile", prefix,
+                             "batch", self.quiz_path, output_path])
+        
+        with open(output_path) as f:
+            results = [json.loads(line) for line in f]
+        assert len(results) == 1
+        assert {match['name'] for match in results[0]['matches']} == {"Mochi", "Ziggy"}
+        
+        assert os.path.getsize(prefix + ".pstats") > 0
+        with open(prefix + ".memory.txt") as f:
+            assert f.readline().startswith("current ")
+        with open(prefix + ".folded") as f:
+            for line in f:
+                stack, count = line.rsplit(" ", 1)
+                assert int(count) > 0 and "(" in stack
+
+    def test_stage_of_uses_innermost_stage(self):
+        """Test samples are attributed to the innermost stage function"""
+        stack = "main (purrfect_match.py:1);PetfinderAPIClient.search_cats (purrfect_match.py:2);" \
+                "Database.save_match (purrfect_match.py:3);execute (sqlite3:0)"
+        assert Profiler.stage_of(stack) == "database"
+        assert Profiler.stage_of("main (purrfect_match.py:1)") == "other"
+
+class TestCassettes:
+    """Test recording and replaying API traffic"""
+    
+    def setup_method(self):
+        """Set up canned responses to record from"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cassette_path = os.path.join(self.temp_dir.name, "run.cassette.gz")
+        self.stub = StubTransport({
+            "POST https://api.petfinder.com/v2/oauth2/token": {"body": {"access_token": "secret-token",
+                                                                       "expires_in": 3600}},
+            "GET https://api.petfinder.com/v2/animals": {"body": {"animals": [
+                {"id": 1, "name": "Mochi", "breeds": {"primary": "Siamese"}, "description": "calm lap cat"},
+            ]}},
+        })
+
+    def teardown_method(self):
+        """Remove the temporary files and restore the network transport"""
+        set_http_transport(None)
+        self.temp_dir.cleanup()
+
+    def record(self):
+        recorder = CassetteRecorder(self.cassette_path, self.stub)
+        set_http_transport(recorder)
+        cats = PetfinderAPIClient("my-client-id", "my-client-secret").search_cats("12345")
+        recorder.save()
+        set_http_transport(None)
+        return cats
+
+    def test_record_then_replay(self):
+        """Test a replayed run sees the recorded responses without the original transport"""
+        recorded = self.record()
+        transport = CassetteTransport.from_file(self.cassette_path)
+        set_http_transport(transport)
+        
+        replayed = PetfinderAPIClient("key", "secret").search_cats("12345")
+        assert [cat.name for cat in replayed] == [cat.name for cat in recorded] == ["Mochi"]
+        # Other ZIPs fall back to a recording of the same endpoint
+        assert [cat.name for cat in PetfinderAPIClient("key", "secret").search_cats("54321")] == ["Mochi"]
+        assert transport.misses == 0
+        assert TheCatAPIClient().get_breeds() == []
+        assert transport.misses == 1
+
+    def test_credentials_are_not_recorded(self):
+        """Test client credentials and tokens are stripped from cassettes"""
+        self.record()
+        with gzip.open(self.cassette_path, 'rt') as f:
+            text = f.read()
+        assert "my-client-secret" not in text and "my-client-id" not in text
+        assert "secret-token" not in text
+        assert "location=12345" in text
+
+    def test_replay_latency_and_errors(self):
+        """Test recorded latency is played back when asked, and recorded failures re-raised"""
+        transport = CassetteTransport([
+            {"key": "GET https://slow.example/a", "elapsed": 0.05, "status": 200, "body": {"ok": True}},
+            {"key": "GET https://down.example/b", "elapsed": 0.0, "error": "timeout"},
+        ], latency=1.0)
+        started = time.perf_counter()
+        assert transport("GET", "https://slow.example/a").json() == {"ok": True}
+        assert time.perf_counter() - started >= 0.05
+        with pytest.raises(requests.Timeout):
+            transport("GET", "https://down.example/b")
+
+    def test_cli_record_and_replay(self):
+        """Test --record and --replay on batch runs"""
+        fixtures_path = os.path.join(self.temp_dir.name, "fixtures.json")
+        quiz_path = os.path.join(self.temp_dir.name, "quiz.jsonl")
+        with open(fixtures_path, 'w') as f:
+            json.dump(self.stub.fixtures, f)
+        with open(quiz_path, 'w') as f:
+            f.write(json.dumps({"zip_code": "12345", "desired_traits": ["calm"]}) + "\n")
+        
+        outputs = []
+        for mode in (["--stub-api", fixtures_path, "--record", self.cassette_path],
+                     ["--replay", self.cassette_path]):
+            output_path = os.path.join(self.temp_dir.name, f"matches{len(outputs)}.jsonl")
+            purrfect_match.main(["--db", os.path.join(self.temp_dir.name, f"test{len(outputs)}.db")] + mode +
+                                ["batch", quiz_path, output_path])
+            set_http_transport(None)
+            with open(output_path) as f:
+                outputs.append([match['name'] for match in json.loads(f.readline())['matches']])
+        assert outputs[0] == outputs[1] == ["Mochi"]
+
 class TestAPIIntegration:
     """Integration tests for API functionality"""
     